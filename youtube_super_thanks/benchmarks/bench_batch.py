@@ -0,0 +1,66 @@
+"""批次抓取的吞吐量 (影片/小時)：以本機 fixture 伺服器代替 YouTube，依序量測不同的 worker 數，需要 Chrome
+
+python benchmarks/bench_batch.py [影片數] [worker 數 ...]   預設 12 部影片，worker 1 2 4
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from common import print_table
+from config import BATCH_SETTINGS, EXTRACTION_SETTINGS, SCROLL_SETTINGS
+from database.db_init import init_database
+from fixture_server import start_fixture_server
+from scraper.batch import run_batch
+
+THREADS_PER_VIDEO = 200
+
+def run_once(video_urls, workers):
+    """在暫存目錄的全新資料庫跑一次批次，回傳 (耗時秒數, 成功數, 寫入筆數)"""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                stats = run_batch(video_urls, workers)
+            elapsed = time.perf_counter() - start
+            
+            conn = init_database()
+            saved = conn.execute("SELECT COUNT(*) FROM super_thanks").fetchone()[0]
+            conn.close()
+        finally:
+            os.chdir(cwd)
+    return elapsed, stats["done"], saved
+
+def main(videos=12, worker_counts=(1, 2, 4)):
+    # 本機頁面沒有網路延遲，縮短最後確認沒有新評論的等待，避免它佔掉大部分時間
+    SCROLL_SETTINGS.update(scroll_timeout=1, no_change_threshold=2)
+    EXTRACTION_SETTINGS["engine"] = "browser"
+    BATCH_SETTINGS["engine"] = "threads"
+    
+    server, base_url = start_fixture_server(threads=THREADS_PER_VIDEO)
+    video_urls = [f"{base_url}/watch?v=fixture{i:04d}" for i in range(videos)]
+    expected_rows = videos * len(range(0, THREADS_PER_VIDEO, 3))
+    
+    rows = []
+    try:
+        for workers in worker_counts:
+            elapsed, done, saved = run_once(video_urls, workers)
+            if saved != expected_rows:
+                print(f"警告: worker {workers} 只寫入 {saved}/{expected_rows} 筆")
+            rows.append((workers, f"{done}/{videos}", f"{elapsed:.1f}s", f"{done / elapsed * 3600:,.0f}"))
+            print(f"worker {workers}: {done / elapsed * 3600:,.0f} 部影片/小時")
+    finally:
+        server.shutdown()
+    
+    print(f"\n{videos} 部影片，每部 {THREADS_PER_VIDEO} 個評論串")
+    print_table(("worker", "成功", "耗時", "影片/小時"), rows)
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    if len(args) > 1:
+        main(args[0], args[1:])
+    else:
+        main(*args)
\ No newline at end of file
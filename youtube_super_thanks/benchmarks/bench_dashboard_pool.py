@@ -0,0 +1,146 @@
+"""儀表板 callback 在多人同時使用時的延遲 (p50 / p99)，同時有爬蟲持續寫入
+
+比較每次 callback 都 sqlite3.connect (改版前) 與共用唯讀連線池 (read_connection)
+python benchmarks/bench_dashboard_pool.py [同時使用人數] [每人 callback 次數]
+"""
+import contextlib
+import io
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from common import percentile, print_table
+from database.db_init import init_database
+from database.db_queries import save_super_thanks, save_video_info
+from database.models import SuperThanksBatch
+from database.pool import ReadConnectionPool, get_read_pool
+
+VIDEOS = 20
+ROWS_PER_VIDEO = 2000
+WRITE_BATCH = 20  # 串流模式每次滾動寫入的筆數
+
+def video_info(index, prefix="benchvid"):
+    video_id = f"{prefix}{index:03d}"
+    return {"video_id": video_id, "video_url": f"https://www.youtube.com/watch?v={video_id}",
+            "title": f"video {index}", "channel": f"channel {index % 4}"}
+
+def make_items(prefix, count):
+    items = SuperThanksBatch()
+    for i in range(count):
+        items.append(("$", "US$", "¥", "€")[i % 4], 1.0 + i % 50, f"{prefix}-{i}", f"user{i % 300}",
+                     "comment", amount_twd=30.0 + i % 50)
+    return items
+
+def seed_database():
+    conn = init_database()
+    for index in range(VIDEOS):
+        save_video_info(conn, video_info(index))
+        save_super_thanks(conn, video_info(index)["video_id"], make_items(f"seed{index}", ROWS_PER_VIDEO))
+    conn.close()
+
+@contextmanager
+def connect_per_call():
+    """改版前：每個 callback 自己開關連線"""
+    conn = sqlite3.connect("super_thanks.db")
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+def run(dashboard, name, users, calls_per_user):
+    """users 個執行緒同時呼叫 callback，另一個執行緒模擬爬蟲寫入，回傳 ({callback: 延遲列表}, 每秒寫入次數)"""
+    stop = threading.Event()
+    commits = [0]
+    
+    def writer():
+        conn = init_database()
+        batch = 0
+        while not stop.is_set():
+            # 寫到 callback 不會查詢的影片，每種方式查詢的資料量才會一樣
+            info = video_info(batch % VIDEOS, prefix="benchwrite")
+            save_super_thanks(conn, info["video_id"], make_items(f"{name}-{batch}", WRITE_BATCH))
+            batch += 1
+            commits[0] += 1
+        conn.close()
+    
+    callbacks = [
+        ("load_video_summary", lambda video_id: dashboard.load_video_summary(video_id)),
+        ("load_super_thanks_page", lambda video_id: dashboard.load_super_thanks_page(video_id, 0, 20, [], "")),
+        ("update_jobs_table", lambda video_id: dashboard.update_jobs_table(0, None)),
+        # 每次寫入都會讓總覽快取失效，重新產生圖表的時間遠大於開連線的時間
+        ("get_overview_data", lambda video_id: dashboard.get_overview_data()),
+    ]
+    latencies = {callback_name: [] for callback_name, _ in callbacks}
+    lock = threading.Lock()
+    
+    def user(seed):
+        rng = random.Random(seed)
+        for _ in range(calls_per_user):
+            callback_name, callback = rng.choice(callbacks)
+            start = time.perf_counter()
+            callback(video_info(rng.randrange(VIDEOS))["video_id"])
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies[callback_name].append(elapsed * 1000)
+    
+    writer_thread = threading.Thread(target=writer)
+    writer_thread.start()
+    threads = [threading.Thread(target=user, args=(i,)) for i in range(users)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    writer_thread.join()
+    return latencies, commits[0] / elapsed
+
+def main(users=16, calls_per_user=60):
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        # DATABASE_FILE 是相對路徑，在暫存目錄建立測試用資料庫
+        os.chdir(directory)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                seed_database()
+                import dashboard
+            
+            # 預設連線池 (READ_POOL_SETTINGS) 比使用人數小時，多出來的 callback 要排隊等連線
+            wide_pool = ReadConnectionPool(size=users)
+            modes = (
+                ("每次 connect", connect_per_call),
+                (f"連線池 size={get_read_pool().size}", dashboard.read_connection),
+                (f"連線池 size={users}", wide_pool.connection),
+            )
+            rows = []
+            for name, read_connection in modes:
+                dashboard.read_connection = read_connection
+                with contextlib.redirect_stdout(io.StringIO()):
+                    latencies, commits_per_second = run(dashboard, name, users, calls_per_user)
+                for callback_name, values in latencies.items():
+                    rows.append((
+                        name,
+                        callback_name,
+                        len(values),
+                        f"{percentile(values, 50):.1f}",
+                        f"{percentile(values, 99):.1f}",
+                        f"{commits_per_second:.0f}",
+                    ))
+            
+            stats = get_read_pool().stats
+            get_read_pool().close()
+            wide_pool.close()
+        finally:
+            os.chdir(cwd)
+    
+    print(f"{users} 人同時使用，每人 {calls_per_user} 次 callback，同時每次寫入 {WRITE_BATCH} 筆")
+    print_table(("方式", "callback", "次數", "p50 ms", "p99 ms", "寫入 commit/秒"), rows)
+    print(f"連線池: 開啟 {stats['opened']} 個連線，重複使用 {stats['reused']} 次")
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:3]])
\ No newline at end of file
@@ -0,0 +1,109 @@
+"""save_super_thanks 寫入速度 (筆/秒)，每種方式都寫入全新的資料庫
+
+python benchmarks/bench_db_write.py [筆數 ...]   預設 1000 100000 1000000
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from common import print_table
+from database.db_init import init_database
+from database.db_queries import save_super_thanks, save_video_info
+from database.models import SuperThanksBatch
+
+VIDEO_INFO = {"video_id": "benchvideo1", "video_url": "https://www.youtube.com/watch?v=benchvideo1",
+              "title": "benchmark", "channel": "benchmark"}
+CURRENCIES = ["$", "US$", "¥", "HK$", "€", "£"]
+STREAMING_BATCH = 20  # 串流模式每次滾動大約寫入的筆數
+
+# 改版前的寫法：每筆一次 execute，最後才 commit
+def legacy_save(conn, items):
+    cursor = conn.cursor()
+    for row in items.rows(VIDEO_INFO["video_id"]):
+        cursor.execute('''
+        INSERT INTO super_thanks (
+            video_id, thread_id, currency, amount, amount_twd,
+            commenter_name, comment_text, comment_date
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', row)
+    conn.commit()
+
+def bulk_save(conn, items):
+    save_super_thanks(conn, VIDEO_INFO["video_id"], items)
+
+def streaming_save(conn, items):
+    """每 STREAMING_BATCH 筆一個交易，模擬串流模式每次滾動寫入一批"""
+    for start in range(0, len(items), STREAMING_BATCH):
+        chunk = SuperThanksBatch()
+        end = min(start + STREAMING_BATCH, len(items))
+        chunk.thread_ids = items.thread_ids[start:end]
+        chunk.currencies = items.currencies[start:end]
+        chunk.amounts = items.amounts[start:end]
+        chunk.amounts_twd = items.amounts_twd[start:end]
+        chunk.commenter_names = items.commenter_names[start:end]
+        chunk.comment_texts = items.comment_texts[start:end]
+        chunk.comment_dates = items.comment_dates[start:end]
+        save_super_thanks(conn, VIDEO_INFO["video_id"], chunk)
+
+# 改版前 sqlite 的預設值 vs DATABASE_PRAGMAS
+DEFAULT_PRAGMAS = {"journal_mode": "DELETE", "synchronous": "FULL", "cache_size": -2000}
+
+CASES = [
+    ("逐筆 execute", legacy_save, DEFAULT_PRAGMAS),
+    ("executemany", bulk_save, DEFAULT_PRAGMAS),
+    ("executemany + WAL", bulk_save, None),
+    (f"每 {STREAMING_BATCH} 筆 commit + WAL", streaming_save, None),
+]
+
+def make_items(count):
+    items = SuperThanksBatch(VIDEO_INFO["video_id"])
+    now = datetime.now().timestamp()
+    for i in range(count):
+        currency = CURRENCIES[i % len(CURRENCIES)]
+        items.append(currency, 1.0 + i % 100, f"Ugx{i:020d}", f"user{i % 5000}",
+                     f"comment text {i}", now - i, amount_twd=30.0 + i % 100)
+    return items
+
+def time_case(items, save, pragmas):
+    """在暫存目錄建立資料庫 (DATABASE_FILE 是相對路徑) 並計時寫入"""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            # 不印出建立資料表及遷移的訊息
+            with contextlib.redirect_stdout(io.StringIO()):
+                conn = init_database()
+            if pragmas:
+                for name, value in pragmas.items():
+                    conn.execute(f"PRAGMA {name} = {value}")
+            save_video_info(conn, VIDEO_INFO)
+            
+            start = time.perf_counter()
+            save(conn, items)
+            elapsed = time.perf_counter() - start
+            
+            saved = conn.execute("SELECT COUNT(*) FROM super_thanks").fetchone()[0]
+            conn.close()
+        finally:
+            os.chdir(cwd)
+    if saved != len(items):
+        print(f"警告: 只寫入 {saved}/{len(items)} 筆")
+    return elapsed
+
+def main(sizes):
+    rows = []
+    for size in sizes:
+        items = make_items(size)
+        for name, save, pragmas in CASES:
+            elapsed = time_case(items, save, pragmas)
+            rows.append((f"{size:,}", name, f"{elapsed:.2f}s", f"{size / elapsed:,.0f}"))
+            print(f"{size:,} 筆 - {name}: {size / elapsed:,.0f} 筆/秒")
+    
+    print()
+    print_table(("筆數", "方式", "耗時", "筆/秒"), rows)
+
+if __name__ == "__main__":
+    main([int(size) for size in sys.argv[1:]] or [1000, 100000, 1000000])
\ No newline at end of file
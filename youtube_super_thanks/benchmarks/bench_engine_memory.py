@@ -0,0 +1,99 @@
+"""每部同時處理的影片佔用多少記憶體：threads 引擎 (每個 worker 一個 Chrome) vs async 引擎 (一個 Chromium 的多個分頁)
+
+以本機 fixture 伺服器代替 YouTube，抓取期間定期取樣本程序及所有子程序 (瀏覽器) 的 RSS，
+回報尖峰值及扣掉開始前的基準後平均每部同時處理影片的 MB；需要 Chrome、playwright 及 psutil
+python benchmarks/bench_engine_memory.py [影片數] [同時處理數 ...]   預設 8 部影片，同時 1 2 4
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import threading
+import psutil
+from common import print_table
+from config import BATCH_SETTINGS, EXTRACTION_SETTINGS, SCROLL_SETTINGS
+from fixture_server import start_fixture_server
+from scraper.async_engine import run_async_batch
+from scraper.batch import run_batch
+
+THREADS_PER_VIDEO = 200
+SAMPLE_INTERVAL = 0.2
+
+def total_rss_mb():
+    """本程序加上所有子程序 (chromedriver、Chrome、playwright driver) 的 RSS MB"""
+    process = psutil.Process()
+    total = 0
+    for p in [process] + process.children(recursive=True):
+        try:
+            total += p.memory_info().rss
+        except psutil.Error:
+            # 取樣途中結束的分頁程序
+            pass
+    return total / (1024 * 1024)
+
+class PeakSampler(threading.Thread):
+    """背景取樣 RSS，記下尖峰值"""
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.peak = 0.0
+        self._stop_event = threading.Event()
+    
+    def run(self):
+        while not self._stop_event.wait(SAMPLE_INTERVAL):
+            self.peak = max(self.peak, total_rss_mb())
+    
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+def run_engine(engine, video_urls, concurrency):
+    """在暫存目錄的全新資料庫跑一次，回傳 (成功數, 開始前 MB, 尖峰 MB)"""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            baseline = total_rss_mb()
+            sampler = PeakSampler()
+            sampler.start()
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    if engine == "async":
+                        stats = run_async_batch(video_urls, concurrency)
+                    else:
+                        stats = run_batch(video_urls, concurrency)
+            finally:
+                sampler.stop()
+        finally:
+            os.chdir(cwd)
+    return stats["done"], baseline, sampler.peak
+
+def main(videos=8, concurrency_levels=(1, 2, 4)):
+    # 本機頁面沒有網路延遲，縮短最後確認沒有新評論的等待
+    SCROLL_SETTINGS.update(scroll_timeout=1, no_change_threshold=2)
+    EXTRACTION_SETTINGS["engine"] = "browser"
+    BATCH_SETTINGS["engine"] = "threads"
+    
+    server, base_url = start_fixture_server(threads=THREADS_PER_VIDEO)
+    video_urls = [f"{base_url}/watch?v=fixture{i:04d}" for i in range(videos)]
+    
+    rows = []
+    try:
+        for engine in ("threads", "async"):
+            for concurrency in concurrency_levels:
+                done, baseline, peak = run_engine(engine, video_urls, concurrency)
+                per_video = (peak - baseline) / concurrency
+                rows.append((engine, concurrency, f"{done}/{videos}", f"{peak:,.0f}", f"{per_video:,.0f}"))
+                print(f"{engine} x{concurrency}: 尖峰 {peak:,.0f} MB，每部影片 {per_video:,.0f} MB")
+    finally:
+        server.shutdown()
+    
+    print(f"\n{videos} 部影片，每部 {THREADS_PER_VIDEO} 個評論串")
+    print_table(("引擎", "同時處理", "成功", "尖峰 MB", "每部影片 MB"), rows)
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    if len(args) > 1:
+        main(args[0], args[1:])
+    else:
+        main(*args)
\ No newline at end of file
@@ -0,0 +1,60 @@
+"""抽取方式的基準測試：script (一次 execute_script 取出整批) vs element (每個元素一次 WebDriver 往返)
+
+使用 tests/fixtures/comments.html，在頁面內複製評論串到指定數量後分別計時，需要 Chrome
+python benchmarks/bench_extraction.py [評論串數量 ...]
+"""
+import pathlib
+import sys
+from common import FIXTURES_DIR, best_of, print_table
+from config import CSS_SELECTORS
+from scraper.browser import setup_browser
+from scraper.extractor import extract_super_thanks
+
+# 複製 fixture 的評論串，並讓每份的留言 ID 不同
+CLONE_THREADS_SCRIPT = """
+const [selector, total] = arguments;
+const originals = Array.from(document.querySelectorAll(selector));
+const parent = originals[0].parentNode;
+for (let copy = 1; parent.querySelectorAll(selector).length < total; copy++) {
+    for (const thread of originals) {
+        if (parent.querySelectorAll(selector).length >= total) {
+            break;
+        }
+        const clone = thread.cloneNode(true);
+        clone.querySelectorAll('#published-time-text a').forEach(link => {
+            link.setAttribute('href', link.getAttribute('href').replace(/lc=([^&.]+)/, 'lc=$1x' + copy));
+        });
+        parent.appendChild(clone);
+    }
+}
+return parent.querySelectorAll(selector).length;
+"""
+
+def main(sizes):
+    page = pathlib.Path(FIXTURES_DIR, "comments.html").as_uri()
+    driver = setup_browser()
+    rows = []
+    try:
+        for size in sizes:
+            driver.get(page)
+            threads = driver.execute_script(CLONE_THREADS_SCRIPT, CSS_SELECTORS["comments"], size)
+            
+            script_seconds, script_records = best_of(lambda: extract_super_thanks(driver, "script"), repeat=3)
+            element_seconds, element_records = best_of(lambda: extract_super_thanks(driver, "element"), repeat=1)
+            if script_records != element_records:
+                print(f"警告: {threads} 個評論串時兩種方式的結果不同")
+            
+            rows.append((
+                threads,
+                len(script_records),
+                f"{script_seconds * 1000:.1f} ms",
+                f"{element_seconds * 1000:.1f} ms",
+                f"{element_seconds / script_seconds:.1f}x"
+            ))
+    finally:
+        driver.quit()
+    
+    print_table(("評論串", "超級感謝", "script", "element", "加速"), rows)
+
+if __name__ == "__main__":
+    main([int(size) for size in sys.argv[1:]] or [8, 100, 1000])
\ No newline at end of file
@@ -0,0 +1,123 @@
+"""單一影片查詢在加索引前後的延遲 (預設 1000 萬筆超級感謝)
+
+先建立沒有索引的 super_thanks (改版前的資料表)，量測各查詢，接著套用遷移 2 的索引及 ANALYZE 後再量一次
+python benchmarks/bench_indexes.py [筆數] [每部影片筆數] [查詢次數]
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from common import percentile, print_table
+from database.db_init import _migration_2_indexes, apply_pragmas
+
+CURRENCIES = ["$", "US$", "¥", "HK$", "€", "£", "SGD", "MYR"]
+
+# 各頁面實際使用的單一影片查詢
+QUERIES = {
+    "總數及總額": '''
+        SELECT COUNT(*), SUM(amount_twd) FROM super_thanks WHERE video_id = ?
+    ''',
+    "金額最高 20 筆": '''
+        SELECT currency, amount, amount_twd, commenter_name, comment_text
+        FROM super_thanks WHERE video_id = ? ORDER BY amount_twd DESC LIMIT 20
+    ''',
+    "按貨幣統計": '''
+        SELECT currency, COUNT(*), SUM(amount_twd) FROM super_thanks
+        WHERE video_id = ? GROUP BY currency ORDER BY 3 DESC
+    ''',
+    "評論者排行": '''
+        SELECT commenter_name, COUNT(*), SUM(amount_twd) FROM super_thanks
+        WHERE video_id = ? AND commenter_name IS NOT NULL
+        GROUP BY commenter_name ORDER BY 3 DESC LIMIT 10
+    ''',
+}
+
+def video_id_of(index):
+    return f"bench{index:06d}"
+
+def build_database(path, total_rows, rows_per_video):
+    conn = sqlite3.connect(path)
+    apply_pragmas(conn)
+    conn.execute('''
+    CREATE TABLE super_thanks (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        video_id TEXT NOT NULL,
+        thread_id TEXT,
+        currency TEXT NOT NULL,
+        amount REAL NOT NULL,
+        amount_twd REAL NOT NULL,
+        commenter_name TEXT,
+        comment_text TEXT,
+        comment_date TIMESTAMP,
+        scrape_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+    
+    videos = max(1, total_rows // rows_per_video)
+    rng = random.Random(0)
+    
+    def rows():
+        for i in range(total_rows):
+            amount = rng.choice((1.99, 2.0, 5.0, 10.0, 20.0, 50.0))
+            # 依序寫入時同一部影片的資料是連續的，與實際抓取相同
+            yield (video_id_of(i * videos // total_rows), f"Ugx{i:020d}", CURRENCIES[i % len(CURRENCIES)],
+                   amount, amount * 30, f"user{rng.randrange(200000)}", "comment", "2024-01-01 00:00:00")
+    
+    start = time.perf_counter()
+    conn.executemany('''
+    INSERT INTO super_thanks (video_id, thread_id, currency, amount, amount_twd, commenter_name, comment_text, comment_date)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', rows())
+    conn.commit()
+    print(f"寫入 {total_rows:,} 筆 ({videos:,} 部影片): {time.perf_counter() - start:.1f}s")
+    return conn, videos
+
+def time_queries(conn, video_ids):
+    """回傳 {查詢名稱: [每次耗時 ms]}"""
+    timings = {}
+    for name, sql in QUERIES.items():
+        timings[name] = []
+        for video_id in video_ids:
+            start = time.perf_counter()
+            conn.execute(sql, (video_id,)).fetchall()
+            timings[name].append((time.perf_counter() - start) * 1000)
+    return timings
+
+def main(total_rows=10_000_000, rows_per_video=1000, lookups=100):
+    with tempfile.TemporaryDirectory() as directory:
+        conn, videos = build_database(os.path.join(directory, "bench.db"), total_rows, rows_per_video)
+        # 隨機挑不同的影片，不要一直查詢同一部還在快取中的影片
+        rng = random.Random(1)
+        video_ids = [video_id_of(rng.randrange(videos)) for _ in range(lookups)]
+        
+        before = time_queries(conn, video_ids)
+        
+        start = time.perf_counter()
+        _migration_2_indexes(conn.cursor())
+        conn.commit()
+        print(f"建立索引及 ANALYZE: {time.perf_counter() - start:.1f}s")
+        
+        after = time_queries(conn, video_ids)
+        
+        for name, sql in QUERIES.items():
+            plan = conn.execute("EXPLAIN QUERY PLAN " + sql, ("x",)).fetchall()
+            print(f"{name}: {' / '.join(row[-1] for row in plan)}")
+        conn.close()
+    
+    rows = []
+    for name in QUERIES:
+        rows.append((
+            name,
+            f"{percentile(before[name], 50):.2f}",
+            f"{percentile(before[name], 99):.2f}",
+            f"{percentile(after[name], 50):.3f}",
+            f"{percentile(after[name], 99):.3f}",
+            f"{percentile(before[name], 50) / percentile(after[name], 50):,.0f}x",
+        ))
+    print(f"\n{total_rows:,} 筆，每部影片約 {rows_per_video} 筆，查詢 {lookups} 部影片 (ms)")
+    print_table(("查詢", "無索引 p50", "無索引 p99", "有索引 p50", "有索引 p99", "加速"), rows)
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:4]])
\ No newline at end of file
@@ -0,0 +1,71 @@
+"""一批超級感謝放在記憶體中的大小：dict vs SuperThanks (__slots__) vs SuperThanksBatch (欄式)
+
+以 tracemalloc 量測建立 N 筆 (預設 100 萬筆) 後增加的記憶體，三種方式使用相同的字串內容
+python benchmarks/bench_models.py [筆數]
+"""
+import gc
+import sys
+import time
+import tracemalloc
+from common import print_table
+from database.models import SuperThanks, SuperThanksBatch
+
+# (金額晶片, 貨幣代碼)
+CHIPS = [("US$5.00", "US$"), ("NT$75.00", "NT$"), ("¥200", "¥"), ("HK$20.00", "HK$"), ("€2,00", "€")]
+
+def parsed_fields(i):
+    """模擬解析金額晶片：貨幣代碼每次都是切出來的新字串"""
+    price, code = CHIPS[i % len(CHIPS)]
+    currency = price[:len(code)]
+    return currency, float(i % 500) + 0.5, f"Ugx{i:020d}", f"user{i % 5000}", f"comment {i}"
+
+def build_dicts(count):
+    records = []
+    for i in range(count):
+        currency, amount, thread_id, name, text = parsed_fields(i)
+        records.append({
+            "currency": currency, "amount": amount, "amount_twd": amount * 30.0, "thread_id": thread_id,
+            "commenter_name": name, "comment_text": text, "comment_date": time.time(),
+        })
+    return records
+
+def build_objects(count):
+    records = []
+    for i in range(count):
+        currency, amount, thread_id, name, text = parsed_fields(i)
+        records.append(SuperThanks("benchvid001", currency, amount, amount * 30.0, name, text,
+                                   time.time(), thread_id=thread_id))
+    return records
+
+def build_batch(count):
+    batch = SuperThanksBatch("benchvid001")
+    for i in range(count):
+        currency, amount, thread_id, name, text = parsed_fields(i)
+        batch.append(currency, amount, thread_id, name, text, amount_twd=amount * 30.0)
+    return batch
+
+def measure(build, count):
+    """回傳 (增加的 MB, 尖峰 MB, 建立秒數)"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    data = build(count)
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del data
+    return current / (1024 * 1024), peak / (1024 * 1024), elapsed
+
+def main(count=1_000_000):
+    rows = []
+    baseline = None
+    for name, build in (("dict", build_dicts), ("SuperThanks", build_objects), ("SuperThanksBatch", build_batch)):
+        current, peak, elapsed = measure(build, count)
+        baseline = baseline or current
+        rows.append((name, f"{current:,.1f}", f"{peak:,.1f}", f"{current / baseline:.0%}", f"{elapsed:.2f}s"))
+    
+    print(f"{count:,} 筆超級感謝")
+    print_table(("方式", "記憶體 MB", "尖峰 MB", "相對 dict", "建立時間"), rows)
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
\ No newline at end of file
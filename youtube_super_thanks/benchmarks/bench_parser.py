@@ -0,0 +1,98 @@
+"""金額晶片解析的微基準測試：舊版逐一比對 18 個 regex vs 目前的單一 regex
+
+python benchmarks/bench_parser.py [筆數]
+"""
+import random
+import re
+import sys
+from common import FIXTURES_DIR, best_of, print_table
+from scraper.parser import parse_currency_amount, parse_currency_amounts
+
+# 改版前的解析方式，只當作比較基準
+LEGACY_PATTERNS = {
+    'US$': r'US\$\s*([\d,.]+)',
+    'CA$': r'CA\$\s*([\d,.]+)',
+    'HK$': r'HK\$\s*([\d,.]+)',
+    'SGD': r'SGD\s*([\d,.]+)',
+    'MYR': r'MYR\s*([\d,.]+)',
+    '¥': r'¥\s*([\d,.]+)',
+    'AU$': r'AU\$\s*([\d,.]+)',
+    '£': r'£\s*([\d,.]+)',
+    '€': r'€\s*([\d,.]+)',
+    'NZ$': r'NZ\$\s*([\d,.]+)',
+    'PHP': r'PHP\s*([\d,.]+)',
+    'THB': r'THB\s*([\d,.]+)',
+    'IDR': r'IDR\s*([\d,.]+)',
+    'TRY': r'TRY\s*([\d,.]+)',
+    'CLP': r'CLP\s*([\d,.]+)',
+    'ARS': r'ARS\s*([\d,.]+)',
+    'AED': r'AED\s*([\d,.]+)',
+    '$': r'^\$\s*([\d,.]+)',
+}
+
+def legacy_parse_currency_amount(text):
+    for currency, pattern in LEGACY_PATTERNS.items():
+        match = re.search(pattern, text)
+        if match:
+            try:
+                return currency, float(match.group(1).replace(',', ''))
+            except ValueError:
+                return None, None
+    
+    amount_match = re.search(r'[\d,.]+', text)
+    if amount_match:
+        currency_symbol = re.search(r'[^\d,.\s]+', text)
+        if currency_symbol:
+            try:
+                return currency_symbol.group(0), float(amount_match.group(0).replace(',', ''))
+            except ValueError:
+                return None, None
+    
+    return None, None
+
+def load_corpus():
+    texts = []
+    with open(f"{FIXTURES_DIR}/currency_chips.tsv", encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\r\n")
+            if line and not line.startswith("#"):
+                texts.append(line.split("\t")[0])
+    return texts
+
+def main(count=200000):
+    corpus = load_corpus()
+    random.seed(0)
+    texts = [random.choice(corpus) for _ in range(count)]
+    uncached = parse_currency_amount.__wrapped__
+    
+    def cached():
+        parse_currency_amount.cache_clear()
+        return [parse_currency_amount(text) for text in texts]
+    
+    cases = [
+        ("legacy (18 regex)", lambda: [legacy_parse_currency_amount(text) for text in texts]),
+        ("single regex", lambda: [uncached(text) for text in texts]),
+        ("single regex + lru_cache", cached),
+        ("parse_currency_amounts", lambda: (parse_currency_amount.cache_clear(), parse_currency_amounts(texts))[1]),
+    ]
+    
+    rows = []
+    baseline = None
+    for name, func in cases:
+        seconds, _ = best_of(func)
+        baseline = baseline or seconds
+        rows.append((name, f"{seconds * 1000:.1f} ms", f"{seconds / count * 1e6:.2f} us", f"{baseline / seconds:.1f}x"))
+    
+    print(f"{count} 筆金額字串 (語料 {len(corpus)} 種)")
+    print_table(("方式", "總時間", "每筆", "加速"), rows)
+    
+    # 順便列出新舊解析結果不同的字串
+    diffs = [(text, legacy_parse_currency_amount(text), uncached(text)) for text in corpus
+             if legacy_parse_currency_amount(text) != uncached(text)]
+    if diffs:
+        print(f"\n舊版解析結果不同的字串 ({len(diffs)} 種):")
+        for text, old, new in diffs:
+            print(f"  {text!r}: {old} -> {new}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
\ No newline at end of file
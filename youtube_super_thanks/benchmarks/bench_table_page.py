@@ -0,0 +1,84 @@
+"""大型影片的超級感謝表格：一次送出整部影片 vs 伺服器端分頁 (每頁 50 筆)
+
+一部影片預設 5 萬筆，量測 callback 延遲及送到瀏覽器的 JSON 大小；分頁量測各排序欄位的第一頁及中間一頁
+python benchmarks/bench_table_page.py [筆數] [每頁筆數]
+"""
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import pandas as pd
+from common import percentile, print_table
+from database.db_init import init_database
+from database.db_queries import save_super_thanks, save_video_info
+from database.models import SuperThanksBatch
+from database.pool import get_read_pool
+
+VIDEO_ID = "benchvid001"
+REPEAT = 20
+
+def seed_database(count):
+    conn = init_database()
+    save_video_info(conn, {"video_id": VIDEO_ID, "video_url": f"https://www.youtube.com/watch?v={VIDEO_ID}",
+                           "title": "large video", "channel": "channel"})
+    items = SuperThanksBatch()
+    for i in range(count):
+        items.append(("$", "US$", "¥", "€", "HK$")[i % 5], 1.0 + i % 997, f"Ugx{i:020d}", f"user{i % 7919}",
+                     f"comment {i}", amount_twd=30.0 + (i * 7) % 3001)
+    save_super_thanks(conn, VIDEO_ID, items)
+    conn.close()
+
+def load_whole_video(dashboard):
+    """改版前：整部影片交給 DataTable 在瀏覽器端分頁"""
+    with dashboard.read_connection() as conn:
+        df = pd.read_sql_query(f"""
+            SELECT {', '.join(dashboard.SUPER_THANKS_TABLE_COLUMNS)} FROM super_thanks
+            WHERE video_id = ? ORDER BY amount_twd DESC
+        """, conn, params=(VIDEO_ID,))
+    return df.to_dict('records'), 1
+
+def measure(callback):
+    """回傳 (p50 ms, p99 ms, JSON bytes)"""
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        rows, _ = callback()
+        payload = json.dumps(rows)
+        timings.append((time.perf_counter() - start) * 1000)
+    return percentile(timings, 50), percentile(timings, 99), len(payload.encode("utf-8"))
+
+def main(count=50_000, page_size=50):
+    cwd = os.getcwd()
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        # DATABASE_FILE 是相對路徑，在暫存目錄建立測試用資料庫
+        os.chdir(directory)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                seed_database(count)
+                import dashboard
+            
+            cases = [("整部影片", "amount_twd", lambda: load_whole_video(dashboard))]
+            middle_page = count // page_size // 2
+            for column in dashboard.TABLE_SORT_ORDERS:
+                sort_by = [{"column_id": column, "direction": "desc"}]
+                for label, page in (("第一頁", 0), (f"第 {middle_page} 頁", middle_page)):
+                    cases.append((label, column, lambda sort_by=sort_by, page=page: dashboard.load_super_thanks_page(
+                        VIDEO_ID, page, page_size, sort_by, ""
+                    )))
+            
+            for label, column, callback in cases:
+                p50, p99, size = measure(callback)
+                rows.append((label, column, f"{p50:.2f}", f"{p99:.2f}", f"{size / 1024:,.1f}"))
+            get_read_pool().close()
+        finally:
+            os.chdir(cwd)
+    
+    print(f"一部影片 {count:,} 筆，每頁 {page_size} 筆，各執行 {REPEAT} 次")
+    print_table(("讀取", "排序", "p50 ms", "p99 ms", "JSON KB"), rows)
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:3]])
\ No newline at end of file
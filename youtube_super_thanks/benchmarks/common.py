@@ -0,0 +1,34 @@
+import math
+import os
+import sys
+import time
+
+# 基準測試直接以 python benchmarks/xxx.py 執行，專案模組以 youtube_super_thanks 為根目錄匯入
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(PROJECT_DIR, "tests", "fixtures")
+sys.path.insert(0, PROJECT_DIR)
+
+def best_of(func, repeat=5):
+    """執行 repeat 次，回傳最快一次的秒數及該次的回傳值"""
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
+
+def percentile(values, pct):
+    """排序後取第 pct 百分位 (最近排名法)"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+def print_table(headers, rows):
+    widths = [max(len(str(value)) for value in column) for column in zip(headers, *rows)]
+    print("  ".join(str(h).ljust(w) for h, w in zip(headers, widths)))
+    for row in rows:
+        print("  ".join(str(v).ljust(w) for v, w in zip(row, widths)))
\ No newline at end of file
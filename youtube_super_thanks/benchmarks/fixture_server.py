@@ -0,0 +1,110 @@
+"""代替 YouTube 的本機測試伺服器：每部影片一個會隨滾動續載評論串的頁面
+
+/watch?v=<影片ID> 及 /video/<影片ID>.html 都回傳同樣的頁面，每 3 個評論串有 1 個超級感謝
+python benchmarks/fixture_server.py [port] [每部影片評論串數]
+"""
+import html
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from common import PROJECT_DIR  # noqa: F401 (設定匯入路徑)
+from scraper.parser import extract_video_id
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>ytd-comment-thread-renderer {{ display: block; min-height: 120px; }}</style>
+</head>
+<body>
+<ytd-watch-metadata><yt-formatted-string class="ytd-watch-metadata" title="{title}">{title}</yt-formatted-string></ytd-watch-metadata>
+<div id="channel-name"><div id="text">Fixture Channel</div></div>
+<ytd-comments id="comments"><div id="contents"></div></ytd-comments>
+<script>
+const videoId = {video_id!r};
+const total = {threads};
+const pageSize = {page_size};
+const latency = {latency_ms};
+const prices = ["US$5.00", "NT$75.00", "¥200", "€2,00", "HK$20.00"];
+const contents = document.getElementById("contents");
+let loaded = 0;
+let loading = false;
+
+function threadHtml(i) {{
+    const chip = i % 3 === 0
+        ? `<div id="paid-comment-chip"><span id="comment-chip-price">${{prices[i % prices.length]}}</span></div>`
+        : "";
+    return `<ytd-comment-thread-renderer><ytd-comment-view-model id="comment">
+        <div id="header"><a id="author-text" href="/@user${{i}}"><span>@user${{i}}</span></a>
+        <span id="published-time-text"><a href="/watch?v=${{videoId}}&lc=Ugx${{videoId}}T${{i}}">${{i}} 分鐘前</a></span></div>
+        ${{chip}}<yt-attributed-string id="content-text"><span>comment ${{i}}</span></yt-attributed-string>
+    </ytd-comment-view-model></ytd-comment-thread-renderer>`;
+}}
+
+function loadMore() {{
+    const end = Math.min(total, loaded + pageSize);
+    let chunk = "";
+    for (; loaded < end; loaded++) {{
+        chunk += threadHtml(loaded);
+    }}
+    contents.insertAdjacentHTML("beforeend", chunk);
+    loading = false;
+}}
+
+// 與 YouTube 相同：捲到底部附近才續載下一批
+window.addEventListener("scroll", () => {{
+    const nearBottom = window.innerHeight + window.scrollY >= document.documentElement.scrollHeight - 600;
+    if (nearBottom && !loading && loaded < total) {{
+        loading = true;
+        setTimeout(loadMore, latency);
+    }}
+}});
+loadMore();
+</script>
+</body>
+</html>
+"""
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path in ("/", "/favicon.ico"):
+            self.send_error(404)
+            return
+        
+        video_id = extract_video_id(f"http://{self.headers.get('Host', 'localhost')}{self.path}")
+        body = PAGE_TEMPLATE.format(
+            title=html.escape(f"Fixture video {video_id}"),
+            video_id=video_id,
+            threads=self.server.threads,
+            page_size=self.server.page_size,
+            latency_ms=self.server.latency_ms
+        ).encode("utf-8")
+        
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+def start_fixture_server(port=0, threads=200, page_size=20, latency_ms=50):
+    """在背景執行緒啟動伺服器，回傳 (server, base_url)，用完呼叫 server.shutdown()"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), FixtureHandler)
+    server.threads = threads
+    server.page_size = page_size
+    server.latency_ms = latency_ms
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    server, base_url = start_fixture_server(port, threads)
+    print(f"fixture 伺服器: {base_url}/watch?v=<影片ID> (Ctrl+C 結束)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
\ No newline at end of file
@@ -1,5 +1,18 @@
 DATABASE_FILE = 'super_thanks.db'
 
+# SQLite 設定
+DATABASE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",  # WAL 模式下 NORMAL 已足夠安全
+    "cache_size": -20000  # 負數代表 KB，約 20MB
+}
+
+# 儀表板的唯讀連線池
+READ_POOL_SETTINGS = {
+    "size": 8,  # 最多同時開啟的唯讀連線
+    "timeout": 10  # 連線都在使用中時最多等待秒數
+}
+
 # 瀏覽器設定
 BROWSER_SETTINGS = {
     "disable_notifications": True,
@@ -9,12 +22,76 @@ BROWSER_SETTINGS = {
     "headless": True
 }
 
+# 瀏覽器池設定
+BROWSER_POOL_SETTINGS = {
+    "max_pages": 20,  # 每個瀏覽器處理幾部影片後重開
+    "max_rss_mb": 1500  # 瀏覽器記憶體超過此值就重開 (需要 psutil)
+}
+
 SCROLL_SETTINGS = {
     "max_scrolls": 60,  # 最大滾動次數
-    "scroll_pause_time": 5,  # 每次滾動的暫停時間
+    "scroll_timeout": 5,  # 每次滾動等待新評論的最長時間
+    "poll_interval": 0.25,  # 檢查新評論的間隔
     "no_change_threshold": 5  # 連續幾次沒變化就停止
 }
 
+EXTRACTION_SETTINGS = {
+    "engine": "browser",  # browser: Selenium 滾動頁面; continuation: 不開瀏覽器，直接讀取留言 JSON
+    "mode": "script",  # script: 一次 execute_script 取一批; element: 逐一讀取元素
+    "batch_size": 500  # 每批處理的評論串數量
+}
+
+# continuation 抓取設定
+CONTINUATION_SETTINGS = {
+    "timeout": 15,  # 每個請求的逾時秒數
+    "max_pages": 500,  # 最多讀取幾頁留言 (每頁約 20 則)
+    "hl": "zh-TW",  # 介面語言，影響金額的顯示格式
+    "gl": "TW",
+    "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+}
+
+BATCH_SETTINGS = {
+    "workers": 3,  # 同時運行的瀏覽器數量
+    "engine": "threads"  # threads: 每個 worker 一個 Selenium 瀏覽器; async: 一個 Playwright 瀏覽器開多個分頁
+}
+
+# 非同步抓取引擎設定 (需要 pip install playwright 及 playwright install chromium)
+ASYNC_SETTINGS = {
+    "concurrency": 4,  # 同一個瀏覽器同時處理的影片數
+    "page_timeout": 30  # 開啟影片頁面的逾時秒數
+}
+
+# 背景抓取工作 (worker.py) 設定
+JOB_SETTINGS = {
+    "workers": 2,  # 同時處理的工作數 (同時開啟的瀏覽器數量)
+    "poll_interval": 5,  # 沒有工作時隔幾秒再檢查佇列
+    "max_attempts": 3,  # 失敗後最多嘗試幾次
+    "backoff_base": 60,  # 第一次重試前等待的秒數，之後每次加倍
+    "backoff_max": 3600  # 重試等待的上限秒數
+}
+
+# 各階段計時 (存到 scrape_runs 資料表)
+TIMING_SETTINGS = {
+    "enabled": True,
+    "export_json": False,  # 每次抓取後另外輸出 JSON 檔
+    "export_dir": "timings",
+    "profile": None,  # None / "cprofile" / "pyinstrument" (需要另外安裝)
+    "profile_dir": "profiles"
+}
+
+SNAPSHOT_SETTINGS = {
+    "dir": "snapshot",
+    "format": "arrow",  # "arrow" (可 memory-map) 或 "parquet" (檔案較小)
+    "use_in_dashboard": True  # 快照是最新的時候儀表板改讀快照
+}
+
+STREAMING_SETTINGS = {
+    "enabled": True,  # 每次滾動後就抽取並寫入新載入的評論
+    "prune_dom": False,  # 寫入後把處理過的評論串從頁面移除，降低瀏覽器記憶體
+    "write_retries": 3,  # 資料庫被鎖住時，同一批超級感謝最多重試次數
+    "write_retry_delay": 1.0  # 重試間隔秒數
+}
+
 DEFAULT_EXCHANGE_RATES = {
     '$': 1.0,           # 新台幣
     'US$': 32.95,       # 美元
@@ -40,7 +117,11 @@ CSS_SELECTORS = {
     "super_thanks": "#comment-chip-price",
     "commenter_name": "#author-text span",
     "comment_text": "ytd-comment-renderer #content-text",
+    "thread_comment_text": "#content-text",
     "video_title": "yt-formatted-string.ytd-watch-metadata[title]",
     "channel_name": "#channel-name #text",
-    "comments": "ytd-comment-thread-renderer"
+    "comments": "ytd-comment-thread-renderer",
+    "pinned_badge": "#pinned-comment-badge ytd-pinned-comment-badge-renderer",
+    "sort_menu": "#sort-menu #trigger",
+    "sort_menu_items": "#sort-menu tp-yt-paper-listbox a"
 }
\ No newline at end of file
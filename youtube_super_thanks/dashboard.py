@@ -1,15 +1,25 @@
 import os
+import re
 import sqlite3
+import threading
 import pandas as pd
 import dash
 from dash import dcc, html, dash_table, callback, Input, Output
 import plotly.express as px
 import plotly.graph_objects as go
 import dash_bootstrap_components as dbc
-from config import DATABASE_FILE
+from config import SNAPSHOT_SETTINGS
+from database.db_init import init_database
+from database.db_queries import enqueue_job, list_jobs
+from database.pool import connect_read_only, read_connection
+from database.snapshot import load_video_super_thanks, read_snapshot_table, snapshot_is_current
+from scraper.parser import normalize_video_url, extract_video_id
 
 os.makedirs('assets', exist_ok=True)
 
+# 唯讀連線無法建立資料庫，先確定資料表存在
+init_database().close()
+
 # 初始化Dash
 app = dash.Dash(
     __name__, 
@@ -18,52 +28,291 @@ app = dash.Dash(
     suppress_callback_exceptions=True
 )
 
+def use_snapshot(conn):
+    """有與資料庫一致的快照時改從快照讀取 (匯出後又有新資料就回到 SQLite)"""
+    return SNAPSHOT_SETTINGS["use_in_dashboard"] and snapshot_is_current(conn)
+
 def load_data():
-    conn = sqlite3.connect(DATABASE_FILE)
-    
-    # 影片資料
-    videos_df = pd.read_sql_query("SELECT * FROM videos", conn)
-    
-    # 超級感謝資料
-    super_thanks_df = pd.read_sql_query("""
-        SELECT s.*, v.title as video_title, v.channel 
-        FROM super_thanks s
-        JOIN videos v ON s.video_id = v.video_id
-    """, conn)
+    with read_connection() as conn:
+        if use_snapshot(conn):
+            return read_snapshot_table("videos").to_pandas(), read_snapshot_table("currency_rates").to_pandas()
     
-    # 貨幣匯率資料
-    currency_df = pd.read_sql_query("SELECT * FROM currency_rates", conn)
+        # 影片資料
+        videos_df = pd.read_sql_query("SELECT * FROM videos", conn)
     
-    conn.close()
+        # 貨幣匯率資料
+        currency_df = pd.read_sql_query("SELECT * FROM currency_rates", conn)
     
-    return videos_df, super_thanks_df, currency_df
+    return videos_df, currency_df
 
-# 載入特定影片資料
-def load_video_data(video_id):
-    conn = sqlite3.connect(DATABASE_FILE)
-    
-    video_info = pd.read_sql_query("SELECT * FROM videos WHERE video_id = ?", conn, params=(video_id,))
-    if video_info.empty:
-        conn.close()
-        return None, None
-    
-    super_thanks = pd.read_sql_query("""
-        SELECT * FROM super_thanks
-        WHERE video_id = ?
-        ORDER BY amount_twd DESC
-    """, conn, params=(video_id,))
-    
-    conn.close()
-    
-    return video_info.iloc[0], super_thanks
+# 載入寫入時更新的統計表 (總覽圖表只需要彙總結果，不載入逐筆超級感謝)
+def load_summary():
+    with read_connection() as conn:
+        totals = pd.read_sql_query("""
+            SELECT SUM(super_thanks_count) AS total_count, SUM(total_twd) AS total_twd
+            FROM currency_stats
+        """, conn)
+    
+        # 影片排行直接沿著 video_stats 的索引取前10名
+        video_counts = pd.read_sql_query("""
+            SELECT s.video_id, v.title AS video_title, v.channel, s.super_thanks_count AS counts
+            FROM video_stats s
+            JOIN videos v ON s.video_id = v.video_id
+            WHERE s.super_thanks_count > 0
+            ORDER BY s.super_thanks_count DESC
+            LIMIT 10
+        """, conn)
+    
+        video_amount = pd.read_sql_query("""
+            SELECT s.video_id, v.title AS video_title, v.channel, s.total_twd AS amount_twd
+            FROM video_stats s
+            JOIN videos v ON s.video_id = v.video_id
+            WHERE s.super_thanks_count > 0
+            ORDER BY s.total_twd DESC
+            LIMIT 10
+        """, conn)
+    
+        currency_stats = pd.read_sql_query("""
+            SELECT currency, super_thanks_count AS counts, total_twd AS amount_twd
+            FROM currency_stats
+            WHERE super_thanks_count > 0
+            ORDER BY super_thanks_count DESC
+        """, conn)
+    
+        channel_stats = pd.read_sql_query("""
+            SELECT channel AS '頻道', super_thanks_count AS '超級感謝數量', total_twd AS '總金額 (TWD)'
+            FROM channel_stats
+            WHERE super_thanks_count > 0
+            ORDER BY total_twd DESC
+        """, conn)
+    
+    return {
+        "total_count": int(totals['total_count'].iloc[0] or 0),
+        "total_twd": float(totals['total_twd'].iloc[0] or 0),
+        "video_counts": video_counts,
+        "video_amount": video_amount,
+        "currency_stats": currency_stats,
+        "channel_stats": channel_stats,
+    }
+
+# 載入特定影片的資訊及彙總 (不載入全部超級感謝)
+def load_video_summary(video_id):
+    with read_connection() as conn:
+        video_info = pd.read_sql_query("SELECT * FROM videos WHERE video_id = ?", conn, params=(video_id,))
+        if video_info.empty:
+            return None, None
+    
+        totals = pd.read_sql_query("""
+            SELECT super_thanks_count, total_twd FROM video_stats
+            WHERE video_id = ?
+        """, conn, params=(video_id,))
+    
+        if use_snapshot(conn):
+            currency_stats, commenter_stats = load_snapshot_video_stats(video_id)
+            return video_info.iloc[0], {
+                "count": int(totals['super_thanks_count'].iloc[0]) if not totals.empty else 0,
+                "total_twd": float(totals['total_twd'].iloc[0]) if not totals.empty else 0.0,
+                "currency_stats": currency_stats,
+                "commenter_stats": commenter_stats,
+            }
+    
+        currency_stats = pd.read_sql_query("""
+            SELECT currency, COUNT(*) AS counts, SUM(amount_twd) AS amount_twd
+            FROM super_thanks
+            WHERE video_id = ?
+            GROUP BY currency
+            ORDER BY amount_twd DESC
+        """, conn, params=(video_id,))
+    
+        commenter_stats = pd.read_sql_query("""
+            SELECT commenter_name AS '評論者', COUNT(*) AS '超級感謝次數', SUM(amount_twd) AS '總金額 (TWD)'
+            FROM super_thanks
+            WHERE video_id = ? AND commenter_name IS NOT NULL
+            GROUP BY commenter_name
+            ORDER BY SUM(amount_twd) DESC
+            LIMIT 10
+        """, conn, params=(video_id,))
+    
+    summary = {
+        "count": int(totals['super_thanks_count'].iloc[0]) if not totals.empty else 0,
+        "total_twd": float(totals['total_twd'].iloc[0]) if not totals.empty else 0.0,
+        "currency_stats": currency_stats,
+        "commenter_stats": commenter_stats,
+    }
+    return video_info.iloc[0], summary
+
+# 與 load_video_summary 中的 SQL 彙總結果欄位相同，改從快照計算
+def load_snapshot_video_stats(video_id):
+    df = load_video_super_thanks(video_id, columns=["currency", "commenter_name", "amount_twd"])
+    
+    currency_stats = df.groupby('currency', as_index=False).agg(
+        counts=('amount_twd', 'size'),
+        amount_twd=('amount_twd', 'sum')
+    ).sort_values('amount_twd', ascending=False)
+    
+    commenter_stats = df.dropna(subset=['commenter_name']).groupby('commenter_name', as_index=False).agg(
+        counts=('amount_twd', 'size'),
+        amount_twd=('amount_twd', 'sum')
+    ).sort_values('amount_twd', ascending=False).head(10)
+    commenter_stats.columns = ['評論者', '超級感謝次數', '總金額 (TWD)']
+    
+    return currency_stats, commenter_stats
+
+# 超級感謝表格可排序/篩選的欄位 (白名單，避免把使用者輸入直接放進 SQL)
+SUPER_THANKS_TABLE_COLUMNS = ['currency', 'amount', 'amount_twd', 'commenter_name']
+
+# 各欄位排序時的 ORDER BY 欄位，與 (video_id, ...) 索引的欄位順序相同 (索引最後隱含 id)，
+# 大型影片的每一頁都能沿著索引讀取，不必先把整部影片排序一次
+TABLE_SORT_ORDERS = {
+    'amount_twd': ['amount_twd', 'id'],  # idx_super_thanks_video_amount
+    'amount': ['amount', 'id'],  # idx_super_thanks_video_original_amount
+    'currency': ['currency', 'id'],  # idx_super_thanks_video_currency
+    'commenter_name': ['commenter_name', 'amount_twd', 'id'],  # idx_super_thanks_video_commenter
+}
+
+# DataTable filter_query 的運算子對應到 SQL
+# 運算子前面加 i 為不區分大小寫 (表格的 Aa 切換)，加 s 或不加為區分大小寫，例如 ieq、i<、icontains
+FILTER_OPERATORS = {
+    'ge': '>=', 'le': '<=', 'lt': '<', 'gt': '>', 'ne': '!=', 'eq': '=',
+    '>=': '>=', '<=': '<=', '<': '<', '>': '>', '!=': '!=', '=': '=',
+}
+# 比對字串的運算子，不區分大小寫時 {column} 及 {value} 會各自包上 lower()
+FILTER_TEXT_OPERATORS = {
+    'contains': "instr({column}, {value}) > 0",
+    'datestartswith': "instr({column}, {value}) = 1",
+}
+# 不需要值的運算子，例如 "{commenter_name} is blank"
+FILTER_UNARY_OPERATORS = {
+    'is blank': "({column} IS NULL OR {column} = '')",
+    'is nil': "{column} IS NULL",
+    'is num': "typeof({column}) IN ('integer', 'real')",
+    'is str': "typeof({column}) = 'text'",
+}
+FILTER_PART_RE = re.compile(r'^\s*\{(?P<name>[^}]+)\}\s+(?P<operator>\S+)(?:\s+(?P<value>.+?))?\s*$')
 
-# 創建總覽圖表
-def create_overview_figures(videos_df, super_thanks_df, currency_df):
+def parse_filter_part(filter_part):
+    """把 "{amount_twd} > 100" 轉成 (SQL 條件, 參數)
+    
+    不支援的運算子或欄位丟出 ValueError，不會默默略過這個篩選條件
+    """
+    match = FILTER_PART_RE.match(filter_part)
+    if not match:
+        raise ValueError(f"無法解析篩選條件: {filter_part.strip()}")
+    
+    name, operator, value = match.group('name', 'operator', 'value')
+    if name not in SUPER_THANKS_TABLE_COLUMNS:
+        raise ValueError(f"不能篩選欄位: {name}")
+    
+    if f"{operator} {value}" in FILTER_UNARY_OPERATORS:
+        return FILTER_UNARY_OPERATORS[f"{operator} {value}"].format(column=name), []
+    
+    case_insensitive = False
+    if operator[:1] in ('s', 'i') and (operator[1:] in FILTER_OPERATORS or operator[1:] in FILTER_TEXT_OPERATORS):
+        case_insensitive = operator[0] == 'i'
+        operator = operator[1:]
+    if operator not in FILTER_OPERATORS and operator not in FILTER_TEXT_OPERATORS:
+        raise ValueError(f"不支援的篩選運算子: {filter_part.strip()}")
+    if value is None:
+        raise ValueError(f"篩選條件缺少值: {filter_part.strip()}")
+    
+    quoted = len(value) > 1 and value[0] == value[-1] and value[0] in ('"', "'", '`')
+    if quoted:
+        value = value[1:-1]
+    
+    if operator in FILTER_TEXT_OPERATORS:
+        column, placeholder = (f"lower({name})", "lower(?)") if case_insensitive else (name, "?")
+        return FILTER_TEXT_OPERATORS[operator].format(column=column, value=placeholder), [value]
+    
+    if not quoted:
+        try:
+            value = float(value)
+        except ValueError:
+            pass
+    collate = " COLLATE NOCASE" if case_insensitive else ""
+    return f"{name} {FILTER_OPERATORS[operator]} ?{collate}", [value]
+
+def build_table_query(video_id, sort_by, filter_query):
+    """把表格的排序及篩選狀態轉成 WHERE / ORDER BY 子句"""
+    conditions = ["video_id = ?"]
+    params = [video_id]
+    
+    for filter_part in (filter_query or '').split(' && '):
+        if not filter_part.strip():
+            continue
+        condition, values = parse_filter_part(filter_part)
+        conditions.append(condition)
+        params.extend(values)
+    
+    # 預設依台幣金額由高到低；所有排序欄位方向相同才能直接沿著索引讀取
+    column, direction = 'amount_twd', "DESC"
+    if sort_by and sort_by[0]['column_id'] in TABLE_SORT_ORDERS:
+        column = sort_by[0]['column_id']
+        direction = "ASC" if sort_by[0]['direction'] == 'asc' else "DESC"
+    order_by = ", ".join(f"{name} {direction}" for name in TABLE_SORT_ORDERS[column])
+    
+    return " AND ".join(conditions), params, order_by
+
+def load_super_thanks_page(video_id, page_current, page_size, sort_by, filter_query):
+    """只查詢表格目前這一頁需要的資料，回傳 (資料列, 總頁數)"""
+    where, params, order_by = build_table_query(video_id, sort_by, filter_query)
+    
+    with read_connection() as conn:
+        if filter_query:
+            total = conn.execute(f"SELECT COUNT(*) FROM super_thanks WHERE {where}", params).fetchone()[0]
+        else:
+            row = conn.execute("SELECT super_thanks_count FROM video_stats WHERE video_id = ?", (video_id,)).fetchone()
+            total = row[0] if row else 0
+    
+        page = pd.read_sql_query(f"""
+            SELECT {', '.join(SUPER_THANKS_TABLE_COLUMNS)}
+            FROM super_thanks
+            WHERE {where}
+            ORDER BY {order_by}
+            LIMIT ? OFFSET ?
+        """, conn, params=params + [page_size, page_current * page_size])
+    
+    page_count = max(1, -(-total // page_size))
+    return page.to_dict('records'), page_count
+
+# 整個程序共用的資料快取，資料庫有變動 (PRAGMA data_version 改變) 時才重新載入
+_cache = {"data_version": None, "overview": None}
+_cache_lock = threading.Lock()
+_version_conn = None
+
+def get_data_version():
+    """其他連線 (爬蟲) 每次寫入後 data_version 都會改變"""
+    global _version_conn
+    if _version_conn is None:
+        _version_conn = connect_read_only()
+    return _version_conn.execute("PRAGMA data_version").fetchone()[0]
+
+def get_overview_data():
+    """回傳 (總覽資料, 是否命中快取)"""
+    with _cache_lock:
+        data_version = get_data_version()
+        if _cache["overview"] is not None and _cache["data_version"] == data_version:
+            return _cache["overview"], True
+        
+        videos_df, currency_df = load_data()
+        summary = load_summary()
+        overview = {
+            "videos_df": videos_df,
+            "total_super_thanks": summary["total_count"],
+            "total_amount": summary["total_twd"],
+            "channel_stats": summary["channel_stats"],
+            "figures": create_overview_figures(summary),
+        }
+        
+        _cache["overview"] = overview
+        _cache["data_version"] = data_version
+        return overview, False
+
+# 創建總覽圖表 (使用 load_summary 在 SQL 端彙總好的資料)
+def create_overview_figures(summary):
     figures = {}
     
     # 1. 影片超級感謝數量分佈
-    video_counts = super_thanks_df.groupby(['video_id', 'video_title', 'channel']).size().reset_index(name='counts')
-    video_counts = video_counts.sort_values('counts', ascending=False).head(10)
+    video_counts = summary["video_counts"]
     
     # 莫蘭迪色系
     morandi_colors = ['#e6c9c9', '#a5b5c1', '#b8c5ba', '#c6b5a5', '#bfb6ca', '#d1cfcd', '#b6cad4', '#8a9eae', '#cad4c8', '#e5d6d6']
@@ -86,8 +335,7 @@ def create_overview_figures(videos_df, super_thanks_df, currency_df):
     figures['video_counts'] = fig_video_counts
     
     # 2. 影片超級感謝金額分佈 (TWD)
-    video_amount = super_thanks_df.groupby(['video_id', 'video_title', 'channel'])['amount_twd'].sum().reset_index()
-    video_amount = video_amount.sort_values('amount_twd', ascending=False).head(10)
+    video_amount = summary["video_amount"]
     
     fig_video_amount = px.bar(
         video_amount,
@@ -101,8 +349,7 @@ def create_overview_figures(videos_df, super_thanks_df, currency_df):
     figures['video_amount'] = fig_video_amount
     
     # 3. 貨幣分佈
-    currency_dist = super_thanks_df.groupby('currency').size().reset_index(name='counts')
-    currency_dist = currency_dist.sort_values('counts', ascending=False)
+    currency_dist = summary["currency_stats"]
     
     fig_currency_dist = px.pie(
         currency_dist,
@@ -114,8 +361,7 @@ def create_overview_figures(videos_df, super_thanks_df, currency_df):
     figures['currency_dist'] = fig_currency_dist
     
     # 4. 各貨幣金額統計
-    currency_amount = super_thanks_df.groupby('currency')['amount_twd'].sum().reset_index()
-    currency_amount = currency_amount.sort_values('amount_twd', ascending=False)
+    currency_amount = summary["currency_stats"].sort_values('amount_twd', ascending=False)
     
     fig_currency_amount = px.bar(
         currency_amount,
@@ -126,18 +372,10 @@ def create_overview_figures(videos_df, super_thanks_df, currency_df):
     )
     figures['currency_amount'] = fig_currency_amount
     
-    # 5. 頻道統計 
-    channel_stats = super_thanks_df.groupby('channel').agg({
-        'id': 'count',
-        'amount_twd': 'sum'
-    }).reset_index()
-    
-    channel_stats.columns = ['頻道', '超級感謝數量', '總金額 (TWD)']
-    channel_stats = channel_stats.sort_values('總金額 (TWD)', ascending=False)
-    
+    # 5. 頻道統計 (來自 channel_stats 統計表)
     # 頻道金額分佈
     fig_channel = px.bar(
-        channel_stats,
+        summary["channel_stats"],
         x='頻道',
         y='總金額 (TWD)',
         title='各頻道超級感謝總金額',
@@ -146,18 +384,17 @@ def create_overview_figures(videos_df, super_thanks_df, currency_df):
     fig_channel.update_traces(texttemplate='%{text}', textposition='outside')
     figures['channel_dist'] = fig_channel
     
-    return figures, channel_stats
+    return figures
 
-# 創建單一影片圖表
-def create_video_charts(super_thanks):
+# 創建單一影片圖表 (使用 SQL 彙總後的資料)
+def create_video_charts(currency_stats, commenter_stats):
     figures = {}
     
     # 1. 貨幣分佈圓餅圖
-    currency_counts = super_thanks.groupby('currency').size().reset_index(name='counts')
-    if not currency_counts.empty:
+    if not currency_stats.empty:
         fig_pie = px.pie(
-            currency_counts, 
-            names='currency', 
+            currency_stats,
+            names='currency',
             values='counts',
             title='超級感謝貨幣分佈',
             hole=0.3
@@ -165,12 +402,9 @@ def create_video_charts(super_thanks):
         figures['currency_pie'] = fig_pie
     
     # 2. 貨幣金額長條圖
-    currency_amounts = super_thanks.groupby('currency')['amount_twd'].sum().reset_index()
-    if not currency_amounts.empty:
-        currency_amounts = currency_amounts.sort_values('amount_twd', ascending=False)
-        
+    if not currency_stats.empty:
         fig_bar = px.bar(
-            currency_amounts,
+            currency_stats,
             x='currency',
             y='amount_twd',
             title='各貨幣超級感謝總金額 (TWD)',
@@ -179,24 +413,16 @@ def create_video_charts(super_thanks):
         figures['currency_bar'] = fig_bar
     
     # 3. 評論者排行
-    if 'commenter_name' in super_thanks.columns and not super_thanks['commenter_name'].isna().all():
-        commenter_stats = super_thanks.groupby('commenter_name').agg({
-            'id': 'count',
-            'amount_twd': 'sum'
-        }).reset_index()
-        commenter_stats.columns = ['評論者', '超級感謝次數', '總金額 (TWD)']
-        commenter_stats = commenter_stats.sort_values('總金額 (TWD)', ascending=False).head(10)
-        
-        if not commenter_stats.empty:
-            fig_commenters = px.bar(
-                commenter_stats,
-                x='評論者',
-                y='總金額 (TWD)',
-                title='超級感謝金額最高的評論者 (前10名)',
-                text='超級感謝次數'
-            )
-            fig_commenters.update_traces(texttemplate='%{text}', textposition='outside')
-            figures['commenters'] = fig_commenters
+    if not commenter_stats.empty:
+        fig_commenters = px.bar(
+            commenter_stats,
+            x='評論者',
+            y='總金額 (TWD)',
+            title='超級感謝金額最高的評論者 (前10名)',
+            text='超級感謝次數'
+        )
+        fig_commenters.update_traces(texttemplate='%{text}', textposition='outside')
+        figures['commenters'] = fig_commenters
     
     return figures
 
@@ -205,6 +431,7 @@ navbar = dbc.NavbarSimple(
     children=[
         dbc.NavItem(dbc.NavLink("總覽", href="/")),
         dbc.NavItem(dbc.NavLink("單一影片分析", href="/video")),
+        dbc.NavItem(dbc.NavLink("抓取工作", href="/jobs")),
         dbc.DropdownMenu(
             children=[
                 dbc.DropdownMenuItem("關於", header=True),
@@ -230,15 +457,17 @@ card_header_style = {"background-color": "#c6b5a5", "color": "#000000"}  # 咖
     [Input("url", "pathname")]
 )
 def render_page_content(pathname):
-    videos_df, super_thanks_df, currency_df = load_data()
-    
     # 總覽頁面
     if pathname == "/":
-        figures, channel_stats = create_overview_figures(videos_df, super_thanks_df, currency_df)
+        overview, cache_hit = get_overview_data()
+        print(f"[cache] {pathname}: {'hit' if cache_hit else 'miss'}")
         
+        videos_df = overview["videos_df"]
+        channel_stats = overview["channel_stats"]
+        figures = overview["figures"]
+        total_super_thanks = overview["total_super_thanks"]
+        total_amount = overview["total_amount"]
         total_videos = len(videos_df)
-        total_super_thanks = len(super_thanks_df)
-        total_amount = super_thanks_df['amount_twd'].sum()
         
         return html.Div([
             dbc.Row([
@@ -410,6 +639,57 @@ def render_page_content(pathname):
             html.Div(id='super-thanks-table')
         ])
     
+    # 抓取工作頁面 (由 worker.py 在背景執行)
+    elif pathname == "/jobs":
+        return html.Div([
+            dbc.Card([
+                dbc.CardHeader(html.H4("新增抓取工作")),
+                dbc.CardBody([
+                    dbc.Label("輸入YouTube影片ID或網址 (每行一個):"),
+                    dbc.Textarea(id='job-video-input', placeholder='每行一個影片ID或網址', rows=4),
+                    dbc.Checkbox(id='job-incremental', label='只抓新的超級感謝 (增量更新)', value=False, className="mt-2"),
+                    dbc.Button('加入佇列', id='enqueue-button', color="primary", className="mt-2"),
+                    html.Div(id='enqueue-result', className="mt-2"),
+                ])
+            ], className="mb-4 shadow"),
+            
+            dbc.Card([
+                dbc.CardHeader(html.H4("工作進度")),
+                dbc.CardBody([
+                    html.P("需另外執行 python worker.py 才會開始抓取", className="text-muted"),
+                    dash_table.DataTable(
+                        id='jobs-table',
+                        columns=[
+                            {'name': '工作', 'id': 'id'},
+                            {'name': '影片ID', 'id': 'video_id'},
+                            {'name': '狀態', 'id': 'status'},
+                            {'name': '嘗試次數', 'id': 'attempts'},
+                            {'name': '滾動次數', 'id': 'scroll_count'},
+                            {'name': '評論串數', 'id': 'threads_found'},
+                            {'name': '已儲存', 'id': 'rows_saved'},
+                            {'name': '下次執行', 'id': 'next_run_at'},
+                            {'name': '錯誤', 'id': 'last_error'},
+                        ],
+                        style_table={'overflowX': 'auto'},
+                        style_cell={
+                            'textAlign': 'left',
+                            'padding': '10px',
+                            'maxWidth': '300px',
+                            'overflow': 'hidden',
+                            'textOverflow': 'ellipsis'
+                        },
+                        style_header={
+                            'backgroundColor': 'rgb(230, 230, 230)',
+                            'fontWeight': 'bold'
+                        },
+                        page_size=20
+                    ),
+                    # 定時重新讀取進度
+                    dcc.Interval(id='jobs-interval', interval=2000),
+                ])
+            ], className="mb-4 shadow"),
+        ])
+    
     # 關於頁面
     elif pathname == "/about":
         return html.Div([
@@ -449,7 +729,7 @@ def update_video_analysis(n_clicks, video_id):
     if not n_clicks or not video_id:
         return html.Div(), html.Div(), html.Div()
     
-    video_info, super_thanks = load_video_data(video_id)
+    video_info, summary = load_video_summary(video_id)
     
     if video_info is None:
         return dbc.Alert("找不到此影片ID的資料", color="danger"), html.Div(), html.Div()
@@ -472,7 +752,7 @@ def update_video_analysis(n_clicks, video_id):
                     dbc.Card([
                         dbc.CardBody([
                             html.H4("超級感謝總數", className="card-title"),
-                            html.H2(f"{len(super_thanks)}", className="card-text text-primary"),
+                            html.H2(f"{summary['count']}", className="card-text text-primary"),
                         ])
                     ])
                 ], width=4),
@@ -481,7 +761,7 @@ def update_video_analysis(n_clicks, video_id):
                     dbc.Card([
                         dbc.CardBody([
                             html.H4("總金額 (TWD)", className="card-title"),
-                            html.H2(f"{super_thanks['amount_twd'].sum():,.2f}", className="card-text text-primary"),
+                            html.H2(f"{summary['total_twd']:,.2f}", className="card-text text-primary"),
                         ])
                     ])
                 ], width=4),
@@ -490,7 +770,7 @@ def update_video_analysis(n_clicks, video_id):
     ], className="mb-4 shadow")
     
     # 生成圖表
-    figures = create_video_charts(super_thanks)
+    figures = create_video_charts(summary['currency_stats'], summary['commenter_stats'])
     
     if not figures:
         charts_section = dbc.Alert("此影片沒有足夠的數據來生成圖表", color="warning")
@@ -526,12 +806,13 @@ def update_video_analysis(n_clicks, video_id):
             ]) if 'commenters' in figures else html.Div(),
         ])
     
-    # 超級感謝表格
+    # 超級感謝表格 (分頁、排序、篩選都在伺服器端用 SQL 處理)
     table_section = dbc.Card([
         dbc.CardHeader(html.H4("超級感謝詳細列表")),
         dbc.CardBody([
+            dcc.Store(id='super-thanks-video-id', data=video_id),
             dash_table.DataTable(
-                data=super_thanks.to_dict('records'),
+                id='super-thanks-datatable',
                 columns=[
                     {'name': '貨幣', 'id': 'currency'},
                     {'name': '金額', 'id': 'amount', 'type': 'numeric', 'format': {'specifier': '.2f'}},
@@ -564,14 +845,42 @@ def update_video_analysis(n_clicks, video_id):
                         'backgroundColor': 'rgb(248, 248, 248)'
                     }
                 ],
+                page_current=0,
                 page_size=15,
-                sort_action='native'
-            )
+                page_action='custom',
+                sort_action='custom',
+                sort_mode='single',
+                sort_by=[],
+                filter_action='custom',
+                filter_query=''
+            ),
+            html.Div(id='super-thanks-filter-error', className="text-danger mt-2")
         ])
     ], className="mb-4 shadow")
     
     return info_section, charts_section, table_section
 
+@app.callback(
+    [Output('super-thanks-datatable', 'data'),
+     Output('super-thanks-datatable', 'page_count'),
+     Output('super-thanks-filter-error', 'children')],
+    [Input('super-thanks-datatable', 'page_current'),
+     Input('super-thanks-datatable', 'page_size'),
+     Input('super-thanks-datatable', 'sort_by'),
+     Input('super-thanks-datatable', 'filter_query')],
+    [dash.dependencies.State('super-thanks-video-id', 'data')]
+)
+def update_super_thanks_table(page_current, page_size, sort_by, filter_query, video_id):
+    if not video_id:
+        return [], 1, ""
+    
+    try:
+        data, page_count = load_super_thanks_page(video_id, page_current or 0, page_size, sort_by, filter_query)
+    except ValueError as e:
+        # 篩選條件無法轉成 SQL 時清空表格並顯示原因，不要當成沒有篩選
+        return [], 1, str(e)
+    return data, page_count, ""
+
 @app.callback(
     Output('video-details-output', 'children'),
     [Input('view-details-btn', 'n_clicks')],
@@ -587,6 +896,51 @@ def view_selected_video(n_clicks, selected_rows, data):
     
     return dcc.Location(pathname=f"/video?id={video_id}", id="redirect-to-video")
 
+# 新增抓取工作
+@app.callback(
+    Output('enqueue-result', 'children'),
+    [Input('enqueue-button', 'n_clicks')],
+    [dash.dependencies.State('job-video-input', 'value'),
+     dash.dependencies.State('job-incremental', 'value')]
+)
+def enqueue_scrape_jobs(n_clicks, video_input, incremental):
+    if not n_clicks or not video_input:
+        return html.Div()
+    
+    added, existing = 0, 0
+    conn = init_database()
+    try:
+        for line in video_input.splitlines():
+            if not line.strip():
+                continue
+            video_url = normalize_video_url(line)
+            _, created = enqueue_job(conn, extract_video_id(video_url), video_url, bool(incremental))
+            if created:
+                added += 1
+            else:
+                existing += 1
+    finally:
+        conn.close()
+    
+    message = f"已加入 {added} 個工作"
+    if existing:
+        message += f"，{existing} 部影片已在佇列中"
+    return dbc.Alert(message, color="success")
+
+# 定時更新工作進度
+@app.callback(
+    Output('jobs-table', 'data'),
+    [Input('jobs-interval', 'n_intervals'),
+     Input('enqueue-result', 'children')]
+)
+def update_jobs_table(n_intervals, enqueue_result):
+    with read_connection() as conn:
+        try:
+            return list_jobs(conn)
+        except sqlite3.OperationalError:
+            # worker 還沒建立過 scrape_jobs 資料表
+            return []
+
 app.layout = html.Div([
     dcc.Location(id="url", refresh=False),
     navbar,
@@ -1,10 +1,320 @@
 import sqlite3
-from config import DATABASE_FILE, DEFAULT_EXCHANGE_RATES
+from config import DATABASE_FILE, DATABASE_PRAGMAS, DEFAULT_EXCHANGE_RATES
 
-def init_database():
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
+def apply_pragmas(conn):
+    """設定 WAL 及寫入效能相關的 pragma"""
+    for name, value in DATABASE_PRAGMAS.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+
+def _migration_1_thread_ids(cursor):
+    """super_thanks 加上 thread_id 及抓取進度資料表"""
+    # 舊資料庫補上 thread_id 欄位
+    columns = [row[1] for row in cursor.execute('PRAGMA table_info(super_thanks)')]
+    if 'thread_id' not in columns:
+        cursor.execute('ALTER TABLE super_thanks ADD COLUMN thread_id TEXT')
+    
+    # 同一部影片的同一則留言只存一次 (thread_id 為 NULL 的舊資料不受影響)
+    cursor.execute('''
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_super_thanks_thread
+    ON super_thanks (video_id, thread_id)
+    ''')
+    
+    # 建立抓取進度資料表，中斷後重新抓取時使用
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS scrape_checkpoints (
+        video_id TEXT PRIMARY KEY,
+        status TEXT NOT NULL,
+        scroll_count INTEGER DEFAULT 0,
+        threads_found INTEGER DEFAULT 0,
+        rows_saved INTEGER DEFAULT 0,
+        last_thread_id TEXT,
+        seen_thread_ids TEXT,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (video_id) REFERENCES videos (video_id)
+    )
+    ''')
+
+def _migration_2_indexes(cursor):
+    """查詢常用的索引"""
+    # 單一影片：WHERE video_id = ? 的 COUNT / SUM(amount_twd) 及 ORDER BY amount_twd
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_super_thanks_video_amount
+    ON super_thanks (video_id, amount_twd)
+    ''')
+    
+    # 按貨幣統計：GROUP BY currency 只需讀索引
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_super_thanks_currency
+    ON super_thanks (currency, amount, amount_twd)
+    ''')
+    
+    # 單一影片的評論者排行
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_super_thanks_video_commenter
+    ON super_thanks (video_id, commenter_name, amount_twd)
+    ''')
+    
+    cursor.execute('ANALYZE')
+
+def _migration_3_summary_tables(cursor):
+    """影片、頻道、貨幣的統計表，由觸發器在寫入時更新"""
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS video_stats (
+        video_id TEXT PRIMARY KEY,
+        super_thanks_count INTEGER NOT NULL DEFAULT 0,
+        total_twd REAL NOT NULL DEFAULT 0
+    )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_video_stats_count ON video_stats (super_thanks_count)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_video_stats_total ON video_stats (total_twd)')
+    
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS channel_stats (
+        channel TEXT PRIMARY KEY,
+        super_thanks_count INTEGER NOT NULL DEFAULT 0,
+        total_twd REAL NOT NULL DEFAULT 0
+    )
+    ''')
+    
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS currency_stats (
+        currency TEXT PRIMARY KEY,
+        super_thanks_count INTEGER NOT NULL DEFAULT 0,
+        total_amount REAL NOT NULL DEFAULT 0,
+        total_twd REAL NOT NULL DEFAULT 0
+    )
+    ''')
+    
+    # 新增一筆超級感謝時累加
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_super_thanks_insert_stats
+    AFTER INSERT ON super_thanks
+    BEGIN
+        INSERT INTO video_stats (video_id, super_thanks_count, total_twd)
+        VALUES (NEW.video_id, 1, NEW.amount_twd)
+        ON CONFLICT (video_id) DO UPDATE SET
+            super_thanks_count = super_thanks_count + 1,
+            total_twd = total_twd + excluded.total_twd;
+        
+        INSERT INTO channel_stats (channel, super_thanks_count, total_twd)
+        VALUES (COALESCE((SELECT channel FROM videos WHERE video_id = NEW.video_id), ''), 1, NEW.amount_twd)
+        ON CONFLICT (channel) DO UPDATE SET
+            super_thanks_count = super_thanks_count + 1,
+            total_twd = total_twd + excluded.total_twd;
+        
+        INSERT INTO currency_stats (currency, super_thanks_count, total_amount, total_twd)
+        VALUES (NEW.currency, 1, NEW.amount, NEW.amount_twd)
+        ON CONFLICT (currency) DO UPDATE SET
+            super_thanks_count = super_thanks_count + 1,
+            total_amount = total_amount + excluded.total_amount,
+            total_twd = total_twd + excluded.total_twd;
+    END
+    ''')
+    
+    # 刪除時扣回
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_super_thanks_delete_stats
+    AFTER DELETE ON super_thanks
+    BEGIN
+        UPDATE video_stats
+        SET super_thanks_count = super_thanks_count - 1, total_twd = total_twd - OLD.amount_twd
+        WHERE video_id = OLD.video_id;
+        
+        UPDATE channel_stats
+        SET super_thanks_count = super_thanks_count - 1, total_twd = total_twd - OLD.amount_twd
+        WHERE channel = COALESCE((SELECT channel FROM videos WHERE video_id = OLD.video_id), '');
+        
+        UPDATE currency_stats
+        SET super_thanks_count = super_thanks_count - 1,
+            total_amount = total_amount - OLD.amount,
+            total_twd = total_twd - OLD.amount_twd
+        WHERE currency = OLD.currency;
+    END
+    ''')
+    
+    # 修改金額或貨幣時 (例如重新換算台幣) 先扣回舊值再加上新值
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_super_thanks_update_stats
+    AFTER UPDATE OF video_id, currency, amount, amount_twd ON super_thanks
+    BEGIN
+        UPDATE video_stats
+        SET super_thanks_count = super_thanks_count - 1, total_twd = total_twd - OLD.amount_twd
+        WHERE video_id = OLD.video_id;
+        INSERT INTO video_stats (video_id, super_thanks_count, total_twd)
+        VALUES (NEW.video_id, 1, NEW.amount_twd)
+        ON CONFLICT (video_id) DO UPDATE SET
+            super_thanks_count = super_thanks_count + 1,
+            total_twd = total_twd + excluded.total_twd;
+        
+        UPDATE channel_stats
+        SET super_thanks_count = super_thanks_count - 1, total_twd = total_twd - OLD.amount_twd
+        WHERE channel = COALESCE((SELECT channel FROM videos WHERE video_id = OLD.video_id), '');
+        INSERT INTO channel_stats (channel, super_thanks_count, total_twd)
+        VALUES (COALESCE((SELECT channel FROM videos WHERE video_id = NEW.video_id), ''), 1, NEW.amount_twd)
+        ON CONFLICT (channel) DO UPDATE SET
+            super_thanks_count = super_thanks_count + 1,
+            total_twd = total_twd + excluded.total_twd;
+        
+        UPDATE currency_stats
+        SET super_thanks_count = super_thanks_count - 1,
+            total_amount = total_amount - OLD.amount,
+            total_twd = total_twd - OLD.amount_twd
+        WHERE currency = OLD.currency;
+        INSERT INTO currency_stats (currency, super_thanks_count, total_amount, total_twd)
+        VALUES (NEW.currency, 1, NEW.amount, NEW.amount_twd)
+        ON CONFLICT (currency) DO UPDATE SET
+            super_thanks_count = super_thanks_count + 1,
+            total_amount = total_amount + excluded.total_amount,
+            total_twd = total_twd + excluded.total_twd;
+    END
+    ''')
+    
+    # 影片改了頻道名稱時，把該影片的統計移到新頻道
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_videos_channel_stats
+    AFTER UPDATE OF channel ON videos
+    WHEN COALESCE(OLD.channel, '') != COALESCE(NEW.channel, '')
+    BEGIN
+        UPDATE channel_stats
+        SET super_thanks_count = super_thanks_count - COALESCE((SELECT super_thanks_count FROM video_stats WHERE video_id = NEW.video_id), 0),
+            total_twd = total_twd - COALESCE((SELECT total_twd FROM video_stats WHERE video_id = NEW.video_id), 0)
+        WHERE channel = COALESCE(OLD.channel, '');
+        
+        INSERT INTO channel_stats (channel, super_thanks_count, total_twd)
+        SELECT COALESCE(NEW.channel, ''), super_thanks_count, total_twd
+        FROM video_stats WHERE video_id = NEW.video_id
+        ON CONFLICT (channel) DO UPDATE SET
+            super_thanks_count = super_thanks_count + excluded.super_thanks_count,
+            total_twd = total_twd + excluded.total_twd;
+    END
+    ''')
     
+    # 既有資料回填
+    cursor.execute('''
+    INSERT OR REPLACE INTO video_stats (video_id, super_thanks_count, total_twd)
+    SELECT video_id, COUNT(*), SUM(amount_twd) FROM super_thanks GROUP BY video_id
+    ''')
+    cursor.execute('''
+    INSERT OR REPLACE INTO channel_stats (channel, super_thanks_count, total_twd)
+    SELECT COALESCE(v.channel, ''), COUNT(*), SUM(s.amount_twd)
+    FROM super_thanks s
+    LEFT JOIN videos v ON s.video_id = v.video_id
+    GROUP BY COALESCE(v.channel, '')
+    ''')
+    cursor.execute('''
+    INSERT OR REPLACE INTO currency_stats (currency, super_thanks_count, total_amount, total_twd)
+    SELECT currency, COUNT(*), SUM(amount), SUM(amount_twd) FROM super_thanks GROUP BY currency
+    ''')
+
+def _migration_4_scrape_jobs(cursor):
+    """背景抓取工作佇列"""
+    # status: queued -> running -> done / failed，失敗時依 next_run_at 延後重試
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS scrape_jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        video_id TEXT NOT NULL,
+        video_url TEXT NOT NULL,
+        incremental INTEGER NOT NULL DEFAULT 0,
+        status TEXT NOT NULL DEFAULT 'queued',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        max_attempts INTEGER NOT NULL DEFAULT 3,
+        next_run_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        last_error TEXT,
+        worker TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        started_at TIMESTAMP,
+        finished_at TIMESTAMP
+    )
+    ''')
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_scrape_jobs_status
+    ON scrape_jobs (status, next_run_at)
+    ''')
+
+def _migration_5_scrape_runs(cursor):
+    """每次抓取的各階段耗時"""
+    # stages 為 JSON: {階段名稱: {"count", "total", "max"}}
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS scrape_runs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        video_id TEXT NOT NULL,
+        engine TEXT,
+        status TEXT NOT NULL,
+        started_at TIMESTAMP,
+        total_seconds REAL,
+        rows_saved INTEGER DEFAULT 0,
+        stages TEXT
+    )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_scrape_runs_video ON scrape_runs (video_id)')
+
+def _migration_6_rate_history(cursor):
+    """依日期記錄的匯率歷史"""
+    # 主鍵 (currency, effective_date) 同時是「某天適用的匯率」查詢的索引
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS currency_rate_history (
+        currency TEXT NOT NULL,
+        effective_date TEXT NOT NULL,
+        rate_to_twd REAL NOT NULL,
+        source TEXT,
+        PRIMARY KEY (currency, effective_date)
+    ) WITHOUT ROWID
+    ''')
+    
+    # 目前的匯率當作最早的歷史，沒有更早資料的日期都使用這個匯率
+    cursor.execute('''
+    INSERT OR IGNORE INTO currency_rate_history (currency, effective_date, rate_to_twd, source)
+    SELECT currency, '1970-01-01', rate_to_twd, 'initial' FROM currency_rates
+    ''')
+
+def _migration_7_table_sort_indexes(cursor):
+    """超級感謝表格各排序欄位的索引"""
+    # 表格分頁依 (欄位, id) 排序，索引最後隱含 rowid (即 id)，每頁只需沿著索引讀取一頁的資料
+    # amount_twd 使用 idx_super_thanks_video_amount，commenter_name 使用 idx_super_thanks_video_commenter
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_super_thanks_video_currency
+    ON super_thanks (video_id, currency)
+    ''')
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_super_thanks_video_original_amount
+    ON super_thanks (video_id, amount)
+    ''')
+
+# (版本號, 遷移函式)，依序套用 PRAGMA user_version 之後的版本
+MIGRATIONS = [
+    (1, _migration_1_thread_ids),
+    (2, _migration_2_indexes),
+    (3, _migration_3_summary_tables),
+    (4, _migration_4_scrape_jobs),
+    (5, _migration_5_scrape_runs),
+    (6, _migration_6_rate_history),
+    (7, _migration_7_table_sort_indexes),
+]
+
+def migrate_database(conn):
+    """套用尚未執行的資料庫遷移"""
+    current_version = conn.execute('PRAGMA user_version').fetchone()[0]
+    
+    for version, migration in MIGRATIONS:
+        if version <= current_version:
+            continue
+        
+        print(f"資料庫遷移至版本 {version}: {migration.__doc__}")
+        cursor = conn.cursor()
+        migration(cursor)
+        cursor.execute(f'PRAGMA user_version = {version}')
+        conn.commit()
+
+# 最新的資料庫版本，user_version 已經是這個版本時不需要再建立資料表
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def get_db_connection(**kwargs):
+    """所有模組共用的連線建立方式 (已套用 pragma)，kwargs 直接傳給 sqlite3.connect"""
+    conn = sqlite3.connect(DATABASE_FILE, **kwargs)
+    apply_pragmas(conn)
+    return conn
+    
+def _create_base_tables(cursor):
     # 建立yt影片資料表
     cursor.execute('''
     CREATE TABLE IF NOT EXISTS videos (
@@ -28,6 +338,7 @@ def init_database():
         comment_text TEXT,
         comment_date TIMESTAMP,
         scrape_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        thread_id TEXT,
         FOREIGN KEY (video_id) REFERENCES videos (video_id)
     )
     ''')
@@ -41,15 +352,52 @@ def init_database():
     )
     ''')
     
-    # 初始化貨幣匯率資料
-    for currency, rate in DEFAULT_EXCHANGE_RATES.items():
-        cursor.execute('''
-        INSERT OR REPLACE INTO currency_rates (currency, rate_to_twd)
+def seed_default_rates(conn, replace=False):
+    """寫入 config 的預設匯率，回傳寫入的貨幣數
+    
+    預設只補上缺少的貨幣；replace=True 時以預設值覆蓋有變動的匯率，並記錄為今天起的匯率歷史
+    """
+    if not replace:
+        cursor = conn.executemany('''
+        INSERT OR IGNORE INTO currency_rates (currency, rate_to_twd)
         VALUES (?, ?)
-        ''', (currency, rate))
+        ''', DEFAULT_EXCHANGE_RATES.items())
+        return max(cursor.rowcount, 0)
     
-    conn.commit()
-    return conn
-
-def get_db_connection():
-    return sqlite3.connect(DATABASE_FILE)
\ No newline at end of file
+    changed = 0
+    with conn:
+        for currency, rate in DEFAULT_EXCHANGE_RATES.items():
+            # 匯率相同時不改寫，last_updated 保持原本的時間
+            cursor = conn.execute('''
+            INSERT INTO currency_rates (currency, rate_to_twd, last_updated)
+            VALUES (?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT (currency) DO UPDATE SET
+                rate_to_twd = excluded.rate_to_twd,
+                last_updated = excluded.last_updated
+            WHERE rate_to_twd != excluded.rate_to_twd
+            ''', (currency, rate))
+            if cursor.rowcount > 0:
+                changed += 1
+                conn.execute('''
+                INSERT OR REPLACE INTO currency_rate_history (currency, effective_date, rate_to_twd, source)
+                VALUES (?, date('now'), ?, 'default')
+                ''', (currency, rate))
+    return changed
+    
+def init_database(refresh_rates=False):
+    """開啟資料庫連線
+    
+    只有第一次建立或版本比 SCHEMA_VERSION 舊時才建立資料表、寫入預設匯率及遷移，
+    已是最新版本時只讀一次 user_version；refresh_rates=True 時以 config 的預設匯率更新目前匯率
+    """
+    conn = get_db_connection()
+    
+    if conn.execute('PRAGMA user_version').fetchone()[0] < SCHEMA_VERSION:
+        _create_base_tables(conn.cursor())
+        seed_default_rates(conn)
+        conn.commit()
+        migrate_database(conn)
+    
+    if refresh_rates:
+        print(f"已更新 {seed_default_rates(conn, replace=True)} 種貨幣的預設匯率")
+    return conn
\ No newline at end of file
@@ -1,20 +1,32 @@
-from datetime import datetime
+import json
 from database.db_init import get_db_connection
-from config import DATABASE_FILE
+from database.models import SuperThanksBatch
+from config import DATABASE_FILE, JOB_SETTINGS
 
-def save_video_info(conn, video_info):
-    """儲存影片資訊到資料庫"""
+def save_video_info(conn, video_info, commit=True):
+    """儲存影片資訊到資料庫，commit=False 時交給後續寫入一起提交"""
     cursor = conn.cursor()
+    # 用 UPSERT 而不是 REPLACE，頻道改名時統計表的觸發器才會執行
     cursor.execute('''
-    INSERT OR REPLACE INTO videos (video_id, video_url, title, channel)
+    INSERT INTO videos (video_id, video_url, title, channel)
     VALUES (?, ?, ?, ?)
+    ON CONFLICT (video_id) DO UPDATE SET
+        video_url = excluded.video_url,
+        title = excluded.title,
+        channel = excluded.channel
     ''', (
         video_info["video_id"],
         video_info["video_url"],
         video_info["title"],
         video_info["channel"]
     ))
-    conn.commit()
+    if commit:
+        conn.commit()
+
+def get_video_urls(conn):
+    """資料庫中所有影片的網址"""
+    cursor = conn.execute('SELECT video_url FROM videos ORDER BY scrape_date')
+    return [row[0] for row in cursor]
 
 def get_currency_rate(conn, currency):
     """從資料庫獲取貨幣匯率"""
@@ -27,29 +39,249 @@ def get_currency_rate(conn, currency):
         # 如果找不到匯率，返回1.0作為默認值
         return 1.0
 
-def save_super_thanks(conn, video_id, super_thanks_data):
-    """儲存超級感謝資料到資料庫"""
-    cursor = conn.cursor()
+def save_super_thanks(conn, video_id, super_thanks_data, commit=True):
+    """儲存超級感謝資料到資料庫 (executemany，單一交易)，回傳實際新增的筆數
+    
+    super_thanks_data 為 SuperThanksBatch (也接受 dict 列表)，
+    同一則留言 (video_id, thread_id) 已存在時略過
+    """
+    if not isinstance(super_thanks_data, SuperThanksBatch):
+        super_thanks_data = SuperThanksBatch.from_records(super_thanks_data)
+    rows = super_thanks_data.rows(video_id)
+    
+    cursor = conn.executemany('''
+    INSERT OR IGNORE INTO super_thanks (
+        video_id, thread_id, currency, amount, amount_twd,
+        commenter_name, comment_text, comment_date
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', rows)
+    
+    if commit:
+        conn.commit()
+    return max(cursor.rowcount, 0)
+
+def get_saved_thread_ids(conn, video_id):
+    """已經存過的留言 ID，重新抓取時略過"""
+    cursor = conn.execute(
+        'SELECT thread_id FROM super_thanks WHERE video_id = ? AND thread_id IS NOT NULL',
+        (video_id,)
+    )
+    return {row[0] for row in cursor}
+
+def save_checkpoint(conn, video_id, status, progress=None, rows_saved=0, commit=True):
+    """更新抓取進度，rows_saved 為這次新增的筆數 (累加)"""
+    progress = progress or {}
+    seen_thread_ids = progress.get("seen_thread_ids") or []
+    
+    conn.execute('''
+    INSERT INTO scrape_checkpoints (
+        video_id, status, scroll_count, threads_found, rows_saved,
+        last_thread_id, seen_thread_ids, updated_at
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+    ON CONFLICT (video_id) DO UPDATE SET
+        status = excluded.status,
+        scroll_count = COALESCE(excluded.scroll_count, scroll_count),
+        threads_found = COALESCE(excluded.threads_found, threads_found),
+        rows_saved = rows_saved + excluded.rows_saved,
+        last_thread_id = COALESCE(excluded.last_thread_id, last_thread_id),
+        seen_thread_ids = COALESCE(excluded.seen_thread_ids, seen_thread_ids),
+        updated_at = CURRENT_TIMESTAMP
+    ''', (
+        video_id,
+        status,
+        progress.get("scroll_count"),
+        progress.get("threads_found"),
+        rows_saved,
+        seen_thread_ids[-1] if seen_thread_ids else None,
+        json.dumps(seen_thread_ids) if seen_thread_ids else None
+    ))
     
-    for item in super_thanks_data:
-        cursor.execute('''
-        INSERT INTO super_thanks (
-            video_id, currency, amount, amount_twd,
-            commenter_name, comment_text, comment_date
-        ) VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            video_id,
-            item["currency"],
-            item["amount"],
-            item["amount_twd"],
-            item.get("commenter_name", ""),
-            item.get("comment_text", ""),
-            item.get("comment_date", datetime.now())
-        ))
+    if commit:
+        conn.commit()
+
+def start_checkpoint(conn, video_id, commit=True):
+    """新的一次抓取開始：標記為 running 並把進度歸零，/jobs 頁面才不會顯示上一次的進度
+    
+    已看過的留言 ID 保留下來，中斷後重新抓取時仍可略過
+    """
+    conn.execute('''
+    INSERT INTO scrape_checkpoints (video_id, status, scroll_count, threads_found, rows_saved, updated_at)
+    VALUES (?, 'running', 0, 0, 0, CURRENT_TIMESTAMP)
+    ON CONFLICT (video_id) DO UPDATE SET
+        status = 'running',
+        scroll_count = 0,
+        threads_found = 0,
+        rows_saved = 0,
+        updated_at = CURRENT_TIMESTAMP
+    ''', (video_id,))
+    
+    if commit:
+        conn.commit()
+
+def get_checkpoint(conn, video_id):
+    cursor = conn.execute('''
+    SELECT status, scroll_count, threads_found, rows_saved, last_thread_id, seen_thread_ids, updated_at
+    FROM scrape_checkpoints
+    WHERE video_id = ?
+    ''', (video_id,))
+    row = cursor.fetchone()
+    if not row:
+        return None
+    
+    return {
+        "status": row[0],
+        "scroll_count": row[1],
+        "threads_found": row[2],
+        "rows_saved": row[3],
+        "last_thread_id": row[4],
+        "seen_thread_ids": json.loads(row[5]) if row[5] else [],
+        "updated_at": row[6]
+    }
+
+def enqueue_job(conn, video_id, video_url, incremental=False, max_attempts=None):
+    """加入抓取工作，回傳 (工作 ID, 是否新增)；同一部影片已在佇列中時沿用原本的工作"""
+    if max_attempts is None:
+        max_attempts = JOB_SETTINGS["max_attempts"]
+    
+    row = conn.execute('''
+    SELECT id FROM scrape_jobs
+    WHERE video_id = ? AND status IN ('queued', 'running')
+    ''', (video_id,)).fetchone()
+    if row:
+        return row[0], False
+    
+    cursor = conn.execute('''
+    INSERT INTO scrape_jobs (video_id, video_url, incremental, max_attempts)
+    VALUES (?, ?, ?, ?)
+    ''', (video_id, video_url, int(incremental), max_attempts))
+    conn.commit()
+    return cursor.lastrowid, True
+
+def claim_job(conn, worker):
+    """取出一個到期的工作並標記為執行中，沒有工作時回傳 None"""
+    while True:
+        row = conn.execute('''
+        SELECT id, video_id, video_url, incremental, attempts, max_attempts
+        FROM scrape_jobs
+        WHERE status = 'queued' AND next_run_at <= CURRENT_TIMESTAMP
+        ORDER BY next_run_at, id
+        LIMIT 1
+        ''').fetchone()
+        if not row:
+            return None
+        
+        # 其他 worker 可能搶先一步，只有狀態還是 queued 才算取得
+        cursor = conn.execute('''
+        UPDATE scrape_jobs
+        SET status = 'running', attempts = attempts + 1, worker = ?,
+            started_at = CURRENT_TIMESTAMP, finished_at = NULL
+        WHERE id = ? AND status = 'queued'
+        ''', (worker, row[0]))
+        conn.commit()
+        
+        if cursor.rowcount == 1:
+            return {
+                "id": row[0],
+                "video_id": row[1],
+                "video_url": row[2],
+                "incremental": bool(row[3]),
+                "attempts": row[4] + 1,
+                "max_attempts": row[5]
+            }
+
+def finish_job(conn, job_id):
+    conn.execute('''
+    UPDATE scrape_jobs
+    SET status = 'done', last_error = NULL, finished_at = CURRENT_TIMESTAMP
+    WHERE id = ?
+    ''', (job_id,))
+    conn.commit()
+
+def fail_job(conn, job, error):
+    """工作失敗：還有次數就以指數退避重新排入佇列並回傳等待秒數，否則標記為 failed"""
+    if job["attempts"] >= job["max_attempts"]:
+        conn.execute('''
+        UPDATE scrape_jobs
+        SET status = 'failed', last_error = ?, finished_at = CURRENT_TIMESTAMP
+        WHERE id = ?
+        ''', (str(error), job["id"]))
+        conn.commit()
+        return None
     
+    delay = min(JOB_SETTINGS["backoff_max"], JOB_SETTINGS["backoff_base"] * 2 ** (job["attempts"] - 1))
+    conn.execute('''
+    UPDATE scrape_jobs
+    SET status = 'queued', last_error = ?, next_run_at = datetime('now', ?)
+    WHERE id = ?
+    ''', (str(error), f"+{delay} seconds", job["id"]))
+    conn.commit()
+    return delay
+
+def requeue_running_jobs(conn):
+    """worker 重新啟動時，把上次中斷時還在執行的工作放回佇列"""
+    cursor = conn.execute('''
+    UPDATE scrape_jobs
+    SET status = 'queued', next_run_at = CURRENT_TIMESTAMP
+    WHERE status = 'running'
+    ''')
     conn.commit()
+    return cursor.rowcount
+
+def list_jobs(conn, limit=50):
+    """最近的抓取工作及其進度 (進度來自 scrape_checkpoints)"""
+    cursor = conn.execute('''
+    SELECT j.id, j.video_id, j.status, j.incremental, j.attempts, j.max_attempts,
+           c.scroll_count, c.threads_found, c.rows_saved,
+           j.last_error, j.next_run_at, j.created_at, j.started_at, j.finished_at
+    FROM scrape_jobs j
+    LEFT JOIN scrape_checkpoints c ON j.video_id = c.video_id
+    ORDER BY j.id DESC
+    LIMIT ?
+    ''', (limit,))
+    columns = [description[0] for description in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor]
+
+def save_scrape_run(conn, run, commit=True):
+    """儲存一次抓取的計時紀錄 (RunTimer.to_dict() 的格式)"""
+    conn.execute('''
+    INSERT INTO scrape_runs (video_id, engine, status, started_at, total_seconds, rows_saved, stages)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', (
+        run["video_id"],
+        run["engine"],
+        run["status"],
+        run["started_at"],
+        run["total_seconds"],
+        run["rows_saved"],
+        json.dumps(run["stages"])
+    ))
+    
+    if commit:
+        conn.commit()
+
+def get_stage_summary(conn, limit=500):
+    """最近 limit 次抓取中各階段的平均及總耗時，找出瓶頸"""
+    cursor = conn.execute('''
+    SELECT stage.key,
+           COUNT(*) AS runs,
+           AVG(json_extract(stage.value, '$.total')) AS avg_seconds,
+           SUM(json_extract(stage.value, '$.total')) AS total_seconds,
+           MAX(json_extract(stage.value, '$.max')) AS max_seconds
+    FROM (SELECT stages FROM scrape_runs ORDER BY id DESC LIMIT ?) AS runs,
+         json_each(runs.stages) AS stage
+    GROUP BY stage.key
+    ORDER BY total_seconds DESC
+    ''', (limit,))
+    return cursor.fetchall()
+
+def get_summary_totals(conn):
+    """從統計表取得總超級感謝數及總台幣金額"""
+    cursor = conn.execute('SELECT SUM(super_thanks_count), SUM(total_twd) FROM currency_stats')
+    total_count, total_twd = cursor.fetchone()
+    return total_count or 0, total_twd or 0
 
 def run_statistics(conn, video_id):
+    """統計資料都從寫入時更新的統計表讀取，不掃描 super_thanks"""
     cursor = conn.cursor()
     
     print("\n=== DATABASE STATISTICS ===")
@@ -59,23 +291,18 @@ def run_statistics(conn, video_id):
     total_videos = cursor.fetchone()[0]
     print(f"資料庫中總影片數: {total_videos}")
     
-    # 2. 查詢總共抓取的超級感謝數量
-    cursor.execute('SELECT COUNT(*) FROM super_thanks')
-    total_super_thanks = cursor.fetchone()[0]
+    # 2. 3. 查詢總超級感謝數量及總台幣金額
+    total_super_thanks, total_twd = get_summary_totals(conn)
     print(f"資料庫中總超級感謝數: {total_super_thanks}")
-    
-    # 3. 計算總台幣金額
-    cursor.execute('SELECT SUM(amount_twd) FROM super_thanks')
-    total_twd = cursor.fetchone()[0] or 0
     print(f"資料庫中總台幣金額: {total_twd:.1f} TWD")
     
     # 4. 計算本影片的統計資料
     cursor.execute('''
-    SELECT COUNT(*), SUM(amount_twd) 
-    FROM super_thanks 
+    SELECT super_thanks_count, total_twd
+    FROM video_stats
     WHERE video_id = ?
     ''', (video_id,))
-    result = cursor.fetchone()
+    result = cursor.fetchone() or (0, 0)
     video_count = result[0] or 0
     video_twd = result[1] or 0
     
@@ -84,11 +311,10 @@ def run_statistics(conn, video_id):
     
     # 5. 計算最多超級感謝的影片
     cursor.execute('''
-    SELECT v.title, COUNT(s.id) as count
-    FROM videos v
-    JOIN super_thanks s ON v.video_id = s.video_id
-    GROUP BY v.video_id
-    ORDER BY count DESC
+    SELECT v.title, s.super_thanks_count
+    FROM video_stats s
+    JOIN videos v ON v.video_id = s.video_id
+    ORDER BY s.super_thanks_count DESC
     LIMIT 1
     ''')
     result = cursor.fetchone()
@@ -97,11 +323,10 @@ def run_statistics(conn, video_id):
     
     # 6. 計算貢獻最多錢的影片
     cursor.execute('''
-    SELECT v.title, SUM(s.amount_twd) as total
-    FROM videos v
-    JOIN super_thanks s ON v.video_id = s.video_id
-    GROUP BY v.video_id
-    ORDER BY total DESC
+    SELECT v.title, s.total_twd
+    FROM video_stats s
+    JOIN videos v ON v.video_id = s.video_id
+    ORDER BY s.total_twd DESC
     LIMIT 1
     ''')
     result = cursor.fetchone()
@@ -118,9 +343,10 @@ def query_database():
         print("2. 查詢特定影片的超級感謝")
         print("3. 查詢貨幣匯率")
         print("4. 按貨幣統計超級感謝")
+        print("5. 各階段耗時統計")
         print("0. 返回主選單")
         
-        choice = input("請選擇操作 (0-4): ")
+        choice = input("請選擇操作 (0-5): ")
         
         if choice == "0":
             break
@@ -153,9 +379,9 @@ def query_database():
         
         elif choice == "4":
             cursor.execute('''
-            SELECT currency, COUNT(*) as count, SUM(amount) as total, SUM(amount_twd) as total_twd
-            FROM super_thanks
-            GROUP BY currency
+            SELECT currency, super_thanks_count, total_amount, total_twd
+            FROM currency_stats
+            WHERE super_thanks_count > 0
             ORDER BY total_twd DESC
             ''')
             results = cursor.fetchall()
@@ -163,6 +389,12 @@ def query_database():
             for row in results:
                 print(f"{row[0]}: {row[1]}筆, 總額: {row[2]:.2f}, TWD總額: {row[3]:.2f}")
         
+        elif choice == "5":
+            results = get_stage_summary(conn)
+            print("\n=== 各階段耗時統計 (最近500次抓取) ===")
+            for row in results:
+                print(f"{row[0]}: 平均 {row[2]:.2f}s, 總計 {row[3]:.1f}s, 最長 {row[4]:.2f}s ({row[1]}次抓取)")
+        
         else:
             print("無效的選擇，請重試")
     
@@ -1,4 +1,11 @@
+import sys
+import time
+from array import array
+from datetime import datetime
+
 class Video:
+    __slots__ = ("video_id", "video_url", "title", "channel", "scrape_date")
+    
     def __init__(self, video_id, video_url, title=None, channel=None, scrape_date=None):
         self.video_id = video_id
         self.video_url = video_url
@@ -16,11 +23,18 @@ class Video:
         }
 
 class SuperThanks: 
+    # __slots__ 不建立每筆的 __dict__，大量留言時省下不少記憶體
+    __slots__ = (
+        "id", "video_id", "thread_id", "currency", "amount", "amount_twd",
+        "commenter_name", "comment_text", "comment_date", "scrape_date"
+    )
+    
     def __init__(self, video_id, currency, amount, amount_twd, 
                  commenter_name=None, comment_text=None, comment_date=None, 
-                 id=None, scrape_date=None):
+                 id=None, scrape_date=None, thread_id=None):
         self.id = id
         self.video_id = video_id
+        self.thread_id = thread_id
         self.currency = currency
         self.amount = amount
         self.amount_twd = amount_twd
@@ -33,6 +47,7 @@ class SuperThanks:
         return {
             "id": self.id,
             "video_id": self.video_id,
+            "thread_id": self.thread_id,
             "currency": self.currency,
             "amount": self.amount,
             "amount_twd": self.amount_twd,
@@ -43,6 +58,8 @@ class SuperThanks:
         }
 
 class CurrencyRate:
+    __slots__ = ("currency", "rate_to_twd", "last_updated")
+    
     def __init__(self, currency, rate_to_twd, last_updated=None):
         self.currency = currency
         self.rate_to_twd = rate_to_twd
@@ -54,4 +71,107 @@ class CurrencyRate:
             "currency": self.currency,
             "rate_to_twd": self.rate_to_twd,
             "last_updated": self.last_updated
-        }
\ No newline at end of file
+        }
+
+class SuperThanksBatch:
+    """欄式存放一批超級感謝：金額及時間存在 array('d')，貨幣代碼 intern 後共用同一個字串
+    
+    爬蟲解析、換算台幣、寫入資料庫都直接使用這個物件，不再為每筆留言建立 dict
+    """
+    __slots__ = (
+        "video_id", "thread_ids", "currencies", "amounts", "amounts_twd",
+        "commenter_names", "comment_texts", "comment_dates"
+    )
+    
+    def __init__(self, video_id=None):
+        self.video_id = video_id
+        self.thread_ids = []
+        self.currencies = []
+        self.amounts = array('d')
+        self.amounts_twd = array('d')
+        self.commenter_names = []
+        self.comment_texts = []
+        self.comment_dates = array('d')  # time.time() 的時間戳記
+    
+    @classmethod
+    def from_records(cls, records, video_id=None):
+        """由 dict 或 SuperThanks 建立 (舊的呼叫方式)"""
+        batch = cls(video_id)
+        for record in records:
+            if isinstance(record, SuperThanks):
+                record = record.to_dict()
+            comment_date = record.get("comment_date")
+            batch.append(
+                record["currency"],
+                record["amount"],
+                thread_id=record.get("thread_id"),
+                commenter_name=record.get("commenter_name", ""),
+                comment_text=record.get("comment_text", ""),
+                comment_date=comment_date.timestamp() if isinstance(comment_date, datetime) else comment_date,
+                amount_twd=record.get("amount_twd") or 0.0
+            )
+        return batch
+    
+    def append(self, currency, amount, thread_id=None, commenter_name="", comment_text="",
+               comment_date=None, amount_twd=0.0):
+        self.thread_ids.append(thread_id)
+        self.currencies.append(sys.intern(currency))
+        self.amounts.append(amount)
+        self.amounts_twd.append(amount_twd)
+        self.commenter_names.append(commenter_name)
+        self.comment_texts.append(comment_text)
+        self.comment_dates.append(comment_date if comment_date is not None else time.time())
+    
+    def extend(self, other):
+        self.thread_ids.extend(other.thread_ids)
+        self.currencies.extend(other.currencies)
+        self.amounts.extend(other.amounts)
+        self.amounts_twd.extend(other.amounts_twd)
+        self.commenter_names.extend(other.commenter_names)
+        self.comment_texts.extend(other.comment_texts)
+        self.comment_dates.extend(other.comment_dates)
+    
+    def __len__(self):
+        return len(self.amounts)
+    
+    def __iter__(self):
+        for i in range(len(self)):
+            yield SuperThanks(
+                self.video_id,
+                self.currencies[i],
+                self.amounts[i],
+                self.amounts_twd[i],
+                commenter_name=self.commenter_names[i],
+                comment_text=self.comment_texts[i],
+                comment_date=datetime.fromtimestamp(self.comment_dates[i]),
+                thread_id=self.thread_ids[i]
+            )
+    
+    def set_amounts_twd(self, amounts_twd):
+        """寫入整欄換算後的台幣金額 (例如 CurrencyRateTable.convert 的結果)"""
+        amounts_twd = array('d', amounts_twd)
+        if len(amounts_twd) != len(self):
+            raise ValueError(f"台幣金額數量 {len(amounts_twd)} 與資料筆數 {len(self)} 不同")
+        self.amounts_twd = amounts_twd
+    
+    def currency_totals(self):
+        """各貨幣的原幣總額"""
+        totals = {}
+        for currency, amount in zip(self.currencies, self.amounts):
+            totals[currency] = totals.get(currency, 0.0) + amount
+        return totals
+    
+    def rows(self, video_id=None):
+        """產生 save_super_thanks 的 INSERT 參數"""
+        video_id = video_id or self.video_id
+        for i in range(len(self)):
+            yield (
+                video_id,
+                self.thread_ids[i],
+                self.currencies[i],
+                self.amounts[i],
+                self.amounts_twd[i],
+                self.commenter_names[i],
+                self.comment_texts[i],
+                datetime.fromtimestamp(self.comment_dates[i])
+            )
\ No newline at end of file
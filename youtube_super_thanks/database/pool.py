@@ -0,0 +1,90 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from urllib.request import pathname2url
+from config import DATABASE_FILE, DATABASE_PRAGMAS, READ_POOL_SETTINGS
+
+def connect_read_only(database_file=None):
+    """以 mode=ro 開啟唯讀連線，可在不同執行緒間交給下一個使用者"""
+    path = os.path.abspath(database_file or DATABASE_FILE)
+    conn = sqlite3.connect(f"file:{pathname2url(path)}?mode=ro", uri=True, check_same_thread=False)
+    conn.execute(f"PRAGMA cache_size = {DATABASE_PRAGMAS['cache_size']}")
+    conn.execute("PRAGMA query_only = 1")
+    return conn
+
+class ReadConnectionPool:
+    """儀表板 callback 共用的唯讀連線池
+    
+    資料庫為 WAL 模式，唯讀連線讀取時不會擋住爬蟲寫入，也不會被寫入擋住
+    """
+    
+    def __init__(self, database_file=None, size=None, timeout=None):
+        self.database_file = database_file or DATABASE_FILE
+        self.size = size or READ_POOL_SETTINGS["size"]
+        self.timeout = timeout if timeout is not None else READ_POOL_SETTINGS["timeout"]
+        self.stats = {"opened": 0, "reused": 0}
+        self._idle = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.size)
+    
+    def acquire(self):
+        """取得一個閒置的連線，沒有閒置的就新開一個，全部使用中時最多等待 timeout 秒"""
+        if not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError(f"等待資料庫連線超過 {self.timeout} 秒")
+        
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+            if conn is not None:
+                self.stats["reused"] += 1
+        if conn is not None:
+            return conn
+        
+        try:
+            conn = connect_read_only(self.database_file)
+        except Exception:
+            self._slots.release()
+            raise
+        
+        with self._lock:
+            self.stats["opened"] += 1
+        return conn
+    
+    def release(self, conn):
+        try:
+            # 結束讀取交易，下次使用時才看得到新寫入的資料
+            if conn.in_transaction:
+                conn.rollback()
+            with self._lock:
+                self._idle.append(conn)
+        finally:
+            self._slots.release()
+    
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+    
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_read_pool():
+    """整個程序共用的唯讀連線池"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ReadConnectionPool()
+        return _pool
+
+def read_connection():
+    """從共用連線池借用一個唯讀連線: with read_connection() as conn: ..."""
+    return get_read_pool().connection()
\ No newline at end of file
@@ -0,0 +1,184 @@
+import csv
+from datetime import date
+import numpy as np
+
+class CurrencyRateTable:
+    """一次載入 currency_rates，之後從 dict 查詢匯率"""
+    
+    def __init__(self, conn, default_rate=1.0):
+        self.conn = conn
+        self.default_rate = default_rate
+        self._rates = None
+        self._data_version = None
+    
+    def load(self):
+        cursor = self.conn.execute('SELECT currency, rate_to_twd FROM currency_rates')
+        self._rates = dict(cursor.fetchall())
+        self._data_version = self._current_data_version()
+        return self._rates
+    
+    def _current_data_version(self):
+        return self.conn.execute('PRAGMA data_version').fetchone()[0]
+    
+    @property
+    def rates(self):
+        if self._rates is None:
+            self.load()
+        return self._rates
+    
+    def invalidate(self):
+        self._rates = None
+    
+    def refresh_if_changed(self):
+        """其他連線寫入過資料庫時重新載入"""
+        if self._rates is not None and self._current_data_version() != self._data_version:
+            self.invalidate()
+    
+    def get(self, currency):
+        return self.rates.get(currency, self.default_rate)
+    
+    def set_rate(self, currency, rate_to_twd):
+        """更新匯率並讓快取失效，同時記錄為今天起適用的匯率歷史"""
+        with self.conn:
+            self.conn.execute('''
+            INSERT OR REPLACE INTO currency_rates (currency, rate_to_twd, last_updated)
+            VALUES (?, ?, CURRENT_TIMESTAMP)
+            ''', (currency, rate_to_twd))
+            self.conn.execute('''
+            INSERT OR REPLACE INTO currency_rate_history (currency, effective_date, rate_to_twd, source)
+            VALUES (?, date('now'), ?, 'manual')
+            ''', (currency, rate_to_twd))
+        self.invalidate()
+    
+    def convert(self, currencies, amounts):
+        """整欄換算台幣：每種貨幣只查一次匯率，再一次相乘"""
+        self.refresh_if_changed()
+        
+        amounts = np.asarray(amounts, dtype=float)
+        if amounts.size == 0:
+            return amounts
+        
+        unique_currencies, inverse = np.unique(np.asarray(currencies, dtype=object), return_inverse=True)
+        unique_rates = np.array([self.get(currency) for currency in unique_currencies], dtype=float)
+        return amounts * unique_rates[inverse]
+
+class RateHistory:
+    """依日期換算台幣：每種貨幣的匯率歷史載入成排序好的陣列，用 searchsorted 找出當天適用的匯率"""
+    
+    def __init__(self, conn, fallback=None):
+        self.conn = conn
+        # 沒有歷史資料的貨幣改用目前匯率
+        self.fallback = fallback or CurrencyRateTable(conn)
+        self._history = None
+    
+    def load(self):
+        cursor = self.conn.execute('''
+        SELECT currency, effective_date, rate_to_twd FROM currency_rate_history
+        ORDER BY currency, effective_date
+        ''')
+        grouped = {}
+        for currency, effective_date, rate_to_twd in cursor:
+            dates, rates = grouped.setdefault(currency, ([], []))
+            dates.append(effective_date)
+            rates.append(rate_to_twd)
+        
+        self._history = {
+            currency: (np.array(dates, dtype='datetime64[D]'), np.array(rates, dtype=float))
+            for currency, (dates, rates) in grouped.items()
+        }
+        return self._history
+    
+    @property
+    def history(self):
+        if self._history is None:
+            self.load()
+        return self._history
+    
+    def convert(self, currencies, amounts, dates):
+        """整欄換算台幣，每筆使用 dates 當天 (或之前最近一次) 的匯率，比最早的歷史還早時用最早的匯率"""
+        amounts = np.asarray(amounts, dtype=float)
+        if amounts.size == 0:
+            return amounts
+        dates = np.asarray(dates, dtype='datetime64[D]')
+        
+        result = np.empty_like(amounts)
+        unique_currencies, inverse = np.unique(np.asarray(currencies, dtype=object), return_inverse=True)
+        for i, currency in enumerate(unique_currencies):
+            mask = inverse == i
+            if currency not in self.history:
+                result[mask] = amounts[mask] * self.fallback.get(currency)
+                continue
+            
+            history_dates, history_rates = self.history[currency]
+            index = np.searchsorted(history_dates, dates[mask], side="right") - 1
+            result[mask] = amounts[mask] * history_rates[np.maximum(index, 0)]
+        return result
+
+def load_rate_history_csv(conn, path, source=None):
+    """從 CSV (欄位: date, currency, rate_to_twd) 匯入匯率歷史，同一天同貨幣已有資料時覆蓋
+    
+    匯入後各貨幣的最新匯率也會更新到 currency_rates，之後的新抓取使用最新匯率，回傳匯入筆數
+    """
+    source = source or path
+    currencies = set()
+    
+    def read_rows():
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            for row in csv.DictReader(f):
+                currency = row["currency"].strip()
+                currencies.add(currency)
+                yield currency, date.fromisoformat(row["date"].strip()).isoformat(), float(row["rate_to_twd"]), source
+    
+    with conn:
+        cursor = conn.executemany('''
+        INSERT OR REPLACE INTO currency_rate_history (currency, effective_date, rate_to_twd, source)
+        VALUES (?, ?, ?, ?)
+        ''', read_rows())
+        count = cursor.rowcount
+        
+        conn.executemany('''
+        INSERT OR REPLACE INTO currency_rates (currency, rate_to_twd, last_updated)
+        SELECT currency, rate_to_twd, CURRENT_TIMESTAMP
+        FROM currency_rate_history
+        WHERE currency = ?
+        ORDER BY effective_date DESC
+        LIMIT 1
+        ''', ((currency,) for currency in currencies))
+    
+    print(f"已匯入 {count} 筆匯率歷史 ({len(currencies)} 種貨幣)")
+    return count
+
+def recompute_amount_twd(conn, chunk_size=50000, history=None):
+    """依抓取日期的匯率重新計算所有超級感謝的台幣金額
+    
+    依 id 分批讀取及更新，不會一次載入整個資料表，只更新金額有變動的資料 (統計表由觸發器同步)，回傳更新筆數
+    """
+    history = history or RateHistory(conn)
+    last_id = 0
+    updated = 0
+    
+    while True:
+        rows = conn.execute('''
+        SELECT id, currency, amount, date(scrape_date), amount_twd FROM super_thanks
+        WHERE id > ?
+        ORDER BY id
+        LIMIT ?
+        ''', (last_id, chunk_size)).fetchall()
+        if not rows:
+            break
+        
+        ids, currencies, amounts, dates, amounts_twd = zip(*rows)
+        new_amounts_twd = history.convert(currencies, amounts, dates)
+        changed = np.flatnonzero(~np.isclose(new_amounts_twd, np.asarray(amounts_twd, dtype=float)))
+        
+        with conn:
+            conn.executemany(
+                'UPDATE super_thanks SET amount_twd = ? WHERE id = ?',
+                ((float(new_amounts_twd[i]), ids[i]) for i in changed)
+            )
+        
+        updated += len(changed)
+        last_id = ids[-1]
+        print(f"已處理到 ID {last_id}，更新 {updated} 筆")
+    
+    return updated
\ No newline at end of file
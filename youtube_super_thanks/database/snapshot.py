@@ -0,0 +1,196 @@
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+from config import SNAPSHOT_SETTINGS
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+    from pyarrow.fs import LocalFileSystem
+except ImportError:
+    pa = None
+
+# 分析用的欄式快照：videos / currency_rates 每次整個重寫，super_thanks 依頻道及抓取月份分割並只附加新資料
+STATE_FILE = "_state.json"
+FILE_EXTENSIONS = {"arrow": "arrow", "parquet": "parquet"}
+
+def _super_thanks_schema():
+    return pa.schema([
+        ("id", pa.int64()),
+        ("video_id", pa.string()),
+        ("thread_id", pa.string()),
+        ("currency", pa.string()),
+        ("amount", pa.float64()),
+        ("amount_twd", pa.float64()),
+        ("commenter_name", pa.string()),
+        ("comment_text", pa.string()),
+        ("comment_date", pa.string()),
+        ("scrape_date", pa.string()),
+        ("channel", pa.string()),
+        ("scrape_month", pa.string()),
+    ])
+
+def _partitioning():
+    return ds.partitioning(
+        pa.schema([("channel", pa.string()), ("scrape_month", pa.string())]),
+        flavor="hive"
+    )
+
+def _dataset_format(fmt):
+    return "ipc" if fmt == "arrow" else "parquet"
+
+def _table_digest(conn, sql):
+    """查詢結果的雜湊，用來發現沒有新增資料列、只改了內容的小資料表"""
+    digest = hashlib.sha1()
+    for row in conn.execute(sql):
+        digest.update(repr(row).encode("utf-8"))
+    return digest.hexdigest()
+
+def get_channels_digest(conn):
+    """各影片的頻道，super_thanks 快照依頻道分割，頻道改名後已匯出的分割就過時了"""
+    return _table_digest(conn, 'SELECT video_id, channel FROM videos ORDER BY video_id')
+
+def get_data_signature(conn):
+    """判斷快照是否還是最新的：最後一筆 ID、總筆數、總金額 (統計表)，以及 videos / currency_rates 的內容雜湊
+    
+    save_video_info 改標題或頻道、匯率更新都不會新增超級感謝，只看筆數會以為快照還是最新的
+    """
+    max_id = conn.execute('SELECT MAX(id) FROM super_thanks').fetchone()[0] or 0
+    total_count, total_twd = conn.execute(
+        'SELECT SUM(super_thanks_count), SUM(total_twd) FROM currency_stats'
+    ).fetchone()
+    videos = _table_digest(conn, 'SELECT * FROM videos ORDER BY video_id')
+    currency_rates = _table_digest(conn, 'SELECT * FROM currency_rates ORDER BY currency')
+    return [max_id, total_count or 0, round(total_twd or 0, 2), videos, currency_rates]
+
+def get_exported_totals(conn, last_id):
+    """已匯出範圍 (id <= last_id) 目前的筆數及台幣總額，用來發現匯出後被修改或刪除的資料"""
+    count, total_twd = conn.execute(
+        'SELECT COUNT(*), SUM(amount_twd) FROM super_thanks WHERE id <= ?', (last_id,)
+    ).fetchone()
+    return [count, round(total_twd or 0, 2)]
+
+def load_state(directory=None):
+    path = os.path.join(directory or SNAPSHOT_SETTINGS["dir"], STATE_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def _write_table(table, path, fmt):
+    if fmt == "arrow":
+        # 不壓縮，讀取時才能直接 memory-map
+        feather.write_feather(table, path, compression="uncompressed")
+    else:
+        pq.write_table(table, path)
+
+def _export_table(conn, name, directory, fmt):
+    cursor = conn.execute(f'SELECT * FROM {name}')
+    columns = [description[0] for description in cursor.description]
+    rows = cursor.fetchall()
+    table = pa.table({column: [row[i] for row in rows] for i, column in enumerate(columns)})
+    _write_table(table, os.path.join(directory, f"{name}.{FILE_EXTENSIONS[fmt]}"), fmt)
+
+def export_snapshot(conn, directory=None, fmt=None, full=False, chunk_size=100000):
+    """匯出快照，預設只附加上次匯出後新增的超級感謝，full=True 時整個重建，回傳新增筆數
+    
+    已匯出的資料之後被改過 (例如 recompute_amount_twd 重新換算台幣) 時自動整個重建
+    """
+    if pa is None:
+        raise ImportError("匯出快照需要 pyarrow: pip install pyarrow")
+    
+    directory = directory or SNAPSHOT_SETTINGS["dir"]
+    fmt = fmt or SNAPSHOT_SETTINGS["format"]
+    if fmt not in FILE_EXTENSIONS:
+        raise ValueError(f"未知的快照格式: {fmt}")
+    
+    state = load_state(directory)
+    if not full and state is not None and state.get("exported") != get_exported_totals(conn, state["last_id"]):
+        print("已匯出的超級感謝在匯出後有變動，重新匯出完整快照")
+        full = True
+    elif not full and state is not None and state.get("channels") != get_channels_digest(conn):
+        print("影片的頻道有變動，重新匯出完整快照")
+        full = True
+    if full or state is None or state.get("format") != fmt:
+        # 格式改變或要求重建時清掉舊快照
+        shutil.rmtree(directory, ignore_errors=True)
+        state = {"format": fmt, "last_id": 0}
+    os.makedirs(directory, exist_ok=True)
+    
+    _export_table(conn, "videos", directory, fmt)
+    _export_table(conn, "currency_rates", directory, fmt)
+    
+    schema = _super_thanks_schema()
+    cursor = conn.execute('''
+    SELECT s.id, s.video_id, s.thread_id, s.currency, s.amount, s.amount_twd,
+           s.commenter_name, s.comment_text, s.comment_date, s.scrape_date,
+           v.channel, strftime('%Y-%m', s.scrape_date) AS scrape_month
+    FROM super_thanks s
+    LEFT JOIN videos v ON s.video_id = v.video_id
+    WHERE s.id > ?
+    ORDER BY s.id
+    ''', (state["last_id"],))
+    
+    exported = 0
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        
+        table = pa.table([[row[i] for row in rows] for i in range(len(schema))], schema=schema)
+        # 每批用第一筆 ID 當檔名，附加時不會覆蓋之前的檔案
+        ds.write_dataset(
+            table,
+            os.path.join(directory, "super_thanks"),
+            format=_dataset_format(fmt),
+            partitioning=_partitioning(),
+            basename_template=f"part-{rows[0][0]}-{{i}}.{FILE_EXTENSIONS[fmt]}",
+            existing_data_behavior="overwrite_or_ignore"
+        )
+        exported += len(rows)
+        state["last_id"] = rows[-1][0]
+    
+    state["exported"] = get_exported_totals(conn, state["last_id"])
+    state["channels"] = get_channels_digest(conn)
+    state["signature"] = get_data_signature(conn)
+    state["exported_at"] = datetime.now().isoformat(timespec="seconds")
+    with open(os.path.join(directory, STATE_FILE), "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    
+    print(f"快照已匯出到 {directory} ({fmt})，新增 {exported} 筆超級感謝")
+    return exported
+
+def snapshot_is_current(conn, directory=None):
+    """有快照且與資料庫內容一致時回傳 True"""
+    if pa is None:
+        return False
+    state = load_state(directory)
+    return bool(state) and state.get("signature") == get_data_signature(conn)
+
+def read_snapshot_table(name, directory=None):
+    """讀取 videos / currency_rates，Arrow 格式時以 memory-map 開啟"""
+    state = load_state(directory)
+    path = os.path.join(directory or SNAPSHOT_SETTINGS["dir"], f"{name}.{FILE_EXTENSIONS[state['format']]}")
+    if state["format"] == "arrow":
+        return feather.read_table(path, memory_map=True)
+    return pq.read_table(path)
+
+def load_video_super_thanks(video_id, columns=None, directory=None):
+    """從快照讀取一部影片的超級感謝 (只讀需要的欄位)"""
+    dataset = super_thanks_dataset(directory)
+    return dataset.to_table(columns=columns, filter=ds.field("video_id") == video_id).to_pandas()
+
+def super_thanks_dataset(directory=None):
+    """super_thanks 的分割資料集，Arrow 格式時以 memory-map 讀取"""
+    directory = directory or SNAPSHOT_SETTINGS["dir"]
+    state = load_state(directory)
+    return ds.dataset(
+        os.path.join(directory, "super_thanks"),
+        format=_dataset_format(state["format"]),
+        partitioning=_partitioning(),
+        filesystem=LocalFileSystem(use_mmap=True)
+    )
\ No newline at end of file
@@ -1,32 +1,81 @@
 from datetime import datetime
 from database.db_init import init_database
 from database.db_queries import query_database
+from database.rates import load_rate_history_csv, recompute_amount_twd
+from database.snapshot import export_snapshot
 from scraper.scraper import scrape_super_thanks
+from scraper.batch import scrape_batch_file, refresh_saved_videos
+from scraper.parser import normalize_video_url
+from scraper.browser import BrowserPool
 
 def main_menu():
+    # 整個選單共用瀏覽器，連續抓取時不必每次重開
+    pool = BrowserPool()
+    
+    try:
+        _menu_loop(pool)
+    finally:
+        pool.print_stats()
+        pool.close()
+
+def ask_workers():
+    """詢問同時開啟的瀏覽器數量，直接 Enter 回傳 None (使用預設值)，輸入錯誤時重新詢問"""
+    while True:
+        workers = input("同時開啟的瀏覽器數量 (直接 Enter 使用預設值): ").strip()
+        if not workers:
+            return None
+        if workers.isdigit() and int(workers) > 0:
+            return int(workers)
+        print("無效的數量請重試")
+
+def _menu_loop(pool):
     while True:
         print("\n=== YouTube 超級感謝抓取工具 ===")
         print("1. 抓取新影片")
         print("2. 查詢資料庫")
+        print("3. 批次抓取影片清單")
+        print("4. 增量更新已抓取的影片")
+        print("5. 匯出分析快照")
+        print("6. 匯入匯率歷史並重新換算台幣")
         print("0. 退出")
         
-        choice = input("請選擇操作 (0-2): ")
+        choice = input("請選擇操作 (0-6): ")
         
         if choice == "0":
             print("謝謝使用，再見!")
             break
         elif choice == "1":
             video_input = input("輸入YouTube影片URL或ID: ")
-            
-            if "youtube.com" in video_input or "youtu.be" in video_input:
-                video_url = video_input
-            else:
-                video_url = f"https://www.youtube.com/watch?v={video_input}"
+            video_url = normalize_video_url(video_input)
             
             # 開始抓取
-            scrape_super_thanks(video_url)
+            scrape_super_thanks(video_url, pool)
         elif choice == "2":
             query_database()
+        elif choice == "3":
+            list_path = input("輸入影片清單檔案路徑: ")
+            scrape_batch_file(list_path, ask_workers())
+        elif choice == "4":
+            refresh_saved_videos(ask_workers())
+        elif choice == "5":
+            full = input("重新建立整個快照? (y/N): ").strip().lower() == "y"
+            conn = init_database()
+            try:
+                export_snapshot(conn, full=full)
+            except ImportError as e:
+                print(str(e))
+            finally:
+                conn.close()
+        elif choice == "6":
+            refresh = input("先以 config 的預設匯率更新目前匯率? (y/N): ").strip().lower() == "y"
+            csv_path = input("匯率歷史 CSV 路徑 (直接 Enter 只重新換算): ").strip()
+            conn = init_database(refresh_rates=refresh)
+            try:
+                if csv_path:
+                    load_rate_history_csv(conn, csv_path)
+                print(f"共更新 {recompute_amount_twd(conn)} 筆台幣金額")
+            finally:
+                conn.close()
         else:
             print("無效的選擇請重試")
 
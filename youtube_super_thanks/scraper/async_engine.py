@@ -0,0 +1,240 @@
+import asyncio
+import queue
+import threading
+import time
+from datetime import datetime
+from config import ASYNC_SETTINGS, BROWSER_SETTINGS, SCROLL_SETTINGS, STREAMING_SETTINGS, CSS_SELECTORS
+from database.db_init import init_database
+from database.models import SuperThanksBatch
+from scraper.batch import STOP, db_writer, load_resume_state
+from scraper.browser import (
+    COUNT_THREADS_SCRIPT, FIRST_THREAD_CHANGED_SCRIPT, MARK_FIRST_THREAD_SCRIPT, print_latency_summary
+)
+from scraper.extractor import EXTRACT_NEW_THREADS_SCRIPT
+from scraper.parser import extract_video_id
+from scraper.scraper import build_super_thanks_items, reached_known_threads, update_progress
+from utils.timing import record_stage, stage, start_timer, use_timer
+
+try:
+    from playwright.async_api import async_playwright
+except ImportError:
+    async_playwright = None
+
+def _wrap_script(script):
+    return "(args) => (function () {" + script + "}).apply(null, args)"
+
+async def evaluate(page, script, *args):
+    """執行 Selenium 風格 (用 arguments 取參數) 的腳本，兩種引擎共用同一份 JS"""
+    return await page.evaluate(_wrap_script(script), list(args))
+
+async def wait_for_script(page, script, *args, timeout=15):
+    """等到腳本回傳 true，逾時丟出 playwright 的 TimeoutError"""
+    await page.wait_for_function(
+        _wrap_script(script), arg=list(args), timeout=timeout * 1000,
+        polling=SCROLL_SETTINGS["poll_interval"] * 1000
+    )
+
+async def get_video_info(page, video_id, video_url):
+    try:
+        title_element = await page.wait_for_selector(CSS_SELECTORS["video_title"], timeout=15000)
+        title = await title_element.get_attribute("title") or await title_element.inner_text()
+        channel = await page.inner_text(CSS_SELECTORS["channel_name"])
+    except Exception as e:
+        print(f"error: {str(e)}")
+        title, channel = "沒找到", "沒找到"
+    
+    print(f"影片資訊 - 標題: {title}, 頻道: {channel}")
+    return {
+        "video_id": video_id,
+        "video_url": video_url,
+        "title": title,
+        "channel": channel
+    }
+
+async def sort_comments_by_newest(page, timeout=15):
+    """把留言排序切換成「由新到舊」"""
+    try:
+        # 留言區要捲到畫面中才會載入排序選單
+        await page.evaluate("window.scrollTo(0, 600)")
+        await page.click(CSS_SELECTORS["sort_menu"], timeout=timeout * 1000)
+        
+        # 第二個選項是「由新到舊」，等到第一則評論串換掉才開始抽取
+        await evaluate(page, MARK_FIRST_THREAD_SCRIPT, CSS_SELECTORS["comments"])
+        await page.locator(CSS_SELECTORS["sort_menu_items"]).nth(1).click(timeout=timeout * 1000)
+        await wait_for_script(page, FIRST_THREAD_CHANGED_SCRIPT, CSS_SELECTORS["comments"], timeout=timeout)
+        print("留言已改為由新到舊排序")
+        return True
+    except Exception as e:
+        print(f"sort error: {str(e)}")
+        return False
+
+async def wait_for_new_comments(page, previous_count):
+    """等待新的評論串出現，等待期間讓出事件迴圈給其他分頁，回傳 (評論數, 等待秒數)"""
+    start = time.perf_counter()
+    while True:
+        count = await evaluate(page, COUNT_THREADS_SCRIPT, CSS_SELECTORS["comments"])
+        latency = time.perf_counter() - start
+        if count > previous_count or latency >= SCROLL_SETTINGS["scroll_timeout"]:
+            return count, latency
+        await asyncio.sleep(SCROLL_SETTINGS["poll_interval"])
+
+async def scroll_to_load_comments(page, on_scroll):
+    """與 browser.scroll_to_load_comments 相同的停止條件，on_scroll(scroll_index) 回傳 True 時停止"""
+    max_scrolls = SCROLL_SETTINGS["max_scrolls"]
+    no_change_threshold = SCROLL_SETTINGS["no_change_threshold"]
+    
+    last_height = await page.evaluate("document.documentElement.scrollHeight")
+    comments_count = 0
+    no_change_count = 0
+    latencies = []
+    
+    for i in range(max_scrolls):
+        await page.evaluate("window.scrollTo(0, document.documentElement.scrollHeight)")
+        current_comments, latency = await wait_for_new_comments(page, comments_count)
+        latencies.append(latency)
+        record_stage("scroll_wait", latency)
+        new_height = await page.evaluate("document.documentElement.scrollHeight")
+        
+        if current_comments > comments_count:
+            comments_count = current_comments
+            no_change_count = 0
+        else:
+            no_change_count += 1
+        
+        if await on_scroll(i):
+            print(f"滾動 {i+1}/{max_scrolls} - 提前停止")
+            break
+        
+        if new_height == last_height and no_change_count > no_change_threshold:
+            break
+        
+        last_height = new_height
+    
+    print_latency_summary(latencies)
+    return comments_count
+
+async def fetch_super_thanks(page, video_url, result_queue, known_thread_ids=None, incremental=False):
+    """抓取一部影片，每次滾動後就把新的超級感謝交給寫入者，回傳找到的評論串數量"""
+    with stage("navigation"):
+        await page.goto(video_url, wait_until="domcontentloaded", timeout=ASYNC_SETTINGS["page_timeout"] * 1000)
+    print(f"正在加載: {video_url}")
+    
+    with stage("video_info"):
+        video_info = await get_video_info(page, extract_video_id(video_url), video_url)
+    
+    if incremental:
+        incremental = await sort_comments_by_newest(page)
+    
+    streaming = STREAMING_SETTINGS["enabled"]
+    super_thanks_data = SuperThanksBatch()
+    found_count = 0
+    progress = {"scroll_count": 0, "threads_found": 0, "seen_thread_ids": []}
+    
+    async def extract_new_items(scroll_index=None):
+        nonlocal found_count
+        with stage("extraction"):
+            records = await evaluate(
+                page,
+                EXTRACT_NEW_THREADS_SCRIPT,
+                CSS_SELECTORS["comments"],
+                CSS_SELECTORS["super_thanks"],
+                CSS_SELECTORS["commenter_name"],
+                CSS_SELECTORS["thread_comment_text"],
+                CSS_SELECTORS["pinned_badge"],
+                STREAMING_SETTINGS["prune_dom"]
+            )
+        items = build_super_thanks_items(records, found_count, known_thread_ids)
+        found_count += len(records)
+        update_progress(progress, records, found_count, scroll_index)
+        
+        # 寫入在另一個執行緒進行，這裡放進佇列後就繼續滾動
+        if streaming:
+            result_queue.put(("items", video_info, items, dict(progress)))
+        super_thanks_data.extend(items)
+        
+        return incremental and reached_known_threads(records, known_thread_ids)
+    
+    if not await extract_new_items():
+        await scroll_to_load_comments(page, extract_new_items)
+        await extract_new_items()
+    
+    result_queue.put(("done", video_info, super_thanks_data, found_count))
+    return found_count
+
+async def _scrape_video(browser, video_url, result_queue, semaphore, incremental, timers):
+    """每部影片使用獨立的 context (分頁)，同時進行的數量由 semaphore 限制"""
+    async with semaphore:
+        video_id = extract_video_id(video_url)
+        timer = start_timer(video_id, "async")
+        timers[video_id] = timer
+        context = None
+        try:
+            # 查詢已存過的留言或開分頁失敗也只算這部影片失敗，不能讓例外中斷整個 gather
+            known_thread_ids, video_incremental = await asyncio.to_thread(load_resume_state, video_id, incremental)
+            context = await browser.new_context()
+            # 每個 task 有自己的 context 變數，各影片的計時不會混在一起
+            with use_timer(timer):
+                page = await context.new_page()
+                await fetch_super_thanks(page, video_url, result_queue, known_thread_ids, video_incremental)
+        except Exception as e:
+            print(f"[async] error: {video_url} - {str(e)}")
+            result_queue.put(("failed", video_url, e))
+        finally:
+            if context is not None:
+                await context.close()
+
+async def _scrape_all(video_urls, result_queue, concurrency, incremental, timers):
+    args = []
+    if BROWSER_SETTINGS["disable_images"]:
+        args.append("--blink-settings=imagesEnabled=false")
+    if BROWSER_SETTINGS["disable_notifications"]:
+        args.append("--disable-notifications")
+    if BROWSER_SETTINGS["disable_extensions"]:
+        args.append("--disable-extensions")
+    
+    semaphore = asyncio.Semaphore(concurrency)
+    async with async_playwright() as playwright:
+        browser = await playwright.chromium.launch(headless=BROWSER_SETTINGS["headless"], args=args)
+        try:
+            await asyncio.gather(*(
+                _scrape_video(browser, video_url, result_queue, semaphore, incremental, timers)
+                for video_url in video_urls
+            ))
+        finally:
+            await browser.close()
+
+def run_async_batch(video_urls, concurrency=None, incremental=False):
+    """用一個瀏覽器的多個分頁同時抓取多部影片，資料庫寫入沿用批次抓取的寫入者執行緒"""
+    if async_playwright is None:
+        raise ImportError("非同步引擎需要 playwright: pip install playwright && playwright install chromium")
+    
+    if concurrency is None:
+        concurrency = ASYNC_SETTINGS["concurrency"]
+    concurrency = max(1, min(concurrency, len(video_urls)))
+    
+    start_time = datetime.now()
+    result_queue = queue.Queue()
+    stats = {"done": 0, "failed": 0}
+    timers = {}
+    
+    # 先建立資料表，開始抓取前就能查詢已存過的留言
+    init_database().close()
+    
+    writer = threading.Thread(target=db_writer, args=(result_queue, stats, timers))
+    writer.start()
+    
+    try:
+        asyncio.run(_scrape_all(video_urls, result_queue, concurrency, incremental, timers))
+    finally:
+        result_queue.put(STOP)
+        writer.join()
+    
+    elapsed = (datetime.now() - start_time).total_seconds()
+    videos_per_hour = stats["done"] / elapsed * 3600 if elapsed > 0 else 0
+    
+    print("\n=== ASYNC BATCH RESULTS ===")
+    print(f"同時處理: {concurrency}")
+    print(f"成功: {stats['done']}, 失敗: {stats['failed']}")
+    print(f"耗時: {elapsed:.1f}s, 速度: {videos_per_hour:.1f} 部影片/小時")
+    
+    return stats
\ No newline at end of file
@@ -0,0 +1,193 @@
+import queue
+import threading
+from datetime import datetime
+from config import BATCH_SETTINGS, EXTRACTION_SETTINGS, STREAMING_SETTINGS
+from database.db_init import init_database, get_db_connection
+from database.db_queries import get_saved_thread_ids, get_video_urls, save_checkpoint
+from database.rates import CurrencyRateTable
+from scraper.browser import BrowserPool
+from scraper.parser import normalize_video_url, extract_video_id
+from scraper.scraper import fetch_video, finish_run, persist_super_thanks, resume_from_checkpoint, store_super_thanks
+from utils.timing import profile_run, start_timer, use_timer
+
+# 佇列的結束訊號，threading 及 async 引擎共用
+STOP = None
+
+def read_video_list(path):
+    """讀取影片清單檔案，每行一個影片ID或網址，# 開頭為註解"""
+    video_urls = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                video_urls.append(normalize_video_url(line))
+    return video_urls
+
+def load_resume_state(video_id, incremental=False):
+    """用自己的連線查詢已存過的留言及上次的檢查點並把檢查點歸零 (在 worker 執行緒中呼叫)，回傳 (已存過的留言, 是否增量更新)"""
+    conn = get_db_connection()
+    try:
+        return get_saved_thread_ids(conn, video_id), resume_from_checkpoint(conn, video_id, incremental)
+    finally:
+        conn.close()
+
+def _scrape_worker(worker_id, pool, task_queue, result_queue, incremental, timers):
+    """每個 worker 從瀏覽器池借用瀏覽器處理多部影片，timers 與寫入者共用以記錄各階段耗時"""
+    on_items = None
+    if STREAMING_SETTINGS["enabled"]:
+        on_items = lambda video_info, items, progress: result_queue.put(("items", video_info, items, progress))
+    
+    while True:
+        video_url = task_queue.get()
+        if video_url is STOP:
+            break
+        
+        video_id = extract_video_id(video_url)
+        timer = start_timer(video_id, EXTRACTION_SETTINGS["engine"])
+        timers[video_id] = timer
+        try:
+            with use_timer(timer), profile_run(video_id):
+                known_thread_ids, video_incremental = load_resume_state(video_id, incremental)
+                result = fetch_video(pool, video_url, on_items, known_thread_ids, video_incremental)
+            result_queue.put(("done",) + result)
+        except Exception as e:
+            print(f"[worker {worker_id}] error: {video_url} - {str(e)}")
+            result_queue.put(("failed", video_url, e))
+
+def db_writer(result_queue, stats, timers):
+    """唯一的資料庫寫入者，依序儲存各 worker 的結果，影片完成或失敗時儲存計時紀錄
+    
+    串流批次寫入失敗時先保留，寫入同一部影片的下一批或完成時再重試，到完成時仍未寫入就把影片記錄為失敗
+    """
+    conn = init_database()
+    rates = CurrencyRateTable(conn)
+    streaming = STREAMING_SETTINGS["enabled"]
+    pending = {}  # {video_id: [(video_info, items, progress), ...]} 尚未寫入的串流批次
+    try:
+        while True:
+            result = result_queue.get()
+            if result is STOP:
+                break
+            
+            kind = result[0]
+            if kind == "failed":
+                video_id = extract_video_id(result[1])
+                pending.pop(video_id, None)
+                save_checkpoint(conn, video_id, "failed")
+                finish_run(conn, timers.pop(video_id, None), "failed")
+                stats["failed"] += 1
+                continue
+            
+            video_id = result[1]["video_id"]
+            status = "failed"
+            try:
+                with use_timer(timers.get(video_id)):
+                    # 依原本的順序補寫之前失敗的批次
+                    while pending.get(video_id):
+                        video_info, items, progress = pending[video_id][0]
+                        persist_super_thanks(conn, video_info, items, rates, progress)
+                        pending[video_id].pop(0)
+                    
+                    if kind == "items":
+                        # 串流模式：影片還在滾動中，先寫入這一批
+                        persist_super_thanks(conn, result[1], result[2], rates, result[3])
+                    else:
+                        store_super_thanks(conn, *result[1:], rates=rates, persisted=streaming)
+                        stats["done"] += 1
+                status = "done"
+            except Exception as e:
+                print(f"[writer] error: {str(e)}")
+                if kind == "items":
+                    pending.setdefault(video_id, []).append(result[1:])
+            
+            if kind == "done":
+                if status == "failed":
+                    pending.pop(video_id, None)
+                    conn.rollback()
+                    save_checkpoint(conn, video_id, "failed")
+                    stats["failed"] += 1
+                finish_run(conn, timers.pop(video_id, None), status)
+    finally:
+        conn.close()
+
+def run_batch(video_urls, workers=None, pool=None, incremental=False):
+    """用多個瀏覽器同時抓取多部影片，incremental=True 時只抓新的超級感謝"""
+    if BATCH_SETTINGS["engine"] == "async":
+        # 非同步引擎會用到本模組的寫入者，放在這裡匯入避免循環匯入
+        from scraper.async_engine import run_async_batch
+        return run_async_batch(video_urls, workers, incremental)
+    
+    if workers is None:
+        workers = BATCH_SETTINGS["workers"]
+    workers = max(1, min(workers, len(video_urls)))
+    
+    owns_pool = pool is None
+    if owns_pool:
+        pool = BrowserPool(size=workers)
+    
+    start_time = datetime.now()
+    task_queue = queue.Queue()
+    result_queue = queue.Queue()
+    stats = {"done": 0, "failed": 0}
+    timers = {}
+    
+    for video_url in video_urls:
+        task_queue.put(video_url)
+    for _ in range(workers):
+        task_queue.put(STOP)
+    
+    # 先建立資料表，worker 開始前就能查詢已存過的留言
+    init_database().close()
+    
+    writer = threading.Thread(target=db_writer, args=(result_queue, stats, timers))
+    writer.start()
+    
+    threads = [
+        threading.Thread(target=_scrape_worker, args=(i + 1, pool, task_queue, result_queue, incremental, timers))
+        for i in range(workers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    if owns_pool:
+        pool.close()
+    
+    result_queue.put(STOP)
+    writer.join()
+    
+    elapsed = (datetime.now() - start_time).total_seconds()
+    videos_per_hour = stats["done"] / elapsed * 3600 if elapsed > 0 else 0
+    
+    print("\n=== BATCH RESULTS ===")
+    print(f"Workers: {workers}")
+    print(f"成功: {stats['done']}, 失敗: {stats['failed']}")
+    print(f"耗時: {elapsed:.1f}s, 速度: {videos_per_hour:.1f} 部影片/小時")
+    pool.print_stats()
+    
+    return stats
+
+def scrape_batch_file(path, workers=None, pool=None):
+    video_urls = read_video_list(path)
+    if not video_urls:
+        print("清單中沒有影片")
+        return
+    
+    print(f"共 {len(video_urls)} 部影片")
+    return run_batch(video_urls, workers, pool)
+
+def refresh_saved_videos(workers=None, pool=None):
+    """增量更新資料庫中所有影片"""
+    conn = init_database()
+    try:
+        video_urls = get_video_urls(conn)
+    finally:
+        conn.close()
+    
+    if not video_urls:
+        print("資料庫中沒有影片")
+        return
+    
+    print(f"增量更新 {len(video_urls)} 部影片")
+    return run_batch(video_urls, workers, pool, incremental=True)
\ No newline at end of file
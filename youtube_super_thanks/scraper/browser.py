@@ -1,11 +1,39 @@
 import time
+import threading
+from contextlib import contextmanager
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 
-from config import BROWSER_SETTINGS, SCROLL_SETTINGS, CSS_SELECTORS
+from config import BROWSER_SETTINGS, BROWSER_POOL_SETTINGS, SCROLL_SETTINGS, CSS_SELECTORS
+from utils.timing import stage, record_stage
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# 已載入的評論串數量 (包含串流模式已從 DOM 移除的)，非同步引擎也共用
+COUNT_THREADS_SCRIPT = "return document.querySelectorAll(arguments[0]).length + (window.__stPrunedThreads || 0);"
+
+# 切換排序前記下第一則評論串，之後用來判斷留言是否已依新排序重新載入
+MARK_FIRST_THREAD_SCRIPT = """
+const thread = document.querySelector(arguments[0]);
+const link = thread && thread.querySelector('#published-time-text a');
+window.__stSortAnchor = {node: thread, href: link ? link.getAttribute('href') : null};
+"""
+
+FIRST_THREAD_CHANGED_SCRIPT = """
+const anchor = window.__stSortAnchor || {node: null, href: null};
+const thread = document.querySelector(arguments[0]);
+if (!thread) {
+    return false;
+}
+const link = thread.querySelector('#published-time-text a');
+return thread !== anchor.node || (link ? link.getAttribute('href') : null) !== anchor.href;
+"""
 
 def setup_browser():
     """瀏覽器選項設置"""
@@ -27,6 +55,128 @@ def setup_browser():
     
     return webdriver.Chrome(options=options)
 
+_warned_no_psutil = False
+
+def warn_missing_psutil(max_rss_mb):
+    """設定了記憶體上限卻沒有 psutil 時提醒一次 (之後只依頁數重開)"""
+    global _warned_no_psutil
+    if psutil is None and max_rss_mb and not _warned_no_psutil:
+        _warned_no_psutil = True
+        print(f"警告: 沒有安裝 psutil，max_rss_mb={max_rss_mb} 不會生效 (pip install psutil)")
+
+def get_browser_rss_mb(driver):
+    """瀏覽器 (chromedriver 及其子程序) 佔用的記憶體 MB，沒有 psutil 時回傳 None"""
+    if psutil is None:
+        return None
+    
+    try:
+        process = psutil.Process(driver.service.process.pid)
+        processes = [process] + process.children(recursive=True)
+        return sum(p.memory_info().rss for p in processes) / (1024 * 1024)
+    except Exception:
+        return None
+
+def is_browser_alive(driver):
+    """健康檢查：瀏覽器是否還能執行指令"""
+    try:
+        return driver.execute_script("return 1;") == 1
+    except Exception:
+        return False
+
+class BrowserPool:
+    """可重複使用的瀏覽器池，超過頁數或記憶體上限時自動重開"""
+    
+    def __init__(self, size=1, max_pages=None, max_rss_mb=None):
+        self.size = size
+        self.max_pages = max_pages if max_pages is not None else BROWSER_POOL_SETTINGS["max_pages"]
+        self.max_rss_mb = max_rss_mb if max_rss_mb is not None else BROWSER_POOL_SETTINGS["max_rss_mb"]
+        self.stats = {"cold_starts": 0, "reused": 0, "recycled": 0}
+        warn_missing_psutil(self.max_rss_mb)
+        self._idle = []
+        self._pages = {}
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+    
+    def acquire(self):
+        """取得一個可用的瀏覽器，沒有閒置的就新開一個"""
+        self._slots.acquire()
+        while True:
+            with self._lock:
+                driver = self._idle.pop() if self._idle else None
+            
+            if driver is None:
+                break
+            
+            if is_browser_alive(driver):
+                with self._lock:
+                    self.stats["reused"] += 1
+                return driver
+            
+            self._discard(driver)
+        
+        try:
+            with stage("browser_launch"):
+                driver = setup_browser()
+        except Exception:
+            self._slots.release()
+            raise
+        
+        with self._lock:
+            self.stats["cold_starts"] += 1
+            self._pages[id(driver)] = 0
+        return driver
+    
+    def release(self, driver):
+        """歸還瀏覽器，達到上限就關閉，否則清空頁面留待下次使用"""
+        try:
+            with self._lock:
+                self._pages[id(driver)] = self._pages.get(id(driver), 0) + 1
+                pages = self._pages[id(driver)]
+            
+            rss_mb = get_browser_rss_mb(driver)
+            if pages >= self.max_pages or (rss_mb is not None and rss_mb >= self.max_rss_mb):
+                with self._lock:
+                    self.stats["recycled"] += 1
+                self._discard(driver)
+                return
+            
+            try:
+                driver.get("about:blank")
+            except Exception:
+                self._discard(driver)
+                return
+            
+            with self._lock:
+                self._idle.append(driver)
+        finally:
+            self._slots.release()
+    
+    @contextmanager
+    def session(self):
+        driver = self.acquire()
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+    
+    def _discard(self, driver):
+        with self._lock:
+            self._pages.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+    
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for driver in idle:
+            self._discard(driver)
+    
+    def print_stats(self):
+        print(f"瀏覽器池 - 冷啟動: {self.stats['cold_starts']}, 重複使用: {self.stats['reused']}, "
+              f"回收: {self.stats['recycled']}")
+
 def get_video_info(driver, video_id, video_url):
     """取影片標題和頻道名稱"""
     try:
@@ -67,47 +217,131 @@ def get_video_info(driver, video_id, video_url):
             "channel": "沒找到"
         }
 
-def scroll_to_load_comments(driver, max_scrolls=None):
-    """加載評論"""
+def sort_comments_by_newest(driver, timeout=15):
+    """把留言排序切換成「由新到舊」"""
+    try:
+        # 留言區要捲到畫面中才會載入排序選單
+        driver.execute_script("window.scrollTo(0, 600);")
+        trigger = WebDriverWait(driver, timeout).until(
+            EC.element_to_be_clickable((By.CSS_SELECTOR, CSS_SELECTORS["sort_menu"]))
+        )
+        trigger.click()
+        
+        menu_items = WebDriverWait(driver, timeout).until(
+            EC.presence_of_all_elements_located((By.CSS_SELECTOR, CSS_SELECTORS["sort_menu_items"]))
+        )
+        if len(menu_items) < 2:
+            print("找不到排序選項")
+            return False
+        
+        # 第二個選項是「由新到舊」
+        driver.execute_script(MARK_FIRST_THREAD_SCRIPT, CSS_SELECTORS["comments"])
+        menu_items[1].click()
+        if not wait_for_resort(driver, timeout):
+            return False
+        print("留言已改為由新到舊排序")
+        return True
+    except Exception as e:
+        print(f"sort error: {str(e)}")
+        return False
+
+def wait_for_resort(driver, timeout=15):
+    """點選排序後，等到原本的第一則評論串被移除或換成別的留言，之後抽取到的才是新排序"""
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=SCROLL_SETTINGS["poll_interval"]).until(
+            lambda d: d.execute_script(FIRST_THREAD_CHANGED_SCRIPT, CSS_SELECTORS["comments"])
+        )
+        return True
+    except TimeoutException:
+        # 不確定是不是新排序，當作排序失敗，呼叫端會改為完整抓取
+        print(f"排序後 {timeout} 秒內留言沒有重新載入")
+        return False
+
+def count_comment_threads(driver):
+    """目前已載入的評論串數量 (包含串流模式已從 DOM 移除的)"""
+    return driver.execute_script(COUNT_THREADS_SCRIPT, CSS_SELECTORS["comments"])
+
+def wait_for_new_comments(driver, previous_count, timeout=None):
+    """等待新的評論串出現，回傳 (評論數, 等待秒數)"""
+    if timeout is None:
+        timeout = SCROLL_SETTINGS["scroll_timeout"]
+    
+    def has_new_comments(d):
+        count = count_comment_threads(d)
+        return count if count > previous_count else False
+    
+    start = time.perf_counter()
+    try:
+        current_count = WebDriverWait(
+            driver, timeout, poll_frequency=SCROLL_SETTINGS["poll_interval"]
+        ).until(has_new_comments)
+    except TimeoutException:
+        current_count = count_comment_threads(driver)
+    
+    return current_count, time.perf_counter() - start
+
+def print_latency_summary(latencies):
+    """印出每次滾動的等待時間統計"""
+    if not latencies:
+        return
+    
+    ordered = sorted(latencies)
+    p50 = ordered[len(ordered) // 2]
+    p90 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.9))]
+    print(f"滾動等待時間 - 次數: {len(ordered)}, p50: {p50:.2f}s, p90: {p90:.2f}s, "
+          f"最大: {ordered[-1]:.2f}s, 總計: {sum(ordered):.1f}s")
+
+def scroll_to_load_comments(driver, max_scrolls=None, on_scroll=None):
+    """加載評論，新評論一出現就繼續滾動
+
+    on_scroll(scroll_index, comments_count, latency) 會在每次滾動後呼叫，回傳 True 時停止滾動
+    """
     if max_scrolls is None:
         max_scrolls = SCROLL_SETTINGS["max_scrolls"]
     
-    scroll_pause_time = SCROLL_SETTINGS["scroll_pause_time"]
     no_change_threshold = SCROLL_SETTINGS["no_change_threshold"]
     
     last_height = driver.execute_script("return document.documentElement.scrollHeight")
     comments_count = 0
     no_change_count = 0
+    latencies = []
     
     print("comments loading...")
     
     for i in range(max_scrolls):
         try:
             driver.execute_script("window.scrollTo(0, document.documentElement.scrollHeight);")
-            time.sleep(scroll_pause_time)
+            current_comments, latency = wait_for_new_comments(driver, comments_count)
+            latencies.append(latency)
+            record_stage("scroll_wait", latency)
             new_height = driver.execute_script("return document.documentElement.scrollHeight")
-            current_comments = len(driver.find_elements(By.CSS_SELECTOR, CSS_SELECTORS["comments"]))
             
             # 如果找到更多評論，重置無變化計數器
             if current_comments > comments_count:
                 if i % 50 == 0 or current_comments - comments_count > 10:
-                    print(f"滾動 {i+1}/{max_scrolls} - 發現評論數: {current_comments} (+{current_comments - comments_count})")
+                    print(f"滾動 {i+1}/{max_scrolls} - 發現評論數: {current_comments} (+{current_comments - comments_count}), 等待 {latency:.2f}s")
                 comments_count = current_comments
                 no_change_count = 0
             else:
                 no_change_count += 1
             
-            # 如果頁面高度沒有變化且評論數也沒變化
-            if new_height == last_height and no_change_count > no_change_threshold:
-                print(f"連續 {no_change_count} 次滾動沒有新評論")
-                break
-                
-            last_height = new_height
-            
         except Exception as e:
             print(f"scroll error: {str(e)}")
-            time.sleep(5)
+            time.sleep(SCROLL_SETTINGS["poll_interval"])
             continue
     
+        # on_scroll 的錯誤 (例如寫入資料庫失敗) 不是滾動錯誤，直接丟給呼叫端
+        if on_scroll and on_scroll(i, comments_count, latency):
+            print(f"滾動 {i+1}/{max_scrolls} - 提前停止")
+            break
+        
+        # 如果頁面高度沒有變化且評論數也沒變化
+        if new_height == last_height and no_change_count > no_change_threshold:
+            print(f"連續 {no_change_count} 次滾動沒有新評論")
+            break
+        
+        last_height = new_height
+    
+    print_latency_summary(latencies)
     print(f"Finish - 總共找到 {comments_count} 條評論")
     return comments_count
\ No newline at end of file
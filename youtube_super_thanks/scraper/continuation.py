@@ -0,0 +1,262 @@
+import json
+import os
+import re
+import urllib.request
+from config import CONTINUATION_SETTINGS
+from utils.timing import stage
+
+# 不開瀏覽器，直接讀取留言區載入時呼叫的 continuation JSON
+NEXT_URL = "https://www.youtube.com/youtubei/v1/next?key={api_key}&prettyPrint=false"
+
+_INITIAL_DATA_RE = re.compile(r'(?:var ytInitialData|window\["ytInitialData"\])\s*=\s*(\{.+?\});\s*</script>', re.S)
+_PLAYER_RESPONSE_RE = re.compile(r'var ytInitialPlayerResponse\s*=\s*(\{.+?\});\s*(?:var |</script>)', re.S)
+_YTCFG_RE = re.compile(r'ytcfg\.set\((\{.+?\})\);', re.S)
+
+def urllib_transport(url, data=None, headers=None):
+    """預設的傳輸方式，有 data 時以 JSON POST，回傳回應文字"""
+    body = json.dumps(data).encode("utf-8") if data is not None else None
+    request = urllib.request.Request(url, data=body, headers=headers or {})
+    with urllib.request.urlopen(request, timeout=CONTINUATION_SETTINGS["timeout"]) as response:
+        return response.read().decode("utf-8")
+
+class RecordingTransport:
+    """包住另一個傳輸方式，把每個回應依序存成檔案，之後可用 ReplayTransport 離線重播"""
+    
+    def __init__(self, directory, transport=None):
+        self.directory = directory
+        self.transport = transport or urllib_transport
+        self.count = 0
+        os.makedirs(directory, exist_ok=True)
+    
+    def __call__(self, url, data=None, headers=None):
+        text = self.transport(url, data, headers)
+        self.count += 1
+        with open(os.path.join(self.directory, f"{self.count:04d}.txt"), "w", encoding="utf-8") as f:
+            f.write(text)
+        return text
+
+class ReplayTransport:
+    """依序回傳 RecordingTransport 錄下的回應，不連網路"""
+    
+    def __init__(self, directory):
+        self.paths = sorted(
+            os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".txt")
+        )
+        self.count = 0
+    
+    def __call__(self, url, data=None, headers=None):
+        if self.count >= len(self.paths):
+            raise IndexError(f"沒有更多錄下的回應 (共 {len(self.paths)} 個)")
+        path = self.paths[self.count]
+        self.count += 1
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+
+class ContinuationClient:
+    """保存 transport 及 innertube 設定，對應瀏覽器路徑中的 driver"""
+    
+    def __init__(self, transport=None):
+        self.transport = transport or urllib_transport
+        self.headers = {
+            "User-Agent": CONTINUATION_SETTINGS["user_agent"],
+            "Accept-Language": CONTINUATION_SETTINGS["hl"],
+        }
+        self.requests = 0
+    
+    def get(self, url):
+        self.requests += 1
+        with stage("navigation"):
+            return self.transport(url, None, self.headers)
+    
+    def post(self, url, data):
+        self.requests += 1
+        headers = dict(self.headers, **{"Content-Type": "application/json"})
+        with stage("continuation_request"):
+            return json.loads(self.transport(url, data, headers))
+
+def _search_json(pattern, html):
+    match = pattern.search(html)
+    if not match:
+        return None
+    try:
+        return json.loads(match.group(1))
+    except ValueError:
+        return None
+
+def _find_all(obj, key):
+    """遞迴找出所有名稱為 key 的值"""
+    if isinstance(obj, dict):
+        for name, value in obj.items():
+            if name == key:
+                yield value
+            yield from _find_all(value, key)
+    elif isinstance(obj, list):
+        for value in obj:
+            yield from _find_all(value, key)
+
+def _text(obj):
+    """simpleText / runs / content 三種文字格式"""
+    if isinstance(obj, str):
+        return obj.strip()
+    if not isinstance(obj, dict):
+        return ""
+    if "simpleText" in obj:
+        return obj["simpleText"].strip()
+    if "runs" in obj:
+        return "".join(run.get("text", "") for run in obj["runs"]).strip()
+    return str(obj.get("content", "")).strip()
+
+def _continuation_token(obj):
+    for command in _find_all(obj, "continuationCommand"):
+        if command.get("token"):
+            return command["token"]
+    return None
+
+def load_watch_page(client, video_url):
+    """讀取影片頁面，取出 ytInitialData、影片資訊及 API 設定"""
+    html = client.get(video_url)
+    initial_data = _search_json(_INITIAL_DATA_RE, html)
+    if initial_data is None:
+        raise ValueError("影片頁面中找不到 ytInitialData")
+    
+    ytcfg = {}
+    for match in _YTCFG_RE.finditer(html):
+        try:
+            ytcfg.update(json.loads(match.group(1)))
+        except ValueError:
+            continue
+    
+    context = ytcfg.get("INNERTUBE_CONTEXT") or {"client": {"clientName": "WEB", "clientVersion": "2.20240101.00.00"}}
+    context.setdefault("client", {}).update(hl=CONTINUATION_SETTINGS["hl"], gl=CONTINUATION_SETTINGS["gl"])
+    
+    player_response = _search_json(_PLAYER_RESPONSE_RE, html) or {}
+    return {
+        "initial_data": initial_data,
+        "api_key": ytcfg.get("INNERTUBE_API_KEY", ""),
+        "context": context,
+        "video_details": player_response.get("videoDetails", {}),
+    }
+
+def get_video_info(page, video_id, video_url):
+    details = page["video_details"]
+    title = details.get("title")
+    channel = details.get("author")
+    
+    # 沒有 player response 時改從頁面資料找
+    if not title:
+        title = next((_text(r.get("title")) for r in _find_all(page["initial_data"], "videoPrimaryInfoRenderer")), "")
+    if not channel:
+        channel = next((_text(r.get("title")) for r in _find_all(page["initial_data"], "videoOwnerRenderer")), "")
+    
+    print(f"影片資訊 - 標題: {title}, 頻道: {channel}")
+    return {
+        "video_id": video_id,
+        "video_url": video_url,
+        "title": title or "沒找到",
+        "channel": channel or "沒找到"
+    }
+
+def find_comments_token(initial_data):
+    """留言區 (comment-item-section) 第一頁的 continuation token"""
+    for section in _find_all(initial_data, "itemSectionRenderer"):
+        if section.get("sectionIdentifier") == "comment-item-section":
+            return _continuation_token(section.get("contents", []))
+    return None
+
+def _read_thread(thread, entities):
+    """把一個 commentThreadRenderer 轉成與瀏覽器抽取腳本相同格式的資料，沒有超級感謝時回傳 None"""
+    renderer = thread.get("comment", {}).get("commentRenderer")
+    if renderer:
+        comment_id = renderer.get("commentId", "")
+        commenter_name = _text(renderer.get("authorText"))
+        comment_text = _text(renderer.get("contentText"))
+        chip_source = renderer
+        pinned = "pinnedCommentBadge" in renderer
+    else:
+        # 新版格式：留言內容放在 frameworkUpdates 的 commentEntityPayload
+        view_model = thread.get("commentViewModel", {}).get("commentViewModel", {})
+        payload = entities.get(view_model.get("commentKey"), {})
+        properties = payload.get("properties", {})
+        comment_id = properties.get("commentId") or view_model.get("commentId", "")
+        commenter_name = _text(payload.get("author", {}).get("displayName", ""))
+        comment_text = _text(properties.get("content", {}))
+        chip_source = [view_model, payload]
+        pinned = bool(view_model.get("pinnedText"))
+    
+    price_text = next((_text(chip) for chip in _find_all(chip_source, "chipText")), "")
+    if not price_text:
+        return None
+    
+    return {
+        "thread_id": comment_id,
+        "price_text": price_text,
+        "commenter_name": commenter_name,
+        "comment_text": comment_text,
+        "pinned": pinned
+    }
+
+def parse_continuation(response):
+    """解析一頁 continuation 回應，回傳 (超級感謝資料, 下一頁 token, 排序選項 token)"""
+    with stage("extraction"):
+        return _parse_continuation(response)
+
+def _parse_continuation(response):
+    items = []
+    for endpoint in response.get("onResponseReceivedEndpoints", []):
+        for key in ("reloadContinuationItemsCommand", "appendContinuationItemsAction"):
+            items.extend(endpoint.get(key, {}).get("continuationItems", []))
+    
+    entities = {}
+    for mutation in _find_all(response.get("frameworkUpdates", {}), "mutations"):
+        for entry in mutation:
+            payload = entry.get("payload", {}).get("commentEntityPayload")
+            if payload:
+                entities[entry.get("entityKey") or payload.get("key")] = payload
+    
+    records = []
+    next_token = None
+    sort_tokens = []
+    for item in items:
+        if "commentThreadRenderer" in item:
+            record = _read_thread(item["commentThreadRenderer"], entities)
+            if record:
+                records.append(record)
+        elif "continuationItemRenderer" in item:
+            next_token = _continuation_token(item["continuationItemRenderer"])
+        elif "commentsHeaderRenderer" in item:
+            sort_menu = item["commentsHeaderRenderer"].get("sortMenu", {})
+            sort_tokens = [command["token"] for command in _find_all(sort_menu, "continuationCommand")]
+    
+    return records, next_token, sort_tokens
+
+def iter_comment_records(client, page, newest_first=False, max_pages=None):
+    """逐頁讀取留言，每頁產生一批超級感謝資料 (沒有留言 ID 時以位置編號代替)"""
+    if max_pages is None:
+        max_pages = CONTINUATION_SETTINGS["max_pages"]
+    
+    token = find_comments_token(page["initial_data"])
+    if not token:
+        print("找不到留言區 (可能已關閉留言)")
+        return
+    
+    url = NEXT_URL.format(api_key=page["api_key"])
+    records, token, sort_tokens = parse_continuation(client.post(url, {"context": page["context"], "continuation": token}))
+    
+    # 排序選單的第二個選項是「由新到舊」
+    if newest_first and len(sort_tokens) > 1:
+        records, token, _ = parse_continuation(
+            client.post(url, {"context": page["context"], "continuation": sort_tokens[1]})
+        )
+        print("留言已改為由新到舊排序")
+    
+    index = 0
+    for page_index in range(max_pages):
+        for record in records:
+            if not record["thread_id"]:
+                record["thread_id"] = f"index-{index}"
+            index += 1
+        yield records
+        
+        if not token or page_index + 1 >= max_pages:
+            break
+        records, token, _ = parse_continuation(client.post(url, {"context": page["context"], "continuation": token}))
\ No newline at end of file
@@ -0,0 +1,171 @@
+import re
+from selenium.webdriver.common.by import By
+
+from config import CSS_SELECTORS, EXTRACTION_SETTINGS
+
+# 讀取單一評論串的 JS 函式，兩種抽取腳本共用
+_READ_THREAD_JS = """
+const textOf = (root, selector) => {
+    const el = root.querySelector(selector);
+    return el ? (el.innerText || el.textContent || '').trim() : '';
+};
+
+const readThread = (thread, index) => {
+    const comment = thread.querySelector('#comment') || thread;
+    const priceText = textOf(comment, priceSelector);
+    if (!priceText) {
+        return null;
+    }
+
+    let threadId = '';
+    const link = comment.querySelector('#published-time-text a');
+    if (link) {
+        const match = (link.getAttribute('href') || '').match(/[?&]lc=([^&]+)/);
+        if (match) {
+            threadId = match[1];
+        }
+    }
+
+    return {
+        thread_id: threadId || ('index-' + index),
+        price_text: priceText,
+        commenter_name: textOf(comment, authorSelector),
+        comment_text: textOf(comment, textSelector),
+        pinned: !!comment.querySelector(pinnedSelector)
+    };
+};
+"""
+
+# 在瀏覽器內一次取出一批評論串的超級感謝資料，避免每個元素都來回呼叫 WebDriver
+EXTRACT_THREADS_SCRIPT = """
+const [threadSelector, priceSelector, authorSelector, textSelector, pinnedSelector, start, batchSize] = arguments;
+""" + _READ_THREAD_JS + """
+const threads = document.querySelectorAll(threadSelector);
+const end = Math.min(threads.length, start + batchSize);
+const records = [];
+
+for (let i = start; i < end; i++) {
+    const record = readThread(threads[i], i);
+    if (record) {
+        records.push(record);
+    }
+}
+
+return {total: threads.length, records: records};
+"""
+
+# 只讀取還沒處理過的評論串並標記，prune 時順便把處理過的節點從 DOM 移除
+EXTRACT_NEW_THREADS_SCRIPT = """
+const [threadSelector, priceSelector, authorSelector, textSelector, pinnedSelector, prune] = arguments;
+""" + _READ_THREAD_JS + """
+const threads = document.querySelectorAll(threadSelector + ':not([data-st-done])');
+const offset = window.__stProcessedThreads || 0;
+const records = [];
+
+threads.forEach((thread, i) => {
+    const record = readThread(thread, offset + i);
+    if (record) {
+        records.push(record);
+    }
+    thread.setAttribute('data-st-done', '1');
+});
+
+window.__stProcessedThreads = offset + threads.length;
+
+if (prune) {
+    // 保留最後一個評論串，讓 YouTube 的續載位置不會跑掉
+    const done = document.querySelectorAll(threadSelector + '[data-st-done]');
+    for (let i = 0; i < done.length - 1; i++) {
+        done[i].remove();
+    }
+    window.__stPrunedThreads = (window.__stPrunedThreads || 0) + Math.max(0, done.length - 1);
+}
+
+return records;
+"""
+
+def extract_super_thanks_script(driver, batch_size=None):
+    """用 execute_script 分批取出超級感謝 (每批一次往返)"""
+    if batch_size is None:
+        batch_size = EXTRACTION_SETTINGS["batch_size"]
+
+    records = []
+    start = 0
+
+    while True:
+        result = driver.execute_script(
+            EXTRACT_THREADS_SCRIPT,
+            CSS_SELECTORS["comments"],
+            CSS_SELECTORS["super_thanks"],
+            CSS_SELECTORS["commenter_name"],
+            CSS_SELECTORS["thread_comment_text"],
+            CSS_SELECTORS["pinned_badge"],
+            start,
+            batch_size
+        )
+        records.extend(result["records"])
+        start += batch_size
+
+        if start >= result["total"]:
+            break
+
+    return records
+
+def extract_new_super_thanks(driver, prune=False):
+    """取出上次呼叫後新載入的超級感謝 (串流模式使用)"""
+    return driver.execute_script(
+        EXTRACT_NEW_THREADS_SCRIPT,
+        CSS_SELECTORS["comments"],
+        CSS_SELECTORS["super_thanks"],
+        CSS_SELECTORS["commenter_name"],
+        CSS_SELECTORS["thread_comment_text"],
+        CSS_SELECTORS["pinned_badge"],
+        prune
+    )
+
+def _element_text(root, selector):
+    elements = root.find_elements(By.CSS_SELECTOR, selector)
+    return elements[0].text.strip() if elements else ""
+
+def extract_super_thanks_elements(driver):
+    """逐一讀取元素文字 (舊方法，每個元素一次 WebDriver 往返)，以評論串為範圍取出各欄位"""
+    records = []
+
+    threads = driver.find_elements(By.CSS_SELECTOR, CSS_SELECTORS["comments"])
+    for i, thread in enumerate(threads):
+        # 只讀主留言，回覆裡的作者及內容不算
+        comments = thread.find_elements(By.CSS_SELECTOR, "#comment")
+        comment = comments[0] if comments else thread
+
+        price_text = _element_text(comment, CSS_SELECTORS["super_thanks"])
+        if not price_text:
+            continue
+
+        thread_id = f"index-{i}"
+        links = comment.find_elements(By.CSS_SELECTOR, "#published-time-text a")
+        if links:
+            match = re.search(r"[?&]lc=([^&]+)", links[0].get_attribute("href") or "")
+            if match:
+                thread_id = match.group(1)
+
+        records.append({
+            "thread_id": thread_id,
+            "price_text": price_text,
+            "commenter_name": _element_text(comment, CSS_SELECTORS["commenter_name"]),
+            "comment_text": _element_text(comment, CSS_SELECTORS["thread_comment_text"]),
+            "pinned": bool(comment.find_elements(By.CSS_SELECTOR, CSS_SELECTORS["pinned_badge"]))
+        })
+
+    return records
+
+def extract_super_thanks(driver, mode=None):
+    """依設定選擇抽取方式"""
+    if mode is None:
+        mode = EXTRACTION_SETTINGS["mode"]
+
+    if mode == "script":
+        return extract_super_thanks_script(driver)
+    elif mode == "element":
+        return extract_super_thanks_elements(driver)
+    else:
+        raise ValueError(f"未知的抽取模式: {mode}")
\ No newline at end of file
@@ -1,56 +1,124 @@
 import re
 from datetime import datetime
 from collections import defaultdict
+from functools import lru_cache
+from urllib.parse import parse_qs, urlparse
+from config import DEFAULT_EXCHANGE_RATES
 
-def parse_currency_amount(text):
-    currency_patterns = {
-        'US$': r'US\$\s*([\d,.]+)',
-        'CA$': r'CA\$\s*([\d,.]+)',  
-        'HK$': r'HK\$\s*([\d,.]+)',  
-        'SGD': r'SGD\s*([\d,.]+)',   
-        'MYR': r'MYR\s*([\d,.]+)',  
-        '¥': r'¥\s*([\d,.]+)',      
-        'AU$': r'AU\$\s*([\d,.]+)', 
-        '£': r'£\s*([\d,.]+)',      
-        '€': r'€\s*([\d,.]+)',      
-        'NZ$': r'NZ\$\s*([\d,.]+)', 
-        'PHP': r'PHP\s*([\d,.]+)',  
-        'THB': r'THB\s*([\d,.]+)',   
-        'IDR': r'IDR\s*([\d,.]+)',  
-        'TRY': r'TRY\s*([\d,.]+)',   
-        'CLP': r'CLP\s*([\d,.]+)',   
-        'ARS': r'ARS\s*([\d,.]+)',   
-        'AED': r'AED\s*([\d,.]+)',   
-        '$': r'^\$\s*([\d,.]+)',    
-    }
+# 同一種貨幣的其他寫法，對應到 DEFAULT_EXCHANGE_RATES 的鍵
+CURRENCY_ALIASES = {
+    'NT$': '$',
+    'TWD': '$',
+    'USD': 'US$',
+    'HKD': 'HK$',
+    'S$': 'SGD',
+    'CAD': 'CA$',
+    'RM': 'MYR',
+    'JP¥': '¥',
+    'JPY': '¥',
+    '￥': '¥',
+    'A$': 'AU$',
+    'AUD': 'AU$',
+    'GBP': '£',
+    'EUR': '€',
+    'NZD': 'NZ$',
+    '₱': 'PHP',
+    '฿': 'THB',
+    'Rp': 'IDR',
+    '₺': 'TRY',
+}
+
+_CURRENCY_TOKENS = {token: token for token in DEFAULT_EXCHANGE_RATES}
+_CURRENCY_TOKENS.update(CURRENCY_ALIASES)
+
+# 長的寫法放前面，避免 US$ 被當成 $
+_TOKEN_PATTERN = '|'.join(re.escape(token) for token in sorted(_CURRENCY_TOKENS, key=len, reverse=True))
+_NUMBER_PATTERN = r'\d(?:[\d.,\u00a0\u202f ]*\d)?'
+
+# 一次比對：符號在前 (US$ 5.00) 或在後 (5,00 €)
+_CHIP_RE = re.compile(
+    rf'^\s*(?:(?P<prefix>{_TOKEN_PATTERN})\s*(?P<prefix_amount>{_NUMBER_PATTERN})'
+    rf'|(?P<suffix_amount>{_NUMBER_PATTERN})\s*(?P<suffix>{_TOKEN_PATTERN}))\s*$'
+)
+_FALLBACK_AMOUNT_RE = re.compile(_NUMBER_PATTERN)
+_FALLBACK_SYMBOL_RE = re.compile(r'[^\d,.\s]+')
+_SPACES_RE = re.compile(r'[\s\u00a0\u202f]')
+_THOUSANDS_RE = re.compile(r'^\d{1,3}([.,])\d{3}(?:\1\d{3})*$')
+
+def parse_amount(number_text):
+    """處理千分位及小數逗號，例如 1,234.56 / 1.234,56 / 1 234,56 / 12,50 / 1,00,000"""
+    number_text = _SPACES_RE.sub('', number_text)
     
-    # 檢查各種貨幣格式
-    for currency, pattern in currency_patterns.items():
-        match = re.search(pattern, text)
-        if match:
-            return currency, float(match.group(1).replace(',', ''))
+    if ',' in number_text and '.' in number_text:
+        # 最後出現的符號是小數點
+        if number_text.rfind(',') > number_text.rfind('.'):
+            number_text = number_text.replace('.', '').replace(',', '.')
+        else:
+            number_text = number_text.replace(',', '')
+    elif _THOUSANDS_RE.match(number_text) or max(number_text.count(','), number_text.count('.')) > 1:
+        # 三位一組的千分位，或同一個符號出現多次 (印度的 1,00,000 分組)
+        number_text = number_text.replace(',', '').replace('.', '')
+    else:
+        number_text = number_text.replace(',', '.')
+    
+    return float(number_text)
+
+@lru_cache(maxsize=4096)
+def parse_currency_amount(text):
+    match = _CHIP_RE.match(text)
+    if match:
+        if match.group('prefix'):
+            token, number_text = match.group('prefix'), match.group('prefix_amount')
+        else:
+            token, number_text = match.group('suffix'), match.group('suffix_amount')
+        try:
+            return _CURRENCY_TOKENS[token], parse_amount(number_text)
+        except ValueError:
+            return None, None
     
     # 如果無法辨識出格式，嘗試取出任何數字
-    amount_match = re.search(r'[\d,.]+', text)
+    amount_match = _FALLBACK_AMOUNT_RE.search(text)
     if amount_match:
-        currency_symbol = re.search(r'[^\d,.\s]+', text)
+        currency_symbol = _FALLBACK_SYMBOL_RE.search(text)
         if currency_symbol:
-            return currency_symbol.group(0), float(amount_match.group(0).replace(',', ''))
+            try:
+                return currency_symbol.group(0), parse_amount(amount_match.group(0))
+            except ValueError:
+                return None, None
     
     return None, None
 
+def parse_currency_amounts(texts):
+    """批次解析多個金額字串，回傳 [(貨幣, 金額), ...]"""
+    return [parse_currency_amount(text.strip()) for text in texts]
+
 def extract_video_id(video_url):
-    if "youtube.com/watch?v=" in video_url:
-        return video_url.split("watch?v=")[1].split("&")[0]
-    elif "youtu.be/" in video_url:
-        return video_url.split("youtu.be/")[1].split("?")[0]
-    else:
+    """網址的 v= 參數、youtu.be/ID，或 /shorts/ID、本機 fixture 伺服器 /video/ID.html 等路徑的最後一段"""
+    parsed = urlparse(video_url)
+    if not parsed.scheme:
+        # 沒有 scheme 時可能是影片 ID 或 youtube.com/watch?v=... 這種省略 https 的網址
+        if "/" not in video_url and "?" not in video_url:
+            return video_url
+        parsed = urlparse("https://" + video_url)
+    
+    video_ids = parse_qs(parsed.query).get("v")
+    if video_ids:
+        return video_ids[0]
+    
+    segment = parsed.path.rstrip("/").rsplit("/", 1)[-1]
+    if not segment:
         return video_url
+    return segment.rsplit(".", 1)[0] if "." in segment else segment
+
+def normalize_video_url(video_input):
+    """把影片ID或網址轉成完整網址"""
+    video_input = video_input.strip()
+    if "youtube.com" in video_input or "youtu.be" in video_input or video_input.startswith(("http://", "https://")):
+        return video_input
+    return f"https://www.youtube.com/watch?v={video_input}"
 
-def print_currency_summary(conn, currency_totals, total_count, found_count):
+def print_currency_summary(rates, currency_totals, total_count, found_count):
     """按照貨幣分類並轉換為台幣"""
-    from database.db_queries import get_currency_rate
-    
     twd_total = 0
     twd_by_currency = {}
     
@@ -58,8 +126,8 @@ def print_currency_summary(conn, currency_totals, total_count, found_count):
     for currency, total in sorted(currency_totals.items()):
         print(f"{currency} {total:.2f}")
         
-        # 從資料庫獲取匯率
-        rate = get_currency_rate(conn, currency)
+        # 從匯率表獲取匯率
+        rate = rates.get(currency)
         
         # 計算對應的台幣總額
         twd_amount = total * rate
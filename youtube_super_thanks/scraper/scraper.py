@@ -1,123 +1,315 @@
+import sqlite3
 import time
 from datetime import datetime
-from collections import defaultdict
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
-from config import CSS_SELECTORS
+from config import EXTRACTION_SETTINGS, STREAMING_SETTINGS, TIMING_SETTINGS
 from database.db_init import init_database
-from database.db_queries import save_video_info, save_super_thanks, run_statistics, get_currency_rate
-from scraper.browser import setup_browser, get_video_info, scroll_to_load_comments
-from scraper.parser import extract_video_id, parse_currency_amount, print_currency_summary
+from database.db_queries import (
+    save_video_info, save_super_thanks, run_statistics, save_checkpoint, start_checkpoint, get_checkpoint,
+    get_saved_thread_ids, save_scrape_run
+)
+from database.models import SuperThanksBatch
+from database.rates import CurrencyRateTable
+from scraper.browser import BrowserPool, get_video_info, scroll_to_load_comments, sort_comments_by_newest
+from scraper import continuation
+from scraper.extractor import extract_super_thanks, extract_new_super_thanks
+from scraper.parser import extract_video_id, parse_currency_amounts, print_currency_summary
+from utils.timing import current_timer, profile_run, stage, start_timer, use_timer
 
-def scrape_super_thanks(video_url):
-    start_time = datetime.now()
-    conn = init_database()
+# 檢查點保留最近幾則留言的 ID
+SEEN_THREAD_IDS_LIMIT = 20
+
+def build_super_thanks_items(records, offset=0, known_thread_ids=None):
+    """把抽取到的原始資料解析成 SuperThanksBatch，略過 known_thread_ids 中已存過的留言"""
+    with stage("parsing"):
+        return _build_super_thanks_items(records, offset, known_thread_ids)
+
+def _build_super_thanks_items(records, offset, known_thread_ids):
+    super_thanks_data = SuperThanksBatch()
     
-    driver = setup_browser()
+    # 解析不同貨幣金額
+    parsed_amounts = parse_currency_amounts([record["price_text"] for record in records])
+    
+    for i, (record, (currency, amount)) in enumerate(zip(records, parsed_amounts), offset):
+        # 沒有留言連結時的位置編號不穩定，不拿來去重
+        thread_id = record["thread_id"]
+        if thread_id.startswith("index-"):
+            thread_id = None
+        elif known_thread_ids and thread_id in known_thread_ids:
+            continue
+        
+        if currency and amount:
+            # 評論者名稱
+            raw_name = record["commenter_name"]
+            commenter_name = raw_name.split('@')[-1].strip() if '@' in raw_name else raw_name
+            if not commenter_name:
+                commenter_name = f"未知評論者 #{i+1}"
+            
+            # 評論內容
+            comment_text = record["comment_text"]
+            
+            print(f"超級感謝 #{i+1}: {currency} {amount:.2f} - 評論者: {commenter_name}")
+            
+            super_thanks_data.append(currency, amount, thread_id, commenter_name, comment_text)
     
-    currency_totals = defaultdict(float)
-    total_count = 0
-    super_thanks_data = []
+    return super_thanks_data
+
+def reached_known_threads(records, known_thread_ids):
+    """由新到舊排序時，遇到已存過的 (非置頂) 留言代表之後都是舊資料"""
+    if not known_thread_ids:
+        return False
+    return any(
+        record["thread_id"] in known_thread_ids and not record.get("pinned")
+        for record in records
+    )
+
+def update_progress(progress, records, found_count, scroll_index=None):
+    """每次抽取新評論串後更新抓取進度 (檢查點只保留最近的留言 ID)"""
+    if scroll_index is not None:
+        progress["scroll_count"] = scroll_index + 1
+    progress["threads_found"] = found_count
+    seen_thread_ids = progress["seen_thread_ids"] + [record["thread_id"] for record in records]
+    progress["seen_thread_ids"] = seen_thread_ids[-SEEN_THREAD_IDS_LIMIT:]
+
+def fetch_super_thanks(driver, video_url, on_items=None, known_thread_ids=None, incremental=False):
+    """用已開啟的瀏覽器抓取一部影片，回傳 (影片資訊, 超級感謝列表, 找到的數量)
     
-    try:
+    有 on_items 時使用串流模式：每次滾動後把新的超級感謝及進度交給
+    on_items(video_info, items, progress)
+    incremental=True 時留言改為由新到舊，遇到 known_thread_ids 中的留言就停止滾動
+    """
+    with stage("navigation"):
         driver.get(video_url)
-        print(f"正在加載: {video_url}")
-        
-        time.sleep(5)
-        
-        video_id = extract_video_id(video_url)
+    print(f"正在加載: {video_url}")
+    
+    video_id = extract_video_id(video_url)
+    with stage("video_info"):
         video_info = get_video_info(driver, video_id, video_url)
-        save_video_info(conn, video_info)
-        print(f"抓取影片: {video_info['title']} ({video_info['channel']})")
-        
+    print(f"抓取影片: {video_info['title']} ({video_info['channel']})")
+    
+    if incremental:
+        incremental = sort_comments_by_newest(driver)
+    
+    if on_items is None and not incremental:
         # 滾動頁面加載評論
         scroll_to_load_comments(driver)
-        wait = WebDriverWait(driver, 10)
+        
+        # 尋找超級感謝
+        with stage("extraction"):
+            records = extract_super_thanks(driver)
+        return video_info, build_super_thanks_items(records, 0, known_thread_ids), len(records)
+    
+    super_thanks_data = SuperThanksBatch()
+    found_count = 0
+    progress = {"scroll_count": 0, "threads_found": 0, "seen_thread_ids": []}
+    
+    def stream_new_items(scroll_index=None, *_):
+        nonlocal found_count
+        with stage("extraction"):
+            records = extract_new_super_thanks(driver, STREAMING_SETTINGS["prune_dom"])
+        items = build_super_thanks_items(records, found_count, known_thread_ids)
+        found_count += len(records)
+        update_progress(progress, records, found_count, scroll_index)
+        
+        if on_items:
+            on_items(video_info, items, dict(progress))
+        super_thanks_data.extend(items)
+        
+        return incremental and reached_known_threads(records, known_thread_ids)
+    
+    # 滾動頁面加載評論，每次滾動後就處理新載入的評論
+    if not stream_new_items():
+        scroll_to_load_comments(driver, on_scroll=stream_new_items)
+        stream_new_items()
+    
+    if incremental:
+        print(f"增量更新 - 新的超級感謝: {len(super_thanks_data)}")
+    
+    return video_info, super_thanks_data, found_count
 
-        try:
-            # 尋找超級感謝
-            super_thanks_elements = driver.find_elements(By.CSS_SELECTOR, CSS_SELECTORS["super_thanks"])
-            
-            if super_thanks_elements:
-                found_count = len(super_thanks_elements)
-                
-                # 尋找評論者名稱
-                commenter_elements = []
-                try:
-                    commenter_elements = driver.find_elements(By.CSS_SELECTOR, CSS_SELECTORS["commenter_name"])
-                except Exception as e:
-                    print(f"獲取評論者名稱出錯: {str(e)}")
-                
-                # 獲取評論內容
-                comment_text_elements = driver.find_elements(By.CSS_SELECTOR, CSS_SELECTORS["comment_text"])
-                
-                for i, element in enumerate(super_thanks_elements, 0):
-                    amount_text = element.text.strip()
-                    
-                    if amount_text:
-                        # 解析不同貨幣金額
-                        currency, amount = parse_currency_amount(amount_text)
-                        
-                        if currency and amount:
-                            rate = get_currency_rate(conn, currency)
-                            amount_twd = amount * rate
-                            
-                            # 評論者名稱
-                            commenter_name = ""
-                            if i < len(commenter_elements):
-                                try:
-                                    raw_name = commenter_elements[i].text.strip()
-                                    commenter_name = raw_name.split('@')[-1].strip() if '@' in raw_name else raw_name
-                                except:
-                                    commenter_name = f"未知評論者 #{i+1}"
-                                
-                                if not commenter_name:
-                                    commenter_name = f"未知評論者 #{i+1}"
-                            else:
-                                commenter_name = f"未知評論者 #{i+1}"
-                            
-                            # 評論內容
-                            comment_text = ""
-                            if i < len(comment_text_elements):
-                                comment_text = comment_text_elements[i].text.strip()
-                            
-                            print(f"超級感謝 #{i+1}: {currency} {amount:.2f} - 評論者: {commenter_name}")
-                            
-                            super_thanks_data.append({
-                                "currency": currency,
-                                "amount": amount,
-                                "amount_twd": amount_twd,
-                                "commenter_name": commenter_name,
-                                "comment_text": comment_text,
-                                "comment_date": datetime.now()
-                            })
-                            
-                            # 累計總額
-                            currency_totals[currency] += amount
-                            total_count += 1
-                
-                # 保存超級感謝資料到資料庫
-                save_super_thanks(conn, video_id, super_thanks_data)
-                
-                # 按貨幣分類並計算
-                print_currency_summary(conn, currency_totals, total_count, found_count)
-                
-                # 執行統計分析
-                run_statistics(conn, video_id)
-            else:
-                print("沒有找到超級感謝")
+def fetch_super_thanks_continuation(client, video_url, on_items=None, known_thread_ids=None, incremental=False):
+    """不開瀏覽器，逐頁讀取留言的 continuation JSON，參數及回傳值與 fetch_super_thanks 相同"""
+    print(f"正在加載: {video_url}")
+    page = continuation.load_watch_page(client, video_url)
+    video_info = continuation.get_video_info(page, extract_video_id(video_url), video_url)
+    print(f"抓取影片: {video_info['title']} ({video_info['channel']})")
+    
+    super_thanks_data = SuperThanksBatch()
+    found_count = 0
+    progress = {"scroll_count": 0, "threads_found": 0, "seen_thread_ids": []}
+    
+    for page_index, records in enumerate(continuation.iter_comment_records(client, page, incremental)):
+        items = build_super_thanks_items(records, found_count, known_thread_ids)
+        found_count += len(records)
+        update_progress(progress, records, found_count, page_index)
+        
+        if on_items:
+            on_items(video_info, items, dict(progress))
+        super_thanks_data.extend(items)
         
-        except TimeoutException:
-            print("time-out")
+        if incremental and reached_known_threads(records, known_thread_ids):
+            break
+    
+    print(f"共讀取 {client.requests} 個請求")
+    if incremental:
+        print(f"增量更新 - 新的超級感謝: {len(super_thanks_data)}")
+    
+    return video_info, super_thanks_data, found_count
+
+def fetch_video(pool, video_url, on_items=None, known_thread_ids=None, incremental=False):
+    """依 EXTRACTION_SETTINGS["engine"] 選擇抓取方式，兩種方式的回傳值相同"""
+    if EXTRACTION_SETTINGS["engine"] == "continuation":
+        return fetch_super_thanks_continuation(
+            continuation.ContinuationClient(), video_url, on_items, known_thread_ids, incremental
+        )
+    
+    with pool.session() as driver:
+        return fetch_super_thanks(driver, video_url, on_items, known_thread_ids, incremental)
+
+def persist_super_thanks(conn, video_info, super_thanks_data, rates, progress=None):
+    """換算台幣，將影片資訊、超級感謝和抓取進度在同一個交易中寫入
+    
+    失敗時回滾，資料庫被鎖住時整批重試，仍然失敗就丟出例外讓這次抓取記錄為失敗
+    """
+    if super_thanks_data:
+        with stage("rate_lookup"):
+            super_thanks_data.set_amounts_twd(
+                rates.convert(super_thanks_data.currencies, super_thanks_data.amounts)
+            )
+        
+    retries = STREAMING_SETTINGS["write_retries"]
+    for attempt in range(retries + 1):
+        try:
+            with stage("db_write"):
+                rows_saved = _write_super_thanks(conn, video_info, super_thanks_data, progress)
+            break
+        except sqlite3.OperationalError as e:
+            conn.rollback()
+            if attempt == retries:
+                raise
+            print(f"db write error: {str(e)} - 重試 {attempt + 1}/{retries}")
+            time.sleep(STREAMING_SETTINGS["write_retry_delay"])
+        except Exception:
+            conn.rollback()
+            raise
+    
+    timer = current_timer()
+    if timer is not None:
+        timer.rows_saved += rows_saved
+
+def _write_super_thanks(conn, video_info, super_thanks_data, progress):
+    save_video_info(conn, video_info, commit=False)
+    
+    # 保存超級感謝資料到資料庫
+    rows_saved = 0
+    if super_thanks_data:
+        rows_saved = save_super_thanks(conn, video_info["video_id"], super_thanks_data, commit=False)
+    
+    save_checkpoint(conn, video_info["video_id"], "running", progress, rows_saved, commit=False)
+    conn.commit()
+    return rows_saved
+
+def store_super_thanks(conn, video_info, super_thanks_data, found_count, rates=None, persisted=False):
+    """寫入資料庫 (串流模式已寫入時 persisted=True)，接著印出統計"""
+    if rates is None:
+        rates = CurrencyRateTable(conn)
+    
+    if not persisted:
+        persist_super_thanks(conn, video_info, super_thanks_data, rates, {"threads_found": found_count})
+    save_checkpoint(conn, video_info["video_id"], "done")
+    
+    if not super_thanks_data:
+        print("沒有找到超級感謝")
+        return
+    
+    # 按貨幣分類並計算
+    print_currency_summary(rates, super_thanks_data.currency_totals(), len(super_thanks_data), found_count)
+    
+    # 執行統計分析
+    run_statistics(conn, video_info["video_id"])
+
+def finish_run(conn, timer, status):
+    """結束計時，存到 scrape_runs 並依設定輸出 JSON"""
+    if timer is None:
+        return
+    
+    timer.finish(status)
+    save_scrape_run(conn, timer.to_dict())
+    if TIMING_SETTINGS["export_json"]:
+        print(f"計時紀錄已輸出到 {timer.export_json()}")
+    timer.print_summary()
+
+def resume_from_checkpoint(conn, video_id, incremental=False):
+    """上次抓取沒有完成時印出當時的進度，回傳這次是否還能增量更新，接著把檢查點歸零開始這次抓取
+    
+    中斷的增量更新已經存下最新的留言，再由新到舊抓取會一遇到它們就停止，
+    漏掉中斷處之後的留言，所以改為完整掃描 (已存過的留言照樣略過)
+    """
+    checkpoint = get_checkpoint(conn, video_id)
+    start_checkpoint(conn, video_id)
+    if checkpoint is None or checkpoint["status"] == "done":
+        return incremental
+    
+    print(f"上次抓取沒有完成 ({checkpoint['status']}, {checkpoint['updated_at']}): "
+          f"已滾動 {checkpoint['scroll_count'] or 0} 次，讀取 {checkpoint['threads_found'] or 0} 則評論串，"
+          f"已存 {checkpoint['rows_saved']} 筆，最後一則 {checkpoint['last_thread_id'] or '-'}")
+    if incremental:
+        print("上次增量更新中斷，這次改為完整掃描")
+    return False
+
+def scrape_super_thanks(video_url, pool=None, incremental=False, raise_errors=False):
+    """抓取單一影片，raise_errors=True 時記錄失敗後把例外丟給呼叫端 (背景工作重試用)"""
+    start_time = datetime.now()
+    conn = init_database()
+    rates = CurrencyRateTable(conn)
+    
+    # 沒有傳入瀏覽器池時，只為這次抓取開一個
+    owns_pool = pool is None
+    if owns_pool:
+        pool = BrowserPool()
+    
+    streaming = STREAMING_SETTINGS["enabled"]
+    on_items = None
+    if streaming:
+        on_items = lambda video_info, items, progress: persist_super_thanks(conn, video_info, items, rates, progress)
+    
+    # 已存過的留言不再重複處理
+    video_id = extract_video_id(video_url)
+    known_thread_ids = get_saved_thread_ids(conn, video_id)
+    if known_thread_ids:
+        print(f"資料庫已有 {len(known_thread_ids)} 則此影片的超級感謝，將略過")
+    incremental = resume_from_checkpoint(conn, video_id, incremental)
+    
+    timer = start_timer(video_id, EXTRACTION_SETTINGS["engine"])
+    status = "failed"
+    try:
+        with use_timer(timer), profile_run(video_id):
+            video_info, super_thanks_data, found_count = fetch_video(
+                pool, video_url, on_items, known_thread_ids, incremental
+            )
+            store_super_thanks(conn, video_info, super_thanks_data, found_count, rates, persisted=streaming)
+        status = "done"
+    
+    except TimeoutException:
+        print("time-out")
+        conn.rollback()
+        save_checkpoint(conn, video_id, "failed")
+        if raise_errors:
+            raise
     
     except Exception as e:
         print(f"error: {str(e)}")
+        # 不能把寫到一半的交易跟失敗狀態一起 commit
+        conn.rollback()
+        save_checkpoint(conn, video_id, "failed")
+        if raise_errors:
+            raise
     
     finally:
         end_time = datetime.now()
         elapsed_time = end_time - start_time
         print(f"耗時: {elapsed_time}")
-        driver.quit()
+        finish_run(conn, timer, status)
+        if owns_pool:
+            pool.close()
         conn.close()
\ No newline at end of file
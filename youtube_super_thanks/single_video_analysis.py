@@ -1,33 +1,32 @@
-import sqlite3
 import pandas as pd
 import dash
 from dash import dcc, html, dash_table, callback, Input, Output
 import plotly.express as px
 import plotly.graph_objects as go
-from config import DATABASE_FILE
+from database.db_init import init_database
+from database.pool import read_connection
 
 # 初始化Dash
 app = dash.Dash(__name__, title="影片超級感謝分析")
 
+# 唯讀連線無法建立資料庫，先確定資料表存在
+init_database().close()
+
 # 載入特定影片資料
 def load_video_data(video_id):
-    conn = sqlite3.connect(DATABASE_FILE)
-    
-    # 讀取影片資訊
-    video_info = pd.read_sql_query("SELECT * FROM videos WHERE video_id = ?", conn, params=(video_id,))
-    
-    if video_info.empty:
-        conn.close()
-        return None, None
-    
-    # 讀取該影片的超級感謝資料
-    super_thanks = pd.read_sql_query("""
-        SELECT * FROM super_thanks
-        WHERE video_id = ?
-        ORDER BY amount_twd DESC
-    """, conn, params=(video_id,))
-    
-    conn.close()
+    with read_connection() as conn:
+        # 讀取影片資訊
+        video_info = pd.read_sql_query("SELECT * FROM videos WHERE video_id = ?", conn, params=(video_id,))
+    
+        if video_info.empty:
+            return None, None
+    
+        # 讀取該影片的超級感謝資料
+        super_thanks = pd.read_sql_query("""
+            SELECT * FROM super_thanks
+            WHERE video_id = ?
+            ORDER BY amount_twd DESC
+        """, conn, params=(video_id,))
     
     return video_info.iloc[0], super_thanks
 
@@ -0,0 +1,27 @@
+import os
+import sys
+import pytest
+
+# 專案的模組都以 youtube_super_thanks 為根目錄匯入 (from config import ...)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_init import init_database
+
+@pytest.fixture
+def db_conn(tmp_path, monkeypatch):
+    """在暫存目錄建立全新的資料庫 (DATABASE_FILE 是相對路徑)"""
+    monkeypatch.chdir(tmp_path)
+    conn = init_database()
+    yield conn
+    conn.close()
+
+@pytest.fixture(scope="session")
+def chrome():
+    """無頭 Chrome，沒有安裝 Chrome / chromedriver 時略過需要瀏覽器的測試"""
+    from scraper.browser import setup_browser
+    try:
+        driver = setup_browser()
+    except Exception as e:
+        pytest.skip(f"無法啟動 Chrome: {e}")
+    yield driver
+    driver.quit()
\ No newline at end of file
@@ -0,0 +1,138 @@
+import asyncio
+import queue
+import pytest
+from config import SCROLL_SETTINGS, STREAMING_SETTINGS
+from scraper import async_engine, batch
+from scraper.browser import COUNT_THREADS_SCRIPT
+from scraper.extractor import EXTRACT_NEW_THREADS_SCRIPT
+
+def record(thread_id, price_text="US$5.00"):
+    return {"thread_id": thread_id, "price_text": price_text, "commenter_name": f"@{thread_id}",
+            "comment_text": "text", "pinned": False}
+
+class StubElement:
+    async def get_attribute(self, name):
+        return "stub title"
+
+class StubPage:
+    """依腳本內容回應 evaluate：每次抽取交出一批評論串，其餘查詢回傳固定值"""
+    def __init__(self, batches):
+        self.batches = list(batches)
+        self.count = 0
+    
+    async def goto(self, url, **kwargs):
+        self.url = url
+    
+    async def wait_for_selector(self, selector, timeout=None):
+        return StubElement()
+    
+    async def inner_text(self, selector):
+        return "stub channel"
+    
+    async def evaluate(self, script, args=None):
+        if EXTRACT_NEW_THREADS_SCRIPT in script:
+            records = self.batches.pop(0) if self.batches else []
+            self.count += len(records)
+            return records
+        if COUNT_THREADS_SCRIPT in script:
+            return self.count + (len(self.batches[0]) if self.batches else 0)
+        if "scrollHeight" in script and "scrollTo" not in script:
+            return 1000 + self.count
+        return None
+
+class StubContext:
+    def __init__(self, page):
+        self.page = page
+        self.closed = False
+    
+    async def new_page(self):
+        return self.page
+    
+    async def close(self):
+        self.closed = True
+
+class StubBrowser:
+    def __init__(self, pages):
+        self.pages = pages
+        self.contexts = []
+    
+    async def new_context(self):
+        if not self.pages:
+            raise RuntimeError("browser has been closed")
+        context = StubContext(self.pages.pop(0))
+        self.contexts.append(context)
+        return context
+
+@pytest.fixture(autouse=True)
+def fast_scroll(monkeypatch):
+    monkeypatch.setitem(SCROLL_SETTINGS, "scroll_timeout", 0.01)
+    monkeypatch.setitem(SCROLL_SETTINGS, "poll_interval", 0.001)
+    monkeypatch.setitem(SCROLL_SETTINGS, "no_change_threshold", 0)
+    monkeypatch.setitem(STREAMING_SETTINGS, "enabled", True)
+
+def scrape(browser, video_urls, concurrency=2):
+    result_queue = queue.Queue()
+    timers = {}
+    
+    async def run():
+        semaphore = asyncio.Semaphore(concurrency)
+        await asyncio.gather(*(
+            async_engine._scrape_video(browser, video_url, result_queue, semaphore, False, timers)
+            for video_url in video_urls
+        ))
+    
+    asyncio.run(run())
+    results = []
+    while not result_queue.empty():
+        results.append(result_queue.get())
+    return results
+
+def test_streams_items_then_done(db_conn):
+    browser = StubBrowser([StubPage([[record("t1"), record("t2", "")], [record("t3")]])])
+    results = scrape(browser, ["https://www.youtube.com/watch?v=vid00000001"])
+    
+    kinds = [result[0] for result in results]
+    assert kinds[-1] == "done" and set(kinds[:-1]) == {"items"}
+    streamed = [thread_id for result in results[:-1] for thread_id in result[2].thread_ids]
+    assert streamed == ["t1", "t3"]
+    
+    _, video_info, items, found_count = results[-1]
+    assert video_info["title"] == "stub title"
+    assert list(items.thread_ids) == ["t1", "t3"] and found_count == 3
+    assert browser.contexts[0].closed
+
+def test_failed_context_only_fails_that_video(db_conn):
+    # 第二部影片開分頁時失敗，不能中斷 gather，也要通知寫入者
+    browser = StubBrowser([StubPage([[record("t1")]])])
+    results = scrape(browser, ["https://www.youtube.com/watch?v=vid00000001",
+                               "https://www.youtube.com/watch?v=vid00000002"], concurrency=1)
+    
+    assert [result[0] for result in results if result[0] != "items"] == ["done", "failed"]
+    assert results[-1][1] == "https://www.youtube.com/watch?v=vid00000002"
+    assert isinstance(results[-1][2], RuntimeError)
+
+def test_failed_resume_lookup_is_reported(db_conn, monkeypatch):
+    def broken_lookup(video_id, incremental):
+        raise OSError("database is unavailable")
+    
+    monkeypatch.setattr(async_engine, "load_resume_state", broken_lookup)
+    browser = StubBrowser([StubPage([])])
+    results = scrape(browser, ["https://www.youtube.com/watch?v=vid00000001"])
+    
+    assert [result[0] for result in results] == ["failed"]
+    # 還沒開分頁就失敗，沒有 context 要關
+    assert browser.contexts == []
+
+def test_writer_counts_async_results(db_conn):
+    browser = StubBrowser([StubPage([[record("t1")]])])
+    results = scrape(browser, ["https://www.youtube.com/watch?v=vid00000001",
+                               "https://www.youtube.com/watch?v=vid00000002"], concurrency=1)
+    
+    result_queue = queue.Queue()
+    for result in results + [batch.STOP]:
+        result_queue.put(result)
+    stats = {"done": 0, "failed": 0}
+    batch.db_writer(result_queue, stats, {})
+    
+    assert stats == {"done": 1, "failed": 1}
+    assert db_conn.execute("SELECT thread_id FROM super_thanks").fetchall() == [("t1",)]
\ No newline at end of file
@@ -0,0 +1,69 @@
+import pytest
+from config import SCROLL_SETTINGS
+from scraper import browser
+
+class FakeElement:
+    def __init__(self, name, events):
+        self.name = name
+        self.events = events
+    
+    def is_displayed(self):
+        return True
+    
+    def is_enabled(self):
+        return True
+    
+    def click(self):
+        self.events.append(f"click {self.name}")
+
+class SortDriver:
+    """只模擬排序選單：點選後第 resort_after 次檢查時第一則評論串才換掉"""
+    def __init__(self, resort_after=3):
+        self.events = []
+        self.checks = 0
+        self.resort_after = resort_after
+    
+    def execute_script(self, script, *args):
+        if script == browser.MARK_FIRST_THREAD_SCRIPT:
+            self.events.append("mark")
+        elif script == browser.FIRST_THREAD_CHANGED_SCRIPT:
+            self.checks += 1
+            changed = self.checks >= self.resort_after
+            self.events.append(f"check {changed}")
+            return changed
+    
+    def find_element(self, by, selector):
+        return FakeElement("trigger", self.events)
+    
+    def find_elements(self, by, selector):
+        return [FakeElement("top", self.events), FakeElement("newest", self.events)]
+
+@pytest.fixture(autouse=True)
+def fast_polling(monkeypatch):
+    monkeypatch.setitem(SCROLL_SETTINGS, "poll_interval", 0.01)
+
+def test_sort_waits_until_first_thread_changes():
+    driver = SortDriver(resort_after=3)
+    assert browser.sort_comments_by_newest(driver, timeout=2)
+    assert driver.events == [
+        "click trigger", "mark", "click newest", "check False", "check False", "check True"
+    ]
+
+def test_sort_reports_failure_when_comments_never_reload():
+    driver = SortDriver(resort_after=10 ** 6)
+    assert not browser.sort_comments_by_newest(driver, timeout=0.1)
+    assert driver.events[:3] == ["click trigger", "mark", "click newest"]
+def test_missing_psutil_warns_once(monkeypatch, capsys):
+    monkeypatch.setattr(browser, "psutil", None)
+    monkeypatch.setattr(browser, "_warned_no_psutil", False)
+    
+    browser.BrowserPool(max_rss_mb=1500)
+    browser.BrowserPool(max_rss_mb=1500)
+    assert capsys.readouterr().out.count("警告") == 1
+
+def test_no_warning_without_rss_limit(monkeypatch, capsys):
+    monkeypatch.setattr(browser, "psutil", None)
+    monkeypatch.setattr(browser, "_warned_no_psutil", False)
+    
+    browser.BrowserPool(max_rss_mb=0)
+    assert "psutil" not in capsys.readouterr().out
\ No newline at end of file
@@ -0,0 +1,103 @@
+"""continuation 抓取流程的重播測試
+
+fixtures/continuation_synthetic 中的回應是依 youtubei/v1/next 的結構手寫的合成資料，不是實際錄下的流量，
+只驗證 ContinuationClient 的翻頁、token 傳遞及解析流程；真實回應格式改變時這些測試不會發現
+"""
+import os
+import pytest
+from scraper import continuation
+from scraper.continuation import ContinuationClient, ReplayTransport
+from scraper.scraper import fetch_super_thanks_continuation
+
+# 與 RecordingTransport 錄下的檔案格式相同：0001 為影片頁面，之後依序為每個 youtubei/v1/next 的回應
+SYNTHETIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "continuation_synthetic")
+
+class RequestLog(ReplayTransport):
+    """重播回應，並記下每個請求送出的 continuation token"""
+    def __init__(self, directory):
+        super().__init__(directory)
+        self.tokens = []
+    
+    def __call__(self, url, data=None, headers=None):
+        if data is not None:
+            self.tokens.append(data["continuation"])
+        return super().__call__(url, data, headers)
+
+def replay(name):
+    transport = RequestLog(os.path.join(SYNTHETIC_DIR, name))
+    return ContinuationClient(transport), transport
+
+def fetch(name, **kwargs):
+    client, transport = replay(name)
+    pages = []
+    video_info, items, found_count = fetch_super_thanks_continuation(
+        client, f"https://www.youtube.com/watch?v={name}",
+        on_items=lambda video_info, items, progress: pages.append(list(items.thread_ids)),
+        **kwargs
+    )
+    return video_info, items, found_count, pages, transport
+
+def test_watch_page_settings():
+    client, _ = replay("top_comments")
+    page = continuation.load_watch_page(client, "https://www.youtube.com/watch?v=vidTopFixt1")
+    
+    assert page["api_key"] == "AIzaSyFixtureKey0000000000000000000"
+    assert page["context"]["client"]["clientVersion"] == "2.20240611.01.00"
+    assert continuation.find_comments_token(page["initial_data"]) == "Eg0SC3ZpZFRvcEZpeHQx"
+    assert continuation.get_video_info(page, "vidTopFixt1", "url")["title"] == "週末開箱影片"
+
+def test_comment_renderer_and_view_model_pages():
+    video_info, items, found_count, pages, transport = fetch("top_comments")
+    
+    assert (video_info["title"], video_info["channel"]) == ("週末開箱影片", "開箱頻道")
+    assert transport.tokens == ["Eg0SC3ZpZFRvcEZpeHQx", "Eg0PAGE2-vidTopFixt1"]
+    
+    # 第一頁 commentRenderer，第二頁 commentViewModel + commentEntityPayload，沒有留言 ID 時用位置編號
+    assert pages == [["UgxTopPinned01", "UgxTopYen00003"], ["UgxTopVm000004", "UgxTopVm000006", None]]
+    assert found_count == 5
+    
+    records = [(r.thread_id, r.currency, r.amount, r.commenter_name, r.comment_text) for r in items]
+    assert records == [
+        ("UgxTopPinned01", "$", 1500.0, "fanclub", "謝謝你們一直以來的影片"),
+        ("UgxTopYen00003", "¥", 500.0, "yuki", "いつも楽しく見ています"),
+        ("UgxTopVm000004", "$", 75.0, "viewmodel", "新版留言格式"),
+        ("UgxTopVm000006", "€", 2.0, "pierre", "Merci"),
+        (None, "₹", 100000.0, "raj", "Thank you"),
+    ]
+
+def test_parse_continuation_reads_pinned_and_sort_tokens():
+    client, _ = replay("top_comments")
+    page = continuation.load_watch_page(client, "url")
+    response = client.post("url", {"continuation": continuation.find_comments_token(page["initial_data"])})
+    records, next_token, sort_tokens = continuation.parse_continuation(response)
+    
+    assert [record["pinned"] for record in records] == [True, False]
+    assert next_token == "Eg0PAGE2-vidTopFixt1"
+    assert sort_tokens == ["Eg0TOP-vidTopFixt1", "Eg0NEW-vidTopFixt1"]
+
+def test_newest_first_uses_sort_token():
+    _, items, _, pages, transport = fetch("newest_first", incremental=True)
+    
+    # 熱門排序的第一頁只用來取得「由新到舊」的 token，它的留言不算
+    assert transport.tokens == [
+        "Eg0SC3ZpZE5ld0ZpeHQy", "Eg0NEW-vidNewFixt2", "Eg0NEWPAGE2-vidNewFixt2", "Eg0NEWPAGE3-vidNewFixt2"
+    ]
+    assert pages[0] == ["UgxNewPinned01", "UgxNewest00002"]
+    assert "UgxTopOnly0001" not in items.thread_ids
+    assert len(items) == 6
+
+def test_incremental_stops_at_saved_thread():
+    known = {"UgxNewPinned01", "UgxOldSaved005"}
+    _, items, _, pages, transport = fetch("newest_first", incremental=True, known_thread_ids=known)
+    
+    # 置頂的舊留言不代表之後都是舊資料，遇到第一個非置頂的已存留言才停止
+    assert transport.tokens[-1] == "Eg0NEWPAGE2-vidNewFixt2"
+    assert pages == [["UgxNewest00002"], ["UgxNewest00004", "UgxOldSaved006"]]
+    assert list(items.currencies) == ["€", "HK$", "¥"]
+
+def test_replay_runs_out_of_responses():
+    client, _ = replay("top_comments")
+    for _ in range(3):
+        client.get("url")
+    with pytest.raises(IndexError):
+        client.get("url")
\ No newline at end of file
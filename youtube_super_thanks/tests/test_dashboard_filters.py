@@ -0,0 +1,83 @@
+import pytest
+from database.db_queries import save_super_thanks, save_video_info
+from database.models import SuperThanksBatch
+from database.pool import get_read_pool
+
+VIDEO_INFO = {"video_id": "vid00000001", "video_url": "https://www.youtube.com/watch?v=vid00000001",
+              "title": "title", "channel": "channel"}
+
+ROWS = [
+    ("US$", 5.0, "t1", "Alice", 150.0),
+    ("us$", 10.0, "t2", "alice_fan", 300.0),
+    ("¥", 200.0, "t3", "Bob", 45.0),
+    ("€", 2.0, "t4", None, 65.0),
+]
+
+@pytest.fixture
+def dashboard(db_conn):
+    import dashboard
+    items = SuperThanksBatch()
+    for currency, amount, thread_id, commenter_name, amount_twd in ROWS:
+        items.append(currency, amount, thread_id, commenter_name, "text", amount_twd=amount_twd)
+    save_video_info(db_conn, VIDEO_INFO)
+    save_super_thanks(db_conn, VIDEO_INFO["video_id"], items)
+    yield dashboard
+    # 連線池是整個程序共用的，閒置連線還指向這次測試的暫存資料庫
+    get_read_pool().close()
+
+def filtered_currencies(dashboard, filter_query):
+    rows, _ = dashboard.load_super_thanks_page(VIDEO_INFO["video_id"], 0, 20, [], filter_query)
+    return sorted(row["currency"] for row in rows)
+
+@pytest.mark.parametrize("filter_query,expected", [
+    ("{amount_twd} > 100", ["US$", "us$"]),
+    ("{amount_twd} ge 150 && {amount} lt 10", ["US$"]),
+    # 預設區分大小寫，i 開頭的運算子不區分 (表格的 Aa 切換)
+    ('{commenter_name} contains "ali"', ["us$"]),
+    ("{commenter_name} icontains ALI", ["US$", "us$"]),
+    ("{commenter_name} scontains Ali", ["US$"]),
+    ("{currency} = US$", ["US$"]),
+    ("{currency} ieq US$", ["US$", "us$"]),
+    ("{currency} i!= us$", ["¥", "€"]),
+    ("{commenter_name} datestartswith B", ["¥"]),
+    ("{commenter_name} is blank", ["€"]),
+    # 沒有引號的數字在 contains 中仍當作字串比對
+    ("{amount} contains 20", ["¥"]),
+])
+def test_filter_operators(dashboard, filter_query, expected):
+    assert filtered_currencies(dashboard, filter_query) == expected
+
+@pytest.mark.parametrize("filter_query", [
+    "{amount} is even",
+    "{title} = 1",
+    "{amount} >",
+    "amount > 1",
+])
+def test_unsupported_filter_is_rejected(dashboard, filter_query):
+    with pytest.raises(ValueError):
+        dashboard.load_super_thanks_page(VIDEO_INFO["video_id"], 0, 20, [], filter_query)
+
+def test_table_callback_shows_filter_error(dashboard):
+    data, page_count, message = dashboard.update_super_thanks_table(0, 20, [], "{amount} is even", VIDEO_INFO["video_id"])
+    assert data == [] and page_count == 1
+    assert "is even" in message
+    
+    data, _, message = dashboard.update_super_thanks_table(0, 20, [], "{amount} > 100", VIDEO_INFO["video_id"])
+    assert [row["commenter_name"] for row in data] == ["Bob"] and message == ""
+@pytest.mark.parametrize("column", ["currency", "amount", "amount_twd", "commenter_name"])
+@pytest.mark.parametrize("direction", ["asc", "desc"])
+def test_table_sort_reads_along_index(dashboard, db_conn, column, direction):
+    where, params, order_by = dashboard.build_table_query(
+        VIDEO_INFO["video_id"], [{"column_id": column, "direction": direction}], ""
+    )
+    plan = db_conn.execute(
+        f"EXPLAIN QUERY PLAN SELECT * FROM super_thanks WHERE {where} ORDER BY {order_by} LIMIT 50", params
+    ).fetchall()
+    details = " / ".join(row[-1] for row in plan)
+    assert "USING INDEX" in details and "TEMP B-TREE" not in details
+
+def test_table_sort_order(dashboard):
+    rows, _ = dashboard.load_super_thanks_page(
+        VIDEO_INFO["video_id"], 0, 20, [{"column_id": "amount", "direction": "desc"}], ""
+    )
+    assert [row["amount"] for row in rows] == [200.0, 10.0, 5.0, 2.0]
\ No newline at end of file
@@ -0,0 +1,45 @@
+import json
+import os
+import pathlib
+import time
+import pytest
+from scraper.extractor import extract_new_super_thanks, extract_super_thanks, extract_super_thanks_script
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+COMMENTS_PAGE = pathlib.Path(FIXTURES_DIR, "comments.html").as_uri()
+
+with open(os.path.join(FIXTURES_DIR, "comments_expected.json"), encoding="utf-8") as f:
+    EXPECTED_RECORDS = json.load(f)
+
+@pytest.fixture
+def comments_page(chrome):
+    # 每個測試重新載入，串流模式的 data-st-done 標記不會互相影響
+    chrome.get(COMMENTS_PAGE)
+    return chrome
+
+@pytest.mark.parametrize("mode", ["script", "element"])
+def test_extract_modes_read_each_thread(comments_page, mode):
+    records = extract_super_thanks(comments_page, mode)
+    
+    # 依評論串逐筆比對：沒有晶片及只有付費回覆的評論串略過，回覆的作者及內容不會混進主留言
+    assert [record["thread_id"] for record in records] == [record["thread_id"] for record in EXPECTED_RECORDS]
+    for record, expected in zip(records, EXPECTED_RECORDS):
+        assert record == expected
+
+def test_script_mode_batches(comments_page):
+    assert extract_super_thanks_script(comments_page, batch_size=2) == EXPECTED_RECORDS
+
+def test_streaming_extract_only_returns_new_threads(comments_page):
+    assert extract_new_super_thanks(comments_page) == EXPECTED_RECORDS
+    assert extract_new_super_thanks(comments_page) == []
+
+def test_extract_mode_timing(comments_page):
+    timings = {}
+    for mode in ("script", "element"):
+        start = time.perf_counter()
+        extract_super_thanks(comments_page, mode)
+        timings[mode] = time.perf_counter() - start
+    
+    print(f"\nscript: {timings['script'] * 1000:.1f} ms, element: {timings['element'] * 1000:.1f} ms")
+    # 一次往返 vs 每個元素一次往返
+    assert timings["script"] < timings["element"]
\ No newline at end of file
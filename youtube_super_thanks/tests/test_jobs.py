@@ -0,0 +1,170 @@
+import threading
+import pytest
+import worker
+from config import JOB_SETTINGS
+from database.db_init import get_db_connection
+from database.db_queries import (
+    claim_job, enqueue_job, fail_job, finish_job, get_checkpoint, list_jobs, requeue_running_jobs, save_checkpoint
+)
+from scraper.scraper import resume_from_checkpoint
+
+def video_url(video_id):
+    return f"https://www.youtube.com/watch?v={video_id}"
+
+def add_job(conn, video_id, **kwargs):
+    job_id, _ = enqueue_job(conn, video_id, video_url(video_id), **kwargs)
+    return job_id
+
+def job_row(conn, job_id):
+    cursor = conn.execute("SELECT * FROM scrape_jobs WHERE id = ?", (job_id,))
+    columns = [description[0] for description in cursor.description]
+    return dict(zip(columns, cursor.fetchone()))
+
+def seconds_until_next_run(conn, job_id):
+    return conn.execute('''
+    SELECT strftime('%s', next_run_at) - strftime('%s', 'now') FROM scrape_jobs WHERE id = ?
+    ''', (job_id,)).fetchone()[0]
+
+def test_enqueue_reuses_pending_job(db_conn):
+    job_id, created = enqueue_job(db_conn, "vid00000001", video_url("vid00000001"))
+    assert created
+    assert enqueue_job(db_conn, "vid00000001", video_url("vid00000001")) == (job_id, False)
+    
+    # 做完之後可以再排入新的工作
+    claim_job(db_conn, "worker-1")
+    finish_job(db_conn, job_id)
+    assert enqueue_job(db_conn, "vid00000001", video_url("vid00000001"))[1]
+
+def test_claim_marks_job_running(db_conn):
+    first = add_job(db_conn, "vid00000001", incremental=True)
+    second = add_job(db_conn, "vid00000002")
+    
+    job = claim_job(db_conn, "worker-1")
+    assert job == {"id": first, "video_id": "vid00000001", "video_url": video_url("vid00000001"),
+                   "incremental": True, "attempts": 1, "max_attempts": JOB_SETTINGS["max_attempts"]}
+    row = job_row(db_conn, first)
+    assert (row["status"], row["worker"], row["attempts"]) == ("running", "worker-1", 1)
+    
+    assert claim_job(db_conn, "worker-1")["id"] == second
+    assert claim_job(db_conn, "worker-1") is None
+
+def test_claimed_job_is_not_claimed_again(db_conn):
+    add_job(db_conn, "vid00000001")
+    other = get_db_connection()
+    try:
+        assert claim_job(db_conn, "worker-1") is not None
+        assert claim_job(other, "worker-2") is None
+    finally:
+        other.close()
+
+def test_concurrent_workers_claim_each_job_once(db_conn):
+    job_ids = [add_job(db_conn, f"vid{i:08d}") for i in range(40)]
+    claimed = {}
+    start = threading.Barrier(4)
+    
+    def claim_all(name):
+        conn = get_db_connection(timeout=30)
+        try:
+            start.wait()
+            while (job := claim_job(conn, name)) is not None:
+                claimed.setdefault(job["id"], []).append(name)
+        finally:
+            conn.close()
+    
+    threads = [threading.Thread(target=claim_all, args=(f"worker-{i}",)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert sorted(claimed) == job_ids
+    assert all(len(names) == 1 for names in claimed.values())
+    assert db_conn.execute("SELECT COUNT(*) FROM scrape_jobs WHERE attempts != 1").fetchone()[0] == 0
+
+@pytest.mark.parametrize("attempts, expected", [(1, 60), (2, 120), (3, 240), (8, 3600)])
+def test_fail_job_backs_off_exponentially(db_conn, monkeypatch, attempts, expected):
+    monkeypatch.setitem(JOB_SETTINGS, "backoff_base", 60)
+    monkeypatch.setitem(JOB_SETTINGS, "backoff_max", 3600)
+    job_id = add_job(db_conn, "vid00000001", max_attempts=10)
+    job = claim_job(db_conn, "worker-1")
+    job["attempts"] = attempts
+    
+    assert fail_job(db_conn, job, RuntimeError("boom")) == expected
+    row = job_row(db_conn, job_id)
+    assert (row["status"], row["last_error"]) == ("queued", "boom")
+    assert expected - 1 <= seconds_until_next_run(db_conn, job_id) <= expected
+    
+    # 還沒到重試時間，不會被取出
+    assert claim_job(db_conn, "worker-1") is None
+
+def test_fail_job_gives_up_after_max_attempts(db_conn):
+    job_id = add_job(db_conn, "vid00000001", max_attempts=2)
+    for _ in range(2):
+        job = claim_job(db_conn, "worker-1")
+        delay = fail_job(db_conn, job, RuntimeError("boom"))
+        # 跳過等待時間
+        db_conn.execute("UPDATE scrape_jobs SET next_run_at = CURRENT_TIMESTAMP WHERE id = ?", (job_id,))
+        db_conn.commit()
+    
+    assert delay is None
+    row = job_row(db_conn, job_id)
+    assert (row["status"], row["attempts"]) == ("failed", 2)
+    assert row["finished_at"] is not None
+    assert claim_job(db_conn, "worker-1") is None
+
+def test_requeue_running_jobs(db_conn):
+    running = add_job(db_conn, "vid00000001")
+    claim_job(db_conn, "worker-1")
+    done = add_job(db_conn, "vid00000002")
+    finish_job(db_conn, claim_job(db_conn, "worker-1")["id"])
+    queued = add_job(db_conn, "vid00000003")
+    
+    assert requeue_running_jobs(db_conn) == 1
+    statuses = {job_id: job_row(db_conn, job_id)["status"] for job_id in (running, done, queued)}
+    assert statuses == {running: "queued", done: "done", queued: "queued"}
+    
+    # 重新取出時算第二次嘗試
+    assert claim_job(db_conn, "worker-2") == {
+        "id": running, "video_id": "vid00000001", "video_url": video_url("vid00000001"),
+        "incremental": False, "attempts": 2, "max_attempts": JOB_SETTINGS["max_attempts"]
+    }
+
+def test_new_run_resets_checkpoint_progress(db_conn):
+    add_job(db_conn, "vid00000001")
+    progress = {"scroll_count": 12, "threads_found": 240, "seen_thread_ids": ["t1", "t2"]}
+    save_checkpoint(db_conn, "vid00000001", "done", progress, rows_saved=30)
+    
+    claim_job(db_conn, "worker-1")
+    resume_from_checkpoint(db_conn, "vid00000001")
+    
+    job = list_jobs(db_conn)[0]
+    assert (job["status"], job["scroll_count"], job["threads_found"], job["rows_saved"]) == ("running", 0, 0, 0)
+    checkpoint = get_checkpoint(db_conn, "vid00000001")
+    assert checkpoint["status"] == "running"
+    assert checkpoint["seen_thread_ids"] == ["t1", "t2"]
+    
+    # 這次抓取的進度從零開始累加
+    save_checkpoint(db_conn, "vid00000001", "running", {"scroll_count": 1, "threads_found": 20}, rows_saved=5)
+    assert get_checkpoint(db_conn, "vid00000001")["rows_saved"] == 5
+
+def test_job_worker_finishes_and_retries(db_conn, monkeypatch):
+    failing = add_job(db_conn, "vid00000001")
+    passing = add_job(db_conn, "vid00000002")
+    stop_event = threading.Event()
+    calls = []
+    
+    def fake_scrape(url, pool, incremental, raise_errors):
+        calls.append(url)
+        assert raise_errors
+        if url == video_url("vid00000001"):
+            raise RuntimeError("boom")
+        stop_event.set()
+    
+    monkeypatch.setattr(worker, "scrape_super_thanks", fake_scrape)
+    worker._job_worker(1, None, stop_event, poll_interval=0)
+    
+    assert calls == [video_url("vid00000001"), video_url("vid00000002")]
+    failed = job_row(db_conn, failing)
+    assert (failed["status"], failed["last_error"], failed["attempts"]) == ("queued", "boom", 1)
+    assert seconds_until_next_run(db_conn, failing) > 0
+    assert job_row(db_conn, passing)["status"] == "done"
\ No newline at end of file
@@ -0,0 +1,14 @@
+import builtins
+import pytest
+import main
+
+@pytest.mark.parametrize("answers,expected,retries", [
+    ([""], None, 0),
+    (["4"], 4, 0),
+    (["4x", "0", "-2", " 3 "], 3, 3),
+])
+def test_ask_workers_reprompts_on_bad_input(monkeypatch, capsys, answers, expected, retries):
+    answers = iter(answers)
+    monkeypatch.setattr(builtins, "input", lambda prompt: next(answers))
+    assert main.ask_workers() == expected
+    assert capsys.readouterr().out.count("無效的數量請重試") == retries
\ No newline at end of file
@@ -0,0 +1,59 @@
+import sys
+from datetime import datetime
+import pytest
+from database.models import SuperThanks, SuperThanksBatch
+
+def make_batch():
+    batch = SuperThanksBatch("vid00000001")
+    batch.append("US$", 5.0, "t1", "alice", "hi", comment_date=1700000000.0, amount_twd=150.0)
+    # 解析出來的貨幣代碼通常是切出來的新字串
+    batch.append("NT$75.00"[:3], 75.0, None, "bob", "", comment_date=1700000060.0)
+    return batch
+
+def test_append_and_iterate():
+    batch = make_batch()
+    assert len(batch) == 2
+    
+    first, second = list(batch)
+    assert isinstance(first, SuperThanks)
+    assert first.to_dict() == {
+        "id": None, "video_id": "vid00000001", "thread_id": "t1", "currency": "US$", "amount": 5.0,
+        "amount_twd": 150.0, "commenter_name": "alice", "comment_text": "hi",
+        "comment_date": datetime.fromtimestamp(1700000000.0), "scrape_date": None,
+    }
+    assert (second.thread_id, second.currency, second.amount_twd) == (None, "NT$", 0.0)
+
+def test_currencies_are_interned():
+    batch = make_batch()
+    batch.append("NT$12.00"[:3], 12.0)
+    assert batch.currencies[1] is batch.currencies[2] is sys.intern("NT$")
+
+def test_rows_match_insert_columns():
+    batch = make_batch()
+    assert list(batch.rows()) == [
+        ("vid00000001", "t1", "US$", 5.0, 150.0, "alice", "hi", datetime.fromtimestamp(1700000000.0)),
+        ("vid00000001", None, "NT$", 75.0, 0.0, "bob", "", datetime.fromtimestamp(1700000060.0)),
+    ]
+    assert [row[0] for row in batch.rows("other")] == ["other", "other"]
+
+def test_from_records_round_trip():
+    batch = make_batch()
+    rebuilt = SuperThanksBatch.from_records(list(batch), "vid00000001")
+    assert list(rebuilt.rows()) == list(batch.rows())
+    
+    from_dicts = SuperThanksBatch.from_records([record.to_dict() for record in batch], "vid00000001")
+    assert list(from_dicts.rows()) == list(batch.rows())
+
+def test_extend_and_currency_totals():
+    batch = make_batch()
+    batch.extend(make_batch())
+    assert len(batch) == 4
+    assert batch.thread_ids == ["t1", None, "t1", None]
+    assert batch.currency_totals() == {"US$": 10.0, "NT$": 150.0}
+
+def test_set_amounts_twd_checks_length():
+    batch = make_batch()
+    batch.set_amounts_twd([150.0, 75.0])
+    assert list(batch.amounts_twd) == [150.0, 75.0]
+    with pytest.raises(ValueError):
+        batch.set_amounts_twd([1.0])
\ No newline at end of file
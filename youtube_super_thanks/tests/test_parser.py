@@ -0,0 +1,83 @@
+import os
+import pytest
+from scraper.parser import (
+    extract_video_id,
+    normalize_video_url,
+    parse_amount,
+    parse_currency_amount,
+    parse_currency_amounts,
+)
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+def load_chip_corpus():
+    """讀取 fixtures/currency_chips.tsv: 金額晶片字串、預期貨幣、預期金額"""
+    cases = []
+    with open(os.path.join(FIXTURES_DIR, "currency_chips.tsv"), encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\r\n")
+            if line.startswith("#"):
+                continue
+            text, currency, amount = (line.split("\t") + ["", ""])[:3]
+            if currency:
+                cases.append((text, currency, float(amount)))
+            else:
+                cases.append((text, None, None))
+    return cases
+
+CHIP_CORPUS = load_chip_corpus()
+
+@pytest.mark.parametrize("text,currency,amount", CHIP_CORPUS, ids=[case[0] or "<empty>" for case in CHIP_CORPUS])
+def test_golden_chip_corpus(text, currency, amount):
+    assert parse_currency_amount(text) == (currency, amount)
+
+@pytest.mark.parametrize("text,expected", [
+    # 只有一個逗號且後面兩位數：小數逗號
+    ("€2,00", ("€", 2.0)),
+    # 三位一組的單一分隔符號一律當千分位
+    ("IDR 10.000", ("IDR", 10000.0)),
+    ("US$1.500", ("US$", 1500.0)),
+    # 印度的 lakh 分組
+    ("₹1,00,000", ("₹", 100000.0)),
+])
+def test_pinned_ambiguous_separators(text, expected):
+    assert parse_currency_amount(text) == expected
+
+@pytest.mark.parametrize("number_text,expected", [
+    ("1,234.56", 1234.56),
+    ("1.234,56", 1234.56),
+    ("1 234,56", 1234.56),
+    ("12,50", 12.5),
+    ("1,00,000", 100000.0),
+    ("1.000.000", 1000000.0),
+    ("10,00,000.25", 1000000.25),
+])
+def test_parse_amount(number_text, expected):
+    assert parse_amount(number_text) == expected
+
+def test_parse_amount_rejects_garbage():
+    with pytest.raises(ValueError):
+        parse_amount("1.2.3,4,5")
+
+def test_parse_currency_amounts_strips_whitespace():
+    assert parse_currency_amounts(["  US$5.00\n", "NT$75.00"]) == [("US$", 5.0), ("$", 75.0)]
+
+@pytest.mark.parametrize("url,expected", [
+    ("https://www.youtube.com/watch?v=dQw4w9WgXcQ", "dQw4w9WgXcQ"),
+    ("https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=42s", "dQw4w9WgXcQ"),
+    ("https://youtu.be/dQw4w9WgXcQ?si=abc", "dQw4w9WgXcQ"),
+    ("https://www.youtube.com/watch?feature=share&v=dQw4w9WgXcQ", "dQw4w9WgXcQ"),
+    ("youtube.com/watch?v=dQw4w9WgXcQ", "dQw4w9WgXcQ"),
+    ("https://www.youtube.com/shorts/dQw4w9WgXcQ", "dQw4w9WgXcQ"),
+    ("https://www.youtube.com/live/dQw4w9WgXcQ?si=abc", "dQw4w9WgXcQ"),
+    # 本機 fixture 伺服器的路徑
+    ("http://127.0.0.1:8000/video/fixture0001.html", "fixture0001"),
+    ("http://127.0.0.1:8000/video/fixture0001/", "fixture0001"),
+    ("dQw4w9WgXcQ", "dQw4w9WgXcQ"),
+])
+def test_extract_video_id(url, expected):
+    assert extract_video_id(url) == expected
+
+def test_normalize_video_url():
+    assert normalize_video_url(" dQw4w9WgXcQ ") == "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+    assert normalize_video_url("https://youtu.be/dQw4w9WgXcQ") == "https://youtu.be/dQw4w9WgXcQ"
\ No newline at end of file
@@ -0,0 +1,126 @@
+import numpy as np
+import pytest
+from database.db_queries import save_super_thanks, save_video_info
+from database.models import SuperThanksBatch
+from database.rates import CurrencyRateTable, RateHistory, load_rate_history_csv, recompute_amount_twd
+
+# 每種貨幣的匯率歷史: US$ 從 2024-01-01 起 30，2024-06-01 起 32；¥ 只有一筆
+HISTORY = [
+    ("US$", "2024-01-01", 30.0),
+    ("US$", "2024-06-01", 32.0),
+    ("¥", "2024-03-01", 0.21),
+]
+
+@pytest.fixture
+def rate_conn(db_conn):
+    """只留下測試用的匯率歷史，目前匯率 US$ 為 31、€ 為 35"""
+    with db_conn:
+        db_conn.execute("DELETE FROM currency_rate_history")
+        db_conn.executemany('''
+        INSERT INTO currency_rate_history (currency, effective_date, rate_to_twd, source)
+        VALUES (?, ?, ?, 'test')
+        ''', HISTORY)
+        db_conn.execute("DELETE FROM currency_rates")
+        db_conn.executemany('INSERT INTO currency_rates (currency, rate_to_twd) VALUES (?, ?)',
+                            [("US$", 31.0), ("€", 35.0)])
+    return db_conn
+
+def convert_one(history, currency, day):
+    return history.convert([currency], [1.0], [day])[0]
+
+@pytest.mark.parametrize("day, expected", [
+    ("2023-12-31", 30.0),  # 比最早的歷史還早，用最早的匯率
+    ("2024-01-01", 30.0),  # 生效當天
+    ("2024-05-31", 30.0),
+    ("2024-06-01", 32.0),  # 新匯率生效當天
+    ("2025-01-01", 32.0),
+])
+def test_rate_history_picks_rate_in_effect(rate_conn, day, expected):
+    assert convert_one(RateHistory(rate_conn), "US$", day) == pytest.approx(expected)
+
+def test_rate_history_unknown_currency_uses_current_rate(rate_conn):
+    history = RateHistory(rate_conn)
+    # 沒有歷史但有目前匯率
+    assert convert_one(history, "€", "2024-06-01") == pytest.approx(35.0)
+    # 都沒有時用 default_rate
+    assert convert_one(history, "XYZ", "2024-06-01") == pytest.approx(1.0)
+    fallback = CurrencyRateTable(rate_conn, default_rate=0.0)
+    assert convert_one(RateHistory(rate_conn, fallback), "XYZ", "2024-06-01") == 0.0
+
+def test_rate_history_converts_mixed_column(rate_conn):
+    result = RateHistory(rate_conn).convert(
+        ["US$", "¥", "US$", "€"],
+        [5.0, 1000.0, 2.0, 1.0],
+        ["2024-02-01", "2024-03-01", "2024-07-01", "2024-07-01"]
+    )
+    np.testing.assert_allclose(result, [150.0, 210.0, 64.0, 35.0])
+    assert RateHistory(rate_conn).convert([], [], []).size == 0
+
+def test_currency_rate_table_convert(rate_conn):
+    rates = CurrencyRateTable(rate_conn)
+    np.testing.assert_allclose(rates.convert(["US$", "€", "XYZ", "US$"], [1.0, 2.0, 3.0, 4.0]),
+                               [31.0, 70.0, 3.0, 124.0])
+    
+    # 改了匯率後 invalidate 就重新載入
+    rate_conn.execute("UPDATE currency_rates SET rate_to_twd = 33.0 WHERE currency = 'US$'")
+    rate_conn.commit()
+    rates.invalidate()
+    assert rates.convert(["US$"], [1.0])[0] == pytest.approx(33.0)
+
+def test_load_rate_history_csv(rate_conn, tmp_path):
+    path = tmp_path / "rates.csv"
+    path.write_text(
+        "date,currency,rate_to_twd\n"
+        "2024-06-01,US$,32.5\n"  # 覆蓋同一天的匯率
+        "2024-09-01, US$ ,33\n"
+        "2024-01-15,€,34.0\n",
+        encoding="utf-8-sig"
+    )
+    
+    assert load_rate_history_csv(rate_conn, str(path)) == 3
+    history = RateHistory(rate_conn)
+    assert convert_one(history, "US$", "2024-08-31") == pytest.approx(32.5)
+    assert convert_one(history, "US$", "2024-09-01") == pytest.approx(33.0)
+    assert convert_one(history, "€", "2024-01-01") == pytest.approx(34.0)
+    
+    # 目前匯率更新為各貨幣最新的歷史匯率，沒匯入的貨幣不變
+    assert dict(rate_conn.execute("SELECT currency, rate_to_twd FROM currency_rates")) == {
+        "US$": 33.0, "€": 34.0
+    }
+    assert rate_conn.execute(
+        "SELECT source FROM currency_rate_history WHERE currency = '€'"
+    ).fetchone()[0] == str(path)
+
+def test_load_rate_history_csv_rejects_bad_date(rate_conn, tmp_path):
+    path = tmp_path / "rates.csv"
+    path.write_text("date,currency,rate_to_twd\n2024-06-01,US$,40\n2024/07/01,US$,41\n", encoding="utf-8")
+    
+    with pytest.raises(ValueError):
+        load_rate_history_csv(rate_conn, str(path))
+    # 整批在同一個交易，不會留下一半
+    assert convert_one(RateHistory(rate_conn), "US$", "2024-06-01") == pytest.approx(32.0)
+
+@pytest.mark.parametrize("chunk_size", [1, 4, 50000])
+def test_recompute_in_chunks_matches_single_conversion(rate_conn, chunk_size):
+    items = SuperThanksBatch()
+    rows = [("US$", 5.0), ("¥", 1000.0), ("US$", 2.0), ("€", 1.0), ("XYZ", 7.0), ("US$", 10.0)]
+    for i, (currency, amount) in enumerate(rows):
+        items.append(currency, amount, f"t{i}", "name", "text", amount_twd=0.0)
+    save_video_info(rate_conn, {"video_id": "vid00000001", "video_url": "https://www.youtube.com/watch?v=vid00000001",
+                                "title": "title", "channel": "channel"})
+    save_super_thanks(rate_conn, "vid00000001", items)
+    
+    scrape_dates = ["2023-06-01", "2024-03-01", "2024-06-01 08:00:00", "2024-07-01", "2024-07-01", "2024-12-31"]
+    ids = [row[0] for row in rate_conn.execute("SELECT id FROM super_thanks ORDER BY id")]
+    with rate_conn:
+        rate_conn.executemany("UPDATE super_thanks SET scrape_date = ? WHERE id = ?", zip(scrape_dates, ids))
+    
+    expected = RateHistory(rate_conn).convert([c for c, _ in rows], [a for _, a in rows],
+                                               [d[:10] for d in scrape_dates])
+    assert recompute_amount_twd(rate_conn, chunk_size=chunk_size) == len(rows)
+    actual = [row[0] for row in rate_conn.execute("SELECT amount_twd FROM super_thanks ORDER BY id")]
+    np.testing.assert_allclose(actual, expected)
+    np.testing.assert_allclose(actual, [150.0, 210.0, 64.0, 35.0, 7.0, 320.0])
+    
+    # 再算一次沒有變動，不會更新任何資料
+    assert recompute_amount_twd(rate_conn, chunk_size=1) == 0
\ No newline at end of file
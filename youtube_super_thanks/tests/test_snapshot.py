@@ -0,0 +1,91 @@
+import pytest
+from database.db_queries import save_super_thanks, save_video_info
+from database.models import SuperThanksBatch
+
+pytest.importorskip("pyarrow")
+from database.snapshot import (
+    export_snapshot, load_video_super_thanks, read_snapshot_table, snapshot_is_current, super_thanks_dataset
+)
+
+VIDEO_INFO = {"video_id": "vid00000001", "video_url": "https://www.youtube.com/watch?v=vid00000001",
+              "title": "title", "channel": "channel"}
+
+def add_rows(conn, *thread_ids):
+    items = SuperThanksBatch()
+    for thread_id in thread_ids:
+        items.append("US$", 5.0, thread_id, "name", "text", amount_twd=150.0)
+    save_video_info(conn, VIDEO_INFO)
+    save_super_thanks(conn, VIDEO_INFO["video_id"], items)
+
+def snapshot_amounts(directory):
+    df = load_video_super_thanks(VIDEO_INFO["video_id"], ["thread_id", "amount_twd"], directory)
+    return dict(zip(df["thread_id"], df["amount_twd"]))
+
+def test_incremental_export_appends_new_rows(db_conn, tmp_path):
+    directory = str(tmp_path / "snapshot")
+    add_rows(db_conn, "t1", "t2")
+    assert export_snapshot(db_conn, directory) == 2
+    
+    add_rows(db_conn, "t3")
+    assert export_snapshot(db_conn, directory) == 1
+    assert snapshot_is_current(db_conn, directory)
+    assert snapshot_amounts(directory) == {"t1": 150.0, "t2": 150.0, "t3": 150.0}
+
+def test_updated_rows_force_full_export(db_conn, tmp_path):
+    directory = str(tmp_path / "snapshot")
+    add_rows(db_conn, "t1", "t2")
+    export_snapshot(db_conn, directory)
+    
+    # 例如 recompute_amount_twd 依新匯率改寫已匯出的資料，之後又有新資料
+    with db_conn:
+        db_conn.execute("UPDATE super_thanks SET amount_twd = 160.0 WHERE thread_id = 't1'")
+    add_rows(db_conn, "t3")
+    
+    assert export_snapshot(db_conn, directory) == 3
+    assert snapshot_is_current(db_conn, directory)
+    assert snapshot_amounts(directory) == {"t1": 160.0, "t2": 150.0, "t3": 150.0}
+
+def test_deleted_rows_force_full_export(db_conn, tmp_path):
+    directory = str(tmp_path / "snapshot")
+    add_rows(db_conn, "t1", "t2")
+    export_snapshot(db_conn, directory)
+    
+    with db_conn:
+        db_conn.execute("DELETE FROM super_thanks WHERE thread_id = 't1'")
+    
+    assert export_snapshot(db_conn, directory) == 1
+    assert snapshot_amounts(directory) == {"t2": 150.0}
+
+def test_video_edit_makes_snapshot_stale(db_conn, tmp_path):
+    directory = str(tmp_path / "snapshot")
+    add_rows(db_conn, "t1")
+    export_snapshot(db_conn, directory)
+    assert snapshot_is_current(db_conn, directory)
+    
+    # 只改標題：沒有新的超級感謝，但 videos 快照已經過時
+    save_video_info(db_conn, dict(VIDEO_INFO, title="new title"))
+    assert not snapshot_is_current(db_conn, directory)
+    
+    assert export_snapshot(db_conn, directory) == 0
+    assert snapshot_is_current(db_conn, directory)
+    assert read_snapshot_table("videos", directory).column("title").to_pylist() == ["new title"]
+
+def test_rate_change_makes_snapshot_stale(db_conn, tmp_path):
+    directory = str(tmp_path / "snapshot")
+    add_rows(db_conn, "t1")
+    export_snapshot(db_conn, directory)
+    
+    with db_conn:
+        db_conn.execute("UPDATE currency_rates SET rate_to_twd = rate_to_twd + 1 WHERE currency = 'US$'")
+    assert not snapshot_is_current(db_conn, directory)
+
+def test_channel_rename_repartitions_snapshot(db_conn, tmp_path):
+    directory = str(tmp_path / "snapshot")
+    add_rows(db_conn, "t1", "t2")
+    export_snapshot(db_conn, directory)
+    
+    save_video_info(db_conn, dict(VIDEO_INFO, channel="renamed"))
+    # 已匯出的資料分割在舊頻道底下，必須整個重建
+    assert export_snapshot(db_conn, directory) == 2
+    channels = super_thanks_dataset(directory).to_table(columns=["channel"]).column("channel").to_pylist()
+    assert channels == ["renamed", "renamed"]
\ No newline at end of file
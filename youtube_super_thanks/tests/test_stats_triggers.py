@@ -0,0 +1,74 @@
+import pytest
+from database.db_queries import save_super_thanks, save_video_info
+from database.models import SuperThanksBatch
+from database.rates import recompute_amount_twd
+
+def video_info(video_id, channel):
+    return {"video_id": video_id, "video_url": f"https://www.youtube.com/watch?v={video_id}",
+            "title": video_id, "channel": channel}
+
+def add_rows(conn, video_id, channel, rows):
+    """rows: [(thread_id, currency, amount, amount_twd)]"""
+    items = SuperThanksBatch()
+    for thread_id, currency, amount, amount_twd in rows:
+        items.append(currency, amount, thread_id, "name", "text", amount_twd=amount_twd)
+    save_video_info(conn, video_info(video_id, channel))
+    return save_super_thanks(conn, video_id, items)
+
+def stats(conn, sql):
+    """只比對有資料的列，金額四捨五入避免浮點誤差"""
+    return sorted(
+        tuple(round(value, 6) if isinstance(value, float) else value for value in row)
+        for row in conn.execute(sql) if row[1]
+    )
+
+def assert_stats_match_group_by(conn):
+    assert stats(conn, "SELECT video_id, super_thanks_count, total_twd FROM video_stats") == stats(conn, '''
+        SELECT video_id, COUNT(*), SUM(amount_twd) FROM super_thanks GROUP BY video_id
+    ''')
+    assert stats(conn, "SELECT channel, super_thanks_count, total_twd FROM channel_stats") == stats(conn, '''
+        SELECT COALESCE(v.channel, ''), COUNT(*), SUM(s.amount_twd)
+        FROM super_thanks s LEFT JOIN videos v ON s.video_id = v.video_id
+        GROUP BY COALESCE(v.channel, '')
+    ''')
+    assert stats(conn, "SELECT currency, super_thanks_count, total_amount, total_twd FROM currency_stats") == stats(conn, '''
+        SELECT currency, COUNT(*), SUM(amount), SUM(amount_twd) FROM super_thanks GROUP BY currency
+    ''')
+
+@pytest.fixture
+def seeded(db_conn):
+    add_rows(db_conn, "vid00000001", "channel a", [("t1", "US$", 5.0, 150.0), ("t2", "¥", 200.0, 45.0)])
+    add_rows(db_conn, "vid00000002", "channel b", [("t3", "US$", 10.0, 300.0)])
+    return db_conn
+
+def test_insert_updates_stats(seeded):
+    assert_stats_match_group_by(seeded)
+    assert seeded.execute("SELECT super_thanks_count FROM currency_stats WHERE currency = 'US$'").fetchone() == (2,)
+
+def test_duplicate_rows_are_not_counted_twice(seeded):
+    # 同一則留言再抓一次：INSERT OR IGNORE 略過，觸發器不能累加
+    assert add_rows(seeded, "vid00000001", "channel a", [("t1", "US$", 5.0, 150.0), ("t4", "€", 2.0, 65.0)]) == 1
+    assert seeded.execute("SELECT super_thanks_count FROM video_stats WHERE video_id = 'vid00000001'").fetchone() == (3,)
+    assert_stats_match_group_by(seeded)
+
+def test_channel_rename_moves_stats(seeded):
+    save_video_info(seeded, video_info("vid00000001", "channel b"))
+    assert seeded.execute("SELECT super_thanks_count FROM channel_stats WHERE channel = 'channel b'").fetchone() == (3,)
+    assert_stats_match_group_by(seeded)
+    
+    # 影片資訊沒變時不能重複搬移
+    save_video_info(seeded, video_info("vid00000001", "channel b"))
+    assert_stats_match_group_by(seeded)
+
+def test_recompute_amount_twd_updates_stats(seeded):
+    with seeded:
+        seeded.execute("UPDATE currency_rate_history SET rate_to_twd = 32.0 WHERE currency = 'US$'")
+    # 每筆一批，確認分批更新時觸發器的累計也正確
+    assert recompute_amount_twd(seeded, chunk_size=1) > 0
+    assert seeded.execute("SELECT total_twd FROM currency_stats WHERE currency = 'US$'").fetchone() == (480.0,)
+    assert_stats_match_group_by(seeded)
+
+def test_delete_updates_stats(seeded):
+    with seeded:
+        seeded.execute("DELETE FROM super_thanks WHERE thread_id = 't1'")
+    assert_stats_match_group_by(seeded)
\ No newline at end of file
@@ -0,0 +1,147 @@
+import queue
+import sqlite3
+import threading
+import pytest
+from config import STREAMING_SETTINGS
+from database.db_init import get_db_connection
+from database.db_queries import save_checkpoint
+from database.models import SuperThanksBatch
+from database.rates import CurrencyRateTable
+from scraper import batch, browser
+from scraper.scraper import persist_super_thanks, resume_from_checkpoint
+
+VIDEO_INFO = {"video_id": "vid00000001", "video_url": "https://www.youtube.com/watch?v=vid00000001",
+              "title": "title", "channel": "channel"}
+
+def make_items(*thread_ids):
+    items = SuperThanksBatch()
+    for thread_id in thread_ids:
+        items.append("US$", 5.0, thread_id, "name", "text")
+    return items
+
+def saved_thread_ids(conn):
+    return {row[0] for row in conn.execute("SELECT thread_id FROM super_thanks")}
+
+def checkpoint_status(conn, video_id=VIDEO_INFO["video_id"]):
+    row = conn.execute("SELECT status FROM scrape_checkpoints WHERE video_id = ?", (video_id,)).fetchone()
+    return row and row[0]
+
+@pytest.fixture
+def fast_retries(monkeypatch):
+    monkeypatch.setitem(STREAMING_SETTINGS, "write_retries", 2)
+    monkeypatch.setitem(STREAMING_SETTINGS, "write_retry_delay", 0.05)
+
+class FakeDriver:
+    def execute_script(self, script, *args):
+        return 1000
+
+def test_on_scroll_errors_are_not_swallowed(monkeypatch):
+    # 每次滾動都有新評論，只有 on_scroll 會出錯
+    monkeypatch.setattr(browser, "wait_for_new_comments", lambda driver, count: (count + 20, 0.01))
+    calls = []
+    
+    def on_scroll(i, comments_count, latency):
+        calls.append(i)
+        raise sqlite3.OperationalError("database is locked")
+    
+    with pytest.raises(sqlite3.OperationalError):
+        browser.scroll_to_load_comments(FakeDriver(), max_scrolls=5, on_scroll=on_scroll)
+    assert calls == [0]
+
+def test_persist_retries_after_lock_is_released(db_conn, fast_retries):
+    db_conn.execute("PRAGMA busy_timeout = 10")
+    rates = CurrencyRateTable(db_conn)
+    
+    locker = get_db_connection(check_same_thread=False)
+    locker.execute("BEGIN IMMEDIATE")
+    threading.Timer(0.07, locker.rollback).start()
+    
+    persist_super_thanks(db_conn, VIDEO_INFO, make_items("t1", "t2"), rates, {"threads_found": 2})
+    locker.close()
+    
+    assert saved_thread_ids(db_conn) == {"t1", "t2"}
+    assert checkpoint_status(db_conn) == "running"
+
+def test_persist_rolls_back_and_raises_when_lock_is_held(db_conn, fast_retries):
+    db_conn.execute("PRAGMA busy_timeout = 10")
+    rates = CurrencyRateTable(db_conn)
+    
+    locker = get_db_connection(check_same_thread=False)
+    locker.execute("BEGIN IMMEDIATE")
+    try:
+        with pytest.raises(sqlite3.OperationalError):
+            persist_super_thanks(db_conn, VIDEO_INFO, make_items("t1"), rates)
+        assert not db_conn.in_transaction
+    finally:
+        locker.rollback()
+        locker.close()
+    
+    assert saved_thread_ids(db_conn) == set()
+
+def run_writer(results):
+    result_queue = queue.Queue()
+    for result in results:
+        result_queue.put(result)
+    result_queue.put(batch.STOP)
+    stats = {"done": 0, "failed": 0}
+    batch.db_writer(result_queue, stats, {})
+    return stats
+
+def test_writer_retries_unsaved_batch_before_done(db_conn, monkeypatch):
+    real_persist = batch.persist_super_thanks
+    calls = []
+    
+    def flaky_persist(*args):
+        calls.append(args[2].thread_ids)
+        if len(calls) == 1:
+            raise sqlite3.OperationalError("database is locked")
+        return real_persist(*args)
+    
+    monkeypatch.setattr(batch, "persist_super_thanks", flaky_persist)
+    stats = run_writer([
+        ("items", VIDEO_INFO, make_items("t1"), {"threads_found": 1}),
+        ("items", VIDEO_INFO, make_items("t2"), {"threads_found": 2}),
+        ("done", VIDEO_INFO, make_items("t1", "t2"), 2),
+    ])
+    
+    # 第一批失敗後，在第二批之前依序補寫
+    assert calls == [["t1"], ["t1"], ["t2"]]
+    assert stats == {"done": 1, "failed": 0}
+    assert saved_thread_ids(db_conn) == {"t1", "t2"}
+    assert checkpoint_status(db_conn) == "done"
+
+def test_writer_marks_video_failed_when_batch_cannot_be_saved(db_conn, monkeypatch):
+    def broken_persist(*args):
+        raise sqlite3.OperationalError("disk I/O error")
+    
+    monkeypatch.setattr(batch, "persist_super_thanks", broken_persist)
+    stats = run_writer([
+        ("items", VIDEO_INFO, make_items("t1"), {"threads_found": 1}),
+        ("done", VIDEO_INFO, make_items("t1"), 1),
+    ])
+    
+    assert stats == {"done": 0, "failed": 1}
+    assert checkpoint_status(db_conn) == "failed"
+
+def test_interrupted_incremental_run_resumes_with_full_scan(db_conn, capsys):
+    # 增量更新存了最新的一批後中斷
+    rates = CurrencyRateTable(db_conn)
+    progress = {"scroll_count": 3, "threads_found": 60, "seen_thread_ids": ["t1", "t2"]}
+    persist_super_thanks(db_conn, VIDEO_INFO, make_items("t1", "t2"), rates, progress)
+    save_checkpoint(db_conn, VIDEO_INFO["video_id"], "failed")
+    
+    assert resume_from_checkpoint(db_conn, VIDEO_INFO["video_id"], incremental=True) is False
+    out = capsys.readouterr().out
+    assert "已滾動 3 次，讀取 60 則評論串，已存 2 筆，最後一則 t2" in out
+    assert "改為完整掃描" in out
+    
+    # worker 用自己的連線讀取同樣的狀態
+    assert batch.load_resume_state(VIDEO_INFO["video_id"], True) == ({"t1", "t2"}, False)
+
+def test_finished_run_keeps_incremental(db_conn, capsys):
+    assert resume_from_checkpoint(db_conn, VIDEO_INFO["video_id"], incremental=True) is True
+    
+    persist_super_thanks(db_conn, VIDEO_INFO, make_items("t1"), CurrencyRateTable(db_conn), {"threads_found": 1})
+    save_checkpoint(db_conn, VIDEO_INFO["video_id"], "done")
+    assert resume_from_checkpoint(db_conn, VIDEO_INFO["video_id"], incremental=True) is True
+    assert "上次抓取沒有完成" not in capsys.readouterr().out
\ No newline at end of file
@@ -0,0 +1,151 @@
+import cProfile
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from config import TIMING_SETTINGS
+
+try:
+    from pyinstrument import Profiler
+except ImportError:
+    Profiler = None
+
+# 目前執行緒 / asyncio task 正在計時的抓取，沒有時各階段計時不做任何事
+_current_timer = contextvars.ContextVar("current_timer", default=None)
+
+class RunTimer:
+    """記錄一次抓取中各階段的次數、總耗時及最長耗時"""
+    
+    def __init__(self, video_id, engine=None):
+        self.video_id = video_id
+        self.engine = engine
+        self.started_at = datetime.now()
+        self.stages = {}
+        self.status = "running"
+        self.rows_saved = 0
+        self._start = time.perf_counter()
+        self._elapsed = None
+        self._lock = threading.Lock()
+    
+    def add(self, name, seconds):
+        # 批次模式下抓取及寫入在不同執行緒，共用同一個 timer
+        with self._lock:
+            stage = self.stages.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0})
+            stage["count"] += 1
+            stage["total"] += seconds
+            stage["max"] = max(stage["max"], seconds)
+    
+    def finish(self, status):
+        self.status = status
+        self._elapsed = time.perf_counter() - self._start
+    
+    @property
+    def elapsed(self):
+        return self._elapsed if self._elapsed is not None else time.perf_counter() - self._start
+    
+    def to_dict(self):
+        return {
+            "video_id": self.video_id,
+            "engine": self.engine,
+            "status": self.status,
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "total_seconds": round(self.elapsed, 3),
+            "rows_saved": self.rows_saved,
+            "stages": {
+                name: {"count": stage["count"], "total": round(stage["total"], 3), "max": round(stage["max"], 3)}
+                for name, stage in self.stages.items()
+            }
+        }
+    
+    def print_summary(self):
+        print(f"\n=== 各階段耗時 ({self.video_id}) ===")
+        for name, stage in sorted(self.stages.items(), key=lambda item: item[1]["total"], reverse=True):
+            share = stage["total"] / self.elapsed * 100 if self.elapsed > 0 else 0
+            print(f"{name}: {stage['total']:.2f}s ({share:.0f}%), 次數: {stage['count']}, 最長: {stage['max']:.2f}s")
+        print(f"總計: {self.elapsed:.2f}s")
+    
+    def export_json(self, directory=None):
+        """輸出成 JSON 檔，回傳檔案路徑"""
+        directory = directory or TIMING_SETTINGS["export_dir"]
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{self.video_id}-{self.started_at:%Y%m%d-%H%M%S}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        return path
+
+def start_timer(video_id, engine=None):
+    """開始一次抓取的計時，TIMING_SETTINGS 關閉時回傳 None"""
+    if not TIMING_SETTINGS["enabled"]:
+        return None
+    return RunTimer(video_id, engine)
+
+def current_timer():
+    return _current_timer.get()
+
+@contextmanager
+def use_timer(timer):
+    """讓這段程式中的 stage() 記錄到 timer"""
+    token = _current_timer.set(timer)
+    try:
+        yield timer
+    finally:
+        _current_timer.reset(token)
+
+@contextmanager
+def stage(name):
+    """計時一個階段，沒有進行中的 timer 時不做任何事"""
+    timer = _current_timer.get()
+    if timer is None:
+        yield
+        return
+    
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(name, time.perf_counter() - start)
+
+def record_stage(name, seconds):
+    """記錄已經量好的耗時 (例如滾動等待時間)"""
+    timer = _current_timer.get()
+    if timer is not None:
+        timer.add(name, seconds)
+
+@contextmanager
+def profile_run(name):
+    """依 TIMING_SETTINGS["profile"] 選擇 cProfile 或 pyinstrument 分析這段程式"""
+    mode = TIMING_SETTINGS["profile"]
+    if not mode:
+        yield
+        return
+    
+    directory = TIMING_SETTINGS["profile_dir"]
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{name}-{datetime.now():%Y%m%d-%H%M%S}")
+    
+    if mode == "pyinstrument":
+        if Profiler is None:
+            print("沒有安裝 pyinstrument，改用 cProfile")
+        else:
+            profiler = Profiler()
+            profiler.start()
+            try:
+                yield
+            finally:
+                profiler.stop()
+                with open(path + ".html", "w", encoding="utf-8") as f:
+                    f.write(profiler.output_html())
+                print(f"效能分析已存到 {path}.html")
+            return
+    
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path + ".prof")
+        print(f"效能分析已存到 {path}.prof (可用 python -m pstats 或 snakeviz 開啟)")
\ No newline at end of file
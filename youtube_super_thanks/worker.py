@@ -0,0 +1,74 @@
+import threading
+import time
+from config import JOB_SETTINGS
+from database.db_init import init_database, get_db_connection
+from database.db_queries import claim_job, finish_job, fail_job, requeue_running_jobs
+from scraper.browser import BrowserPool
+from scraper.scraper import scrape_super_thanks
+
+def _job_worker(worker_id, pool, stop_event, poll_interval):
+    """不斷從 scrape_jobs 取出工作執行，直到收到停止訊號"""
+    conn = get_db_connection()
+    name = f"worker-{worker_id}"
+    try:
+        while not stop_event.is_set():
+            job = claim_job(conn, name)
+            if job is None:
+                stop_event.wait(poll_interval)
+                continue
+            
+            print(f"[{name}] 開始工作 #{job['id']}: {job['video_id']} (第 {job['attempts']}/{job['max_attempts']} 次)")
+            try:
+                scrape_super_thanks(job["video_url"], pool, job["incremental"], raise_errors=True)
+            except Exception as e:
+                delay = fail_job(conn, job, e)
+                if delay is None:
+                    print(f"[{name}] 工作 #{job['id']} 失敗，已達重試上限")
+                else:
+                    print(f"[{name}] 工作 #{job['id']} 失敗，{delay} 秒後重試")
+            else:
+                finish_job(conn, job["id"])
+                print(f"[{name}] 工作 #{job['id']} 完成")
+    finally:
+        conn.close()
+
+def run_worker(workers=None, poll_interval=None):
+    """背景處理抓取工作佇列，同時最多執行 workers 個工作，Ctrl+C 停止"""
+    if workers is None:
+        workers = JOB_SETTINGS["workers"]
+    if poll_interval is None:
+        poll_interval = JOB_SETTINGS["poll_interval"]
+    
+    conn = init_database()
+    try:
+        # 上次 worker 中斷時還沒做完的工作重新排入佇列
+        requeued = requeue_running_jobs(conn)
+        if requeued:
+            print(f"重新排入 {requeued} 個中斷的工作")
+    finally:
+        conn.close()
+    
+    pool = BrowserPool(size=workers)
+    stop_event = threading.Event()
+    threads = [
+        threading.Thread(target=_job_worker, args=(i + 1, pool, stop_event, poll_interval))
+        for i in range(workers)
+    ]
+    for thread in threads:
+        thread.start()
+    
+    print(f"抓取 worker 已啟動 ({workers} 個)，按 Ctrl+C 停止")
+    try:
+        while any(thread.is_alive() for thread in threads):
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("停止中，等待目前的工作完成...")
+        stop_event.set()
+        for thread in threads:
+            thread.join()
+    finally:
+        pool.print_stats()
+        pool.close()
+
+if __name__ == "__main__":
+    run_worker()
\ No newline at end of file